@@ -0,0 +1,659 @@
+import io
+import atexit
+import pathlib
+import contextlib
+import concurrent.futures
+import pandas as pd
+from sheetcache import SheetCache, default_cache_size
+from filemanifest import FileManifest, source_hash
+from fileindex import DirectoryIndex
+from layoutcache import LayoutCache
+from checkpointstore import CheckpointStore
+from countrylist import euls, euplusls, allcountryls, allcountryls_missing, allcountryls_missing_noeua
+import xlsxreader
+import archivefile
+import runreport
+import pipeline
+import longtable
+from runreport import stage
+
+# Excel reader backend, see set_reader
+reader = xlsxreader.default_reader
+# Cache of parsed Reporting table sheets, see set_sheet_cache
+sheet_cache = None
+# Manifest of the files read and the values extracted for incremental runs, see set_manifest
+manifest = None
+# Row and column positions found in the sheets of each country, see set_layout_cache
+layout_cache = None
+# Results saved for each country and table to resume interrupted runs, see set_checkpoint
+checkpoint_store = None
+# Index of Reporting table files by country and year for each Inventory Parties directory, see directory_index
+directory_index_dict = {}
+# Number of parallel processes to read Reporting table files, see set_jobs
+jobs = 1
+process_pool = None
+# Number of Reporting table files read ahead into memory while a file is parsed, see set_prefetch
+prefetch = pipeline.default_prefetch
+# The contents of the files read ahead, see read_files
+prefetched_dict = {}
+# Reporting table files opened with open_workbook
+open_workbook_dict = {}
+
+
+class Workbook:
+    """Reporting table file opened once for several sheets, see open_workbook"""
+
+    def __init__(self, file):
+        self.file = file
+        self.xlsx = None
+        self.sheet_dict = {}
+
+    def excel_file(self):
+        """The Excel file opened with the reader backend when first needed (see xlsxreader.open_excel)"""
+        if self.xlsx is None:
+            with stage('open'):
+                if self.file in prefetched_dict:
+                    source = io.BytesIO(prefetched_dict[self.file])
+                else:
+                    source = archivefile.excel_source(self.file)
+                self.xlsx = xlsxreader.open_excel(source, reader)
+        return self.xlsx
+
+    def read_sheet(self, sheet, read_options):
+        """Parse the sheet once, later calls with the same options return a copy"""
+        key = (sheet, repr(sorted(read_options.items())))
+        if key not in self.sheet_dict:
+            xlsx = self.excel_file()
+            with stage('parse'):
+                self.sheet_dict[key] = xlsx.parse(sheet, **read_options)
+        return self.sheet_dict[key].copy()
+
+    def close(self):
+        if self.xlsx is not None:
+            self.xlsx.close()
+        self.sheet_dict = {}
+
+
+@contextlib.contextmanager
+def open_workbook(file):
+    """Keep the Reporting table file open for read_sheet and sheet_names calls within the with block
+
+    The file is opened (unzipped) once and each sheet is parsed once however many
+    times it is read, e.g. Table4.Gs1 for both HWP net emissions and gains and losses.
+    Nested open_workbook calls for the same file use the already opened file.
+
+    Args:
+        file (str): Reporting table file
+    """
+    if file in open_workbook_dict:
+        yield open_workbook_dict[file]
+        return
+    workbook = Workbook(file)
+    open_workbook_dict[file] = workbook
+    try:
+        yield workbook
+    finally:
+        del open_workbook_dict[file]
+        workbook.close()
+
+
+def read_excel(file, sheet, read_options):
+    """Parse the sheet from the file, using the file if opened with open_workbook"""
+    if file in open_workbook_dict:
+        return open_workbook_dict[file].read_sheet(sheet, read_options)
+    with open_workbook(file) as workbook:
+        return workbook.read_sheet(sheet, read_options)
+
+
+def excel_sheet_names(file):
+    """Sheet names in the file, using the file if opened with open_workbook"""
+    if file in open_workbook_dict:
+        return open_workbook_dict[file].excel_file().sheet_names
+    with open_workbook(file) as workbook:
+        return workbook.excel_file().sheet_names
+
+
+def set_reader(name):
+    """Set the Excel reader backend used to read the Reporting table files
+
+    openpyxl is the pandas default. calamine requires the python-calamine package.
+    stream parses only the XML of the sheets read and returns the same DataFrames
+    as openpyxl, see xlsxreader.py. On pandas versions not supported by stream
+    openpyxl is used instead.
+
+    Args:
+        name (str): reader backend, one of xlsxreader.reader_ls
+    Returns:
+        str: the reader backend used
+    """
+    global reader
+    if name not in xlsxreader.reader_ls:
+        raise ValueError("Unknown Excel reader "+str(name)+", use one of "+str(xlsxreader.reader_ls))
+    if name == 'stream' and not xlsxreader.stream_supported():
+        print("Warning: Excel reader stream does not support pandas", pd.__version__,
+              "(see requirements.txt), using openpyxl")
+        name = 'openpyxl'
+    if name == 'calamine':
+        try:
+            # Only checks that the package is installed, pandas imports it when reading
+            import python_calamine
+        except ImportError:
+            raise ImportError("The calamine reader requires python-calamine: pip install python-calamine")
+    close_pool()
+    reader = name
+    return reader
+
+
+def set_sheet_cache(cache_dir, max_size=default_cache_size):
+    """Use persistent cache for the parsed Reporting table sheets
+
+    Args:
+        cache_dir (str): cache directory, None disables the cache
+        max_size (int): maximum size of the cache in megabytes
+    """
+    global sheet_cache
+    if cache_dir is None:
+        sheet_cache = None
+    else:
+        sheet_cache = SheetCache(cache_dir, max_size)
+    return sheet_cache
+
+
+def read_sheet(file, sheet, cell_range=None, stop_labels=None, **read_options):
+    """Read one sheet from Reporting table (Excel) file as in pd.read_excel(pd.ExcelFile(file),sheet,**read_options)
+
+    If the sheet cache is set (set_sheet_cache) the parsed sheet is looked up
+    from the cache first and the Excel file is opened only if it is not found.
+    Within open_workbook the file is opened only once for all sheets.
+    With the stream reader only the cells in cell_range are read and reading stops
+    after the rows of stop_labels. The other readers read the whole sheet, the rows
+    and values found are the same.
+
+    Args:
+        file (str): Reporting table file
+        sheet (str): sheet name
+        cell_range (str): the cells needed, e.g. 'B:M' (see xlsxreader.StreamWorkbook.get_sheet_data)
+        stop_labels (tuple): (label column, list of regular expressions), only the first row
+            below the header containing each label is needed (see xlsxreader.LabelStop)
+        read_options: options for pd.read_excel (keep_default_na, na_values, header, usecols etc.)
+    """
+    if reader == 'stream':
+        if cell_range is not None:
+            read_options['cell_range'] = cell_range
+        if stop_labels is not None:
+            read_options['stop_labels'] = stop_labels
+    if sheet_cache is None:
+        return read_excel(file, sheet, read_options)
+    with stage('sheet cache'):
+        key = sheet_cache.key(file, sheet, dict(read_options, reader=reader))
+        df = sheet_cache.get(key)
+    if df is None:
+        df = read_excel(file, sheet, read_options)
+        with stage('sheet cache'):
+            sheet_cache.put(key, df)
+    return df
+
+
+def sheet_names(file):
+    """Sheet names in the Reporting table (Excel) file, cached as read_sheet"""
+    if sheet_cache is None:
+        return excel_sheet_names(file)
+    with stage('sheet cache'):
+        key = sheet_cache.key(file, None, {'reader': reader})
+        names = sheet_cache.get(key)
+    if names is None:
+        names = excel_sheet_names(file)
+        with stage('sheet cache'):
+            sheet_cache.put(key, names)
+    return names
+
+
+def set_manifest(path):
+    """Use manifest of the Reporting table files read and the values extracted in map_country_files
+
+    Only the files that are new or have changed since the previous run with the
+    same manifest are read, the values of the other files come from the manifest.
+
+    Args:
+        path (str): manifest file, None disables the manifest
+    """
+    global manifest
+    if path is None:
+        manifest = None
+    else:
+        manifest = FileManifest(path)
+    return manifest
+
+
+def set_layout_cache(path):
+    """Use persistent cache of the row and column positions found in the sheets (see layoutcache.py)
+
+    Args:
+        path (str): layout cache file, None disables the cache
+    """
+    global layout_cache
+    if path is None:
+        layout_cache = None
+    else:
+        layout_cache = LayoutCache(path)
+    return layout_cache
+
+
+def set_checkpoint(directory):
+    """Save the results of each country and table in map_country_files as soon as they are read (see checkpointstore.py)
+
+    The countries and tables already saved in the directory are not read again, i.e.
+    an interrupted run with the same directory resumes from where it stopped.
+
+    Args:
+        directory (str): checkpoint directory, None disables the checkpoints
+    """
+    global checkpoint_store
+    if directory is None:
+        checkpoint_store = None
+    else:
+        checkpoint_store = CheckpointStore(directory)
+    return checkpoint_store
+
+
+def sheet_layout(file, country, sheet, df, column, resolve):
+    """The row and column positions in the parsed sheet found with resolve(df, country, file)
+
+    With the layout cache (set_layout_cache) the positions are searched only once for
+    each country and sheet layout, otherwise for each sheet.
+
+    Args:
+        file (str): Reporting table file
+        country (str): the country of the file
+        sheet (str): sheet name
+        df (pd.DataFrame): parsed sheet
+        column: the title column name
+        resolve: function (at module level) that finds the positions from df
+    """
+    if layout_cache is None:
+        return resolve(df, country, file)
+    with stage('layout'):
+        return layout_cache.layout(file, country, sheet, df, column, resolve)
+
+
+def find_sheet_name(file, sheet):
+    """Find the sheet name in the file ignoring case and leading and trailing whitespace
+
+    MOD 2026: for some reason EUA has now "Table4.Gs1 " (with trailing whitespace)
+
+    Args:
+        file (str): Reporting table file
+        sheet (str): sheet name to look for
+    Returns:
+        str: the sheet name in the file, None if not found
+    """
+    sheet_to_use = None
+    for sheet_name in sheet_names(file):
+        if sheet.strip().lower() == sheet_name.strip().lower():
+            sheet_to_use = sheet_name
+    return sheet_to_use
+
+
+def directory_index(directory):
+    """The index of the Reporting table files in the Inventory Parties directory, built once (see fileindex.py)
+
+    Args:
+        directory (str): Inventory Parties directory
+    """
+    if directory not in directory_index_dict:
+        directory_index_dict[directory] = DirectoryIndex(directory)
+    return directory_index_dict[directory]
+
+
+def year_files(directory, country, start, end):
+    """The Reporting table (Excel) files of a country for each inventory year start..end
+
+    The inventory year is read from the file name, so a missing file is None and
+    does not shift the later years. Years in 1980's that some countries report
+    are outside the inventory years.
+
+    Args:
+        directory (str): Inventory Parties directory
+        country (str): country directory (three letter acronym)
+        start (int): inventory start year
+        end (int): inventory end year
+    Returns:
+        list: file for each year, None if the file of the year is missing
+    """
+    return directory_index(directory).files(country, start, end)
+
+
+def set_jobs(n):
+    """Set the number of parallel processes used in map_country_files
+
+    Args:
+        n (int): number of processes, 1 reads the files in the calling process
+    """
+    global jobs
+    close_pool()
+    jobs = max(1, int(n))
+    return jobs
+
+
+def set_prefetch(n):
+    """Set the number of Reporting table files read ahead in map_country_files (see pipeline.Prefetcher)
+
+    The next files are read from the disk (and the zip archives) in reader threads while
+    the current file is parsed. Used when the files are read in the calling process (jobs 1).
+
+    Args:
+        n (int): number of files read ahead, 0 reads each file only when it is parsed
+    """
+    global prefetch
+    prefetch = max(0, int(n))
+    return prefetch
+
+
+def close_pool():
+    """Shut down the process pool if it is running"""
+    global process_pool
+    if process_pool is not None:
+        process_pool.shutdown()
+        process_pool = None
+
+
+def init_worker(cache_dir, max_size, reader_name):
+    """Process pool initializer: use the same sheet cache and Excel reader as the main process"""
+    global reader
+    # Not set_reader: it would shut down the process pool copied to the forked worker
+    reader = reader_name
+    if cache_dir is not None:
+        set_sheet_cache(cache_dir, max_size)
+
+
+def get_pool():
+    """The process pool of jobs processes, created when first needed"""
+    global process_pool
+    if process_pool is None:
+        if sheet_cache is None:
+            initargs = (None, default_cache_size, reader)
+        else:
+            initargs = (str(sheet_cache.cache_dir), sheet_cache.max_bytes//(1024*1024), reader)
+        process_pool = concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                                                              initargs=initargs)
+    return process_pool
+
+
+atexit.register(close_pool)
+
+
+def pool_task(trace_memory, func, file, country, *args):
+    """Process pool task: func(file, country, *args) in the worker
+
+    Args:
+        trace_memory (bool): see runreport.RunReport, None if there is no run report
+    Returns:
+        tuple: the result of func, the records of the run report and the updates
+               of the layout cache of the worker to merge in the main process
+    """
+    if trace_memory is None:
+        (result, records) = (func(file, country, *args), None)
+    else:
+        (result, records) = runreport.extract_task(trace_memory, func, file, country, *args)
+    updates = layout_cache.take_updates() if layout_cache is not None else None
+    return (result, records, updates)
+
+
+def cached_file_key(file, country, func, args):
+    """Sheet cache key of the marker that all sheets read by func(file, country, *args) are in the sheet cache"""
+    return sheet_cache.key(file, None, {'reader': reader, 'func': func.__module__+'.'+func.__qualname__,
+                                        'country': country, 'args': args, 'source': source_hash(func)})
+
+
+def read_files(func, task_ls, read_ls, args):
+    """Results of func(file, country, *args) for the tasks read_ls in task_ls in the same order, see map_country_files
+
+    The results are yielded as soon as they are read. In the process pool at most 2*jobs files
+    are read ahead of the result yielded, in the calling process the next prefetch files are
+    read into memory while the current file is parsed (see pipeline.py), except the files whose
+    sheets are all in the sheet cache from an earlier run (see cached_file_key). The consumer (the
+    checkpoints and the manifest in map_country_files) keeps up with the readers, so the
+    memory stays flat however many files there are.
+    """
+    if jobs > 1 and len(read_ls) > 1:
+        # The stages and the layouts in the workers are merged to the run report and the layout cache
+        trace_memory = runreport.run_report.trace_memory if runreport.run_report is not None else None
+        arg_iter = ((trace_memory, func, task_ls[i][0], task_ls[i][1])+tuple(args) for i in read_ls)
+        for (result, records, updates) in pipeline.ordered_map(get_pool(), pool_task, arg_iter, 2*jobs):
+            if records is not None:
+                runreport.run_report.merge(records)
+            if updates is not None:
+                layout_cache.merge(updates)
+            yield result
+    else:
+        prefetcher = pipeline.Prefetcher(prefetch)
+        cached_key_dict = {}
+        skip = None
+        if sheet_cache is not None:
+            # Files not needed: a cache miss (e.g. an evicted sheet) opens the file when parsed
+            cached_key_dict = dict((task_ls[i][0], cached_file_key(task_ls[i][0], task_ls[i][1], func, args))
+                                   for i in read_ls)
+            skip = lambda file: sheet_cache.contains(cached_key_dict[file])
+        try:
+            for (i, (file, contents)) in zip(read_ls, prefetcher.contents((task_ls[i][0] for i in read_ls), skip)):
+                if contents is not None:
+                    prefetched_dict[file] = contents
+                try:
+                    result = runreport.extract(func, file, task_ls[i][1], *args)
+                finally:
+                    prefetched_dict.pop(file, None)
+                if file in cached_key_dict and not sheet_cache.contains(cached_key_dict[file]):
+                    sheet_cache.put(cached_key_dict[file], True)
+                yield result
+        finally:
+            prefetcher.close()
+
+
+def map_country_files(func, directory, countryls, start, end, *args):
+    """Apply func(file, country, *args) to the Reporting table files of each country for the inventory years
+
+    With jobs > 1 (set_jobs) the files are read in a process pool. In both cases the
+    results are returned in the country and year order, i.e. the result is the same
+    as reading the files one after another. With the manifest (set_manifest) only the
+    new and changed files are read. With the checkpoints (set_checkpoint) the results
+    of each country are saved as soon as its files are read and the countries already
+    saved are not read. The file of each year is found with year_files.
+
+    Args:
+        func: function to read one file, must be defined at module level
+        directory (str): Inventory Parties directory
+        countryls (list): list of countries
+        start (int): inventory start year
+        end (int): inventory end year
+        args: additional arguments to func
+    Returns:
+        list: for each country the list of func results for the years start..end, None for missing files
+    """
+    country_file_lss = [year_files(directory, country, start, end) for country in countryls]
+    result_lss = [None]*len(countryls)
+    checkpoint_key_ls = [None]*len(countryls)
+    if checkpoint_store is not None:
+        for (country_index, (country, excelfilels)) in enumerate(zip(countryls, country_file_lss)):
+            checkpoint_key_ls[country_index] = checkpoint_store.key(func, country, args, excelfilels)
+            (found, result_ls) = checkpoint_store.get(checkpoint_key_ls[country_index])
+            if found:
+                result_lss[country_index] = result_ls
+    # The files of the countries not in the checkpoints, task_index_lss the task of each year
+    task_ls = []
+    task_index_lss = []
+    for (country_index, (country, excelfilels)) in enumerate(zip(countryls, country_file_lss)):
+        task_index_ls = []
+        for file in excelfilels:
+            if file is None or result_lss[country_index] is not None:
+                task_index_ls.append(None)
+            else:
+                task_index_ls.append(len(task_ls))
+                task_ls.append((file, country, country_index))
+        task_index_lss.append(task_index_ls)
+    results = [None]*len(task_ls)
+    read_ls = list(range(len(task_ls)))
+    if manifest is not None:
+        read_ls = []
+        with stage('manifest'):
+            for (i, (file, country, country_index)) in enumerate(task_ls):
+                (found, result) = manifest.get(file, func, country, args)
+                if found:
+                    results[i] = result
+                else:
+                    read_ls.append(i)
+    # The number of files still to read of each country, the results of a country are saved when all are read
+    pending_ls = [0]*len(countryls)
+    for i in read_ls:
+        pending_ls[task_ls[i][2]] = pending_ls[task_ls[i][2]]+1
+
+    def country_results(country_index):
+        return [None if i is None else results[i] for i in task_index_lss[country_index]]
+
+    def save_checkpoint(country_index):
+        if checkpoint_store is not None and result_lss[country_index] is None:
+            checkpoint_store.put(checkpoint_key_ls[country_index], country_results(country_index))
+
+    for country_index in range(len(countryls)):
+        if pending_ls[country_index] == 0:
+            save_checkpoint(country_index)
+    read_results = []
+    for (i, result) in zip(read_ls, read_files(func, task_ls, read_ls, args)):
+        results[i] = result
+        read_results.append(result)
+        country_index = task_ls[i][2]
+        pending_ls[country_index] = pending_ls[country_index]-1
+        if pending_ls[country_index] == 0:
+            save_checkpoint(country_index)
+    if manifest is not None:
+        with stage('manifest'):
+            for (i, result) in zip(read_ls, read_results):
+                manifest.put(task_ls[i][0], func, task_ls[i][1], args, result)
+            manifest.save()
+        print("Incremental:", len(read_ls), "files read,", len(task_ls)-len(read_ls), "files from manifest", manifest.path)
+    if layout_cache is not None:
+        layout_cache.print_report()
+        layout_cache.save()
+    if checkpoint_store is not None:
+        checkpoint_store.print_report()
+    for (country_index, (country, excelfilels)) in enumerate(zip(countryls, country_file_lss)):
+        if result_lss[country_index] is None:
+            result_lss[country_index] = country_results(country_index)
+        for (year, file) in zip(range(start, end+1), excelfilels):
+            if file is None:
+                print("Missing file", country, year)
+    return result_lss
+
+
+def add_country_arguments(parser, directory_list=True):
+    """Add the country selection options of the scripts to the argument parser, one of them is required
+
+    Args:
+        parser (argparse.ArgumentParser): the argument parser of the script
+        directory_list (bool): add also -l, the countries in the Inventory Parties directory (args.f1)
+    Returns:
+        the mutually exclusive argument group
+    """
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--eu", action="store_true", dest="eu",
+                       default=False, help="EU countries")
+    group.add_argument("--euplus", action="store_true", dest="euplus",
+                       default=False, help="EU countries plus GBR, ISL and NOR")
+    group.add_argument("-a", "--all", action="store_true",
+                       dest="all", default=False, help="All countries (EU+others)")
+    if directory_list:
+        group.add_argument("-l", "--list", action="store_true", dest="countryls", default=False,
+                           help="List files in Inventory Parties Directory")
+    group.add_argument("-c", "--countries", dest="country", type=str, nargs='+',
+                       help="List of countries from the official acronyms separated by spaces")
+    group.add_argument("--amissing", action="store_true", dest="all_missing", default=False,
+                       help='All countries where some are missing. See allcountryls_missing in countrylist.py')
+    group.add_argument("--amissingnoeua", action="store_true", dest="all_missing_no_eua", default=False,
+                       help='All countries where some are missing, no EUA. See allcountryls_missing_noeua in countrylist.py')
+    return group
+
+
+def select_countries(args, all_missing_prefix='all_countries_some_missing'):
+    """The countries selected with the options of add_country_arguments and the output file name prefix
+
+    Args:
+        args (argparse.Namespace): the parsed arguments, args.f1 is the Inventory Parties directory
+        all_missing_prefix (str): the file name prefix of --amissing
+    Returns:
+        tuple: (list of countries, file name prefix), e.g. (['AUT','FIN'], 'AUT_FIN') for -c AUT FIN
+    """
+    if args.eu:
+        print("Using EU  countries")
+        return (euls, 'EU')
+    elif args.euplus:
+        print("Using EU  countries plus GBR, ISL and NOR")
+        return (euplusls, 'EU_GBR_ISL_NOR')
+    elif args.all:
+        print("Using all countries")
+        return (allcountryls, 'EU_and_Others')
+    elif getattr(args, 'countryls', False):
+        print("Listing countries in", args.f1)
+        return (directory_index(args.f1).countries(), pathlib.Path(args.f1).name)
+    elif args.all_missing:
+        print("Using allcountry list missing")
+        return (allcountryls_missing, all_missing_prefix)
+    elif args.all_missing_no_eua:
+        print("Using allcountry list missing, no EUA")
+        return (allcountryls_missing_noeua, 'all_countries_no_EUA')
+    print("Using countries:", args.country)
+    return (args.country, '_'.join(args.country))
+
+
+def add_run_arguments(parser, layout_cache=True, long_table=True):
+    """Add the options of reading the Reporting table files (processes, prefetch, caches, reader,
+    incremental and resumed runs), the long table output and the run report to the argument parser
+
+    Args:
+        parser (argparse.ArgumentParser): the argument parser of the script
+        layout_cache (bool): add also --layoutcache, for the scripts using sheet_layout
+        long_table (bool): add also --long, for the scripts saving the long table
+    """
+    parser.add_argument("-j", "--jobs", dest="jobs", type=int, default=1,
+                        help="Number of parallel processes to read the Reporting table files")
+    parser.add_argument("--prefetch", dest="prefetch", type=int, default=pipeline.default_prefetch,
+                        help="Number of Reporting table files read ahead into memory while a file is parsed (default %(default)s), 0 disables")
+    parser.add_argument("--cache", dest="cache", default=None,
+                        help="Directory for the persistent cache of parsed Reporting table sheets")
+    parser.add_argument("--cachesize", dest="cachesize", type=int, default=default_cache_size,
+                        help="Maximum size of the sheet cache in MB (default %(default)s)")
+    parser.add_argument("--reader", dest="reader", choices=xlsxreader.reader_ls, default=xlsxreader.default_reader,
+                        help="Excel reader backend (default %(default)s), stream parses only the sheets needed")
+    parser.add_argument("--incremental", dest="incremental", default=None,
+                        help="Manifest file of the files read and the values extracted: read only new and changed Reporting table files")
+    if layout_cache:
+        parser.add_argument("--layoutcache", dest="layoutcache", default=None,
+                            help="Layout cache file: the rows are searched once for each sheet layout of a country, layout changes are reported")
+    parser.add_argument("--resume", dest="resume", default=None,
+                        help="Checkpoint directory: the results of each country and table are saved as soon as they are read, a run interrupted with the same directory resumes from where it stopped")
+    if long_table:
+        parser.add_argument("--long", dest="long", default=None,
+                            help="Save also all values read as one long table (country, year, table, category, measure, unit, value, notation_key): .parquet or .feather (requires pyarrow), .csv or .sqlite (see inventorydb.py), see longtable.py")
+    parser.add_argument("--report", dest="report", default=None,
+                        help="Write the time and memory of each stage and Reporting table file to this JSON file")
+    parser.add_argument("--profile", dest="profile", default=None,
+                        help="Write cProfile statistics of the run to this file (see python -m pstats)")
+    parser.add_argument("--tracemem", dest="tracemem", action="store_true", default=False,
+                        help="Report also the peak memory allocated in each stage (tracemalloc, slower)")
+
+
+def apply_run_arguments(args):
+    """Set up reading the Reporting table files with the options of add_run_arguments, check the long
+    table file before the files are read and start the run report (see runreport.start)
+
+    Args:
+        args (argparse.Namespace): the parsed arguments
+    """
+    set_sheet_cache(args.cache, args.cachesize)
+    set_reader(args.reader)
+    set_manifest(args.incremental)
+    set_layout_cache(getattr(args, 'layoutcache', None))
+    set_checkpoint(args.resume)
+    set_jobs(args.jobs)
+    set_prefetch(args.prefetch)
+    if getattr(args, 'long', None) is not None:
+        longtable.check_long_file(args.long)
+    runreport.start(args.report, args.profile, args.tracemem)
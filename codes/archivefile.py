@@ -0,0 +1,117 @@
+import io
+import os
+import zipfile
+import pathlib
+
+# Reporting table file inside a zip archive: the archive, the separator and the member name, e.g.
+# ../UNFCCC_GHG_2025/AUT.zip!AUT-CRT-2025-V1.0-1990-20250411-120000_started.xlsx
+member_separator = '!'
+
+
+def member_file(archive, member):
+    """The file name of the archive member used in place of a file path"""
+    return str(archive)+member_separator+member
+
+
+def split_member(file):
+    """(archive, member) of a file in a zip archive, (file, None) for other files
+
+    Args:
+        file (str): file path or archive member, see member_file
+    """
+    if member_separator in str(file):
+        (archive, member) = str(file).rsplit(member_separator, 1)
+        if archive.lower().endswith('.zip'):
+            return (archive, member)
+    return (file, None)
+
+
+def is_archive(path):
+    """True if the path is a zip archive file"""
+    return str(path).lower().endswith('.zip') and os.path.isfile(path)
+
+
+def file_name(file):
+    """The name of the file without the directory (and the archive), e.g. for parse_file_name"""
+    (archive, member) = split_member(file)
+    if member is None:
+        return pathlib.Path(file).name
+    return pathlib.PurePosixPath(member).name
+
+
+def xlsx_members(archive, country=None):
+    """The Excel (xlsx) files in the zip archive as archive members (see member_file)
+
+    Args:
+        archive: zip archive
+        country (str): only the files in the directory named country (Inventory Parties archive),
+                       None for all files (archive of one country)
+    """
+    with zipfile.ZipFile(archive) as zip_file:
+        member_ls = [info.filename for info in zip_file.infolist()
+                     if not info.is_dir() and info.filename.endswith('.xlsx')]
+    if country is not None:
+        member_ls = [member for member in member_ls if pathlib.PurePosixPath(member).parent.name == country]
+    return [member_file(archive, member) for member in sorted(member_ls)]
+
+
+def member_info(file):
+    """The zipfile.ZipInfo of the archive member"""
+    (archive, member) = split_member(file)
+    with zipfile.ZipFile(archive) as zip_file:
+        return zip_file.getinfo(member)
+
+
+def exists(file):
+    """True if the file or the archive member exists"""
+    (archive, member) = split_member(file)
+    if member is None:
+        return os.path.exists(file)
+    try:
+        member_info(file)
+    except (FileNotFoundError, KeyError, zipfile.BadZipFile):
+        return False
+    return True
+
+
+def file_state(file):
+    """Size and modification time of the file, for an archive member the size, time stamp and CRC of the member
+
+    The state changes when the file changes, the archive itself can be replaced
+    (e.g. downloaded again) without changing the state of the members not changed.
+    """
+    (archive, member) = split_member(file)
+    if member is None:
+        stat = os.stat(file)
+        return (stat.st_size, stat.st_mtime_ns)
+    info = member_info(file)
+    return (info.file_size, info.date_time, info.CRC)
+
+
+def open_binary(file):
+    """Open the file or the archive member for reading bytes"""
+    (archive, member) = split_member(file)
+    if member is None:
+        return open(file, 'rb')
+    with zipfile.ZipFile(archive) as zip_file:
+        # The member stays readable after the archive is closed
+        return zip_file.open(member)
+
+
+def read_bytes(file):
+    """The contents of the file or the archive member"""
+    with open_binary(file) as f:
+        return f.read()
+
+
+def excel_source(file):
+    """The file for the Excel readers: the path, or the archive member read into memory
+
+    Reading xlsx needs random access (xlsx is a zip archive itself), so the member
+    is decompressed into memory once instead of unpacking the archive on disk.
+    """
+    (archive, member) = split_member(file)
+    if member is None:
+        return file
+    with zipfile.ZipFile(archive) as zip_file:
+        return io.BytesIO(zip_file.read(member))
@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import json
+import shlex
+import pathlib
+import argparse
+import subprocess
+import pandas as pd
+from countrylist import allcountryls
+import syntheticinventory
+
+# The python scripts to benchmark and their extra command line arguments
+script_dict = {'hwp': ('euco2hwp.py', []),
+               'hwpgainslosses': ('euco2hwp_gains_losses.py', []),
+               'restoration': ('eurestoration.py', []),
+               'landtransition': ('eulandtransitionmatrix.py', []),
+               'landtransitionsinglepass': ('eulandtransitionmatrix.py', ['--singlepass']),
+               'allproducts': ('euallproducts.py', [])}
+# The multipass land transition matrix reads each file 81 times, run it only on request
+default_script_ls = ['hwp', 'hwpgainslosses', 'restoration', 'landtransitionsinglepass', 'allproducts']
+
+
+def RunScript(script, directory, countryls, start, end, extra_args, output_dir):
+    """
+    Run one python script as in the command line and measure the wall clock time
+    \param script Script name in script_dict
+    \param directory Inventory Parties directory
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \param extra_args Additional command line arguments (list) for the script, e.g. ['--reader','stream']
+    \param output_dir Directory for the output files and the log of the script
+    \return time used in seconds
+    """
+    (script_file, script_args) = script_dict[script]
+    code_dir = pathlib.Path(__file__).resolve().parent
+    command = [sys.executable, str(code_dir/script_file), '-d', str(pathlib.Path(directory).resolve()),
+               '-s', str(start), '-e', str(end), '-c']+countryls+script_args+extra_args
+    os.makedirs(output_dir, exist_ok=True)
+    with open(pathlib.Path(output_dir)/(script+'.log'), 'w') as log:
+        t0 = time.perf_counter()
+        subprocess.run(command, cwd=output_dir, stdout=log, stderr=subprocess.STDOUT, check=True)
+        return time.perf_counter()-t0
+
+
+def RunBenchmark(directory, countryls, start, end, script_ls, extra_args, repeat, output_dir):
+    """
+    Run the scripts on the Reporting table files and collect the times
+    \param directory Inventory Parties directory
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \param script_ls Scripts to run (see script_dict)
+    \param extra_args Additional command line arguments for all scripts
+    \param repeat Number of runs for each script, the best time is reported
+    \param output_dir Directory for the output files and logs
+    \return DataFrame of the times for each script
+    """
+    nfiles = len(countryls)*(end-start+1)
+    row_ls = []
+    for script in script_ls:
+        time_ls = []
+        for i in range(repeat):
+            print("Running", script, "run", i+1, "of", repeat)
+            time_ls.append(RunScript(script, directory, countryls, start, end, extra_args,
+                                     str(pathlib.Path(output_dir)/script)))
+        row_ls.append([script, len(countryls), end-start+1, nfiles, min(time_ls), sum(time_ls)/len(time_ls),
+                       min(time_ls)/nfiles])
+    df = pd.DataFrame(row_ls, columns=['Script', 'Countries', 'Years', 'Files', 'Best (s)', 'Mean (s)',
+                                       'Best per file (s)'])
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the python scripts on synthetic Reporting table files (see syntheticinventory.py)")
+    parser.add_argument("-w", "--workdir", dest="workdir", required=True,
+                        help="Work directory for the synthetic inventory, output files and logs")
+    parser.add_argument("-s", "--start", type=int, dest="f2", default=1990, help="Inventory start year (default %(default)s)")
+    parser.add_argument("-e", "--end", type=int, dest="f3", default=1994, help="Inventory end year (default %(default)s)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-c", "--countries", dest="country", type=str, nargs='+',
+                       help="List of countries from the official acronyms separated by spaces")
+    group.add_argument("-n", "--ncountries", dest="ncountries", type=int, default=5,
+                       help="Number of countries from the list of all countries (default %(default)s)")
+    parser.add_argument("--scripts", dest="scripts", nargs='+', choices=list(script_dict), default=default_script_ls,
+                        help="Scripts to run (default %(default)s)")
+    parser.add_argument("--args", dest="args", default='',
+                        help="Additional arguments for all scripts in quotes, e.g. --args '--reader stream -j 4'")
+    parser.add_argument("-r", "--repeat", dest="repeat", type=int, default=1, help="Runs for each script (default %(default)s)")
+    parser.add_argument("--seed", dest="seed", type=int, default=0, help="Random seed of the synthetic inventory")
+    parser.add_argument("--json", dest="json", default=None, help="Write the results also to this JSON file")
+    args = parser.parse_args()
+    countryls = args.country if args.country else allcountryls[:args.ncountries]
+    workdir = pathlib.Path(args.workdir)
+    # The synthetic inventory is written once for the countries, years and seed and reused in later runs
+    directory = workdir/('inventory_'+str(args.f2)+'_'+str(args.f3)+'_'+str(args.seed))
+    missing_countryls = [country for country in countryls if not (directory/country).is_dir()]
+    if missing_countryls:
+        print("Writing synthetic Reporting tables for", missing_countryls, "to", directory)
+        syntheticinventory.GenerateInventory(str(directory), missing_countryls, args.f2, args.f3, args.seed)
+    df = RunBenchmark(str(directory), countryls, args.f2, args.f3, args.scripts, shlex.split(args.args), args.repeat,
+                      str(workdir/'output'))
+    print("Arguments:", args.args)
+    print(df.to_string(index=False))
+    if args.json is not None:
+        with open(args.json, 'w') as f:
+            json.dump({'countries': countryls, 'start': args.f2, 'end': args.f3, 'args': args.args,
+                       'results': df.to_dict(orient='records')}, f, indent=2)
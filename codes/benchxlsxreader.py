@@ -0,0 +1,146 @@
+import argparse
+import re
+import time
+import pandas as pd
+import EUutility
+import xlsxreader
+import eulandtransitionmatrix
+import eurestoration
+import hwpengine
+
+# The sheets read by eulandtransitionmatrix.py, eurestoration.py, euco2hwp.py and euco2hwp_gains_losses.py,
+# with the read options (cell_range and stop_labels included) of their EUutility.read_sheet calls
+bench_sheet_ls = ([(eulandtransitionmatrix.land_transition_matrix_sheet, eulandtransitionmatrix.table41_read_options)] +
+                  # eurestoration.ReadTable4Row: the rows up to the total row
+                  [(sheet, dict(eurestoration.table4_read_options, stop_labels=('B', [row_name])))
+                   for (sheet, row_name) in zip(eurestoration.sheet_ls, eurestoration.substr_ls)] +
+                  # eurestoration.ReadTable4Subcategories: the whole sheet
+                  [(sheet, eurestoration.table4_read_options) for sheet in eurestoration.sheet_ls] +
+                  [(hwpengine.table4Gs1_sheet, hwpengine.table4Gs1_read_options)])
+
+
+def ReadFileSheets(file, reader):
+    """
+    Read the benchmark sheets from one Reporting table file with the reader backend as the scripts
+    read them (EUutility.read_sheet within EUutility.open_workbook)
+    \param file Reporting table file
+    \param reader Excel reader backend (see xlsxreader.reader_ls)
+    \return list of DataFrames (None if the sheet is missing) and the time used in seconds
+    """
+    EUutility.set_reader(reader)
+    t0 = time.perf_counter()
+    df_ls = []
+    with EUutility.open_workbook(file):
+        for (sheet, read_options) in bench_sheet_ls:
+            sheet_to_use = EUutility.find_sheet_name(file, sheet)
+            if sheet_to_use is None:
+                df_ls.append(None)
+            else:
+                df_ls.append(EUutility.read_sheet(file, sheet_to_use, **read_options))
+    return (df_ls, time.perf_counter()-t0)
+
+
+def stop_rows_needed(df, read_options):
+    """
+    The number of rows of the whole sheet df needed to find the first row of each stop label,
+    i.e. the rows the stream reader must read at least (see xlsxreader.LabelStop)
+    \param df The whole sheet read with openpyxl
+    \param read_options Read options with stop_labels
+    \return number of rows
+    """
+    (column, pattern_ls) = read_options['stop_labels']
+    first_column = read_options.get('cell_range', read_options.get('usecols', 'A'))
+    label_ls = df.iloc[:, xlsxreader.column_index(column)-xlsxreader.column_index(first_column)]
+    rows = 0
+    for pattern in pattern_ls:
+        position_ls = [position for (position, label) in enumerate(label_ls)
+                       if isinstance(label, str) and re.search(pattern, label) is not None]
+        if len(position_ls) > 0:
+            rows = max(rows, position_ls[0]+1)
+    return rows
+
+
+def same_sheet(reference, df, read_options):
+    """
+    True if the sheet read is the same as with openpyxl. With stop_labels the stream reader reads only
+    the rows up to the stop labels: these rows must be the same as the first rows of the whole sheet
+    \param reference The sheet read with openpyxl
+    \param df The sheet read with another reader
+    \param read_options The read options of the sheet (see bench_sheet_ls)
+    """
+    if 'stop_labels' in read_options and len(df) < len(reference):
+        if len(df) < stop_rows_needed(reference, read_options):
+            return False
+        # The column types are inferred from the rows read
+        reference = reference.iloc[:len(df)]
+        check_dtype = False
+    else:
+        check_dtype = True
+    try:
+        pd.testing.assert_frame_equal(reference, df, check_dtype=check_dtype)
+    except AssertionError:
+        return False
+    return True
+
+
+def BenchmarkReaders(directory, countryls, start, end, readers):
+    """
+    Read the Reporting table files with each reader backend, check that the DataFrames
+    are the same as with openpyxl and print the time used by each reader
+    \param directory The directory where the Reporting tables are located
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \param readers List of reader backends
+    \return DataFrame of the total time and the number of differing sheets for each reader
+    """
+    filels = [file for country in countryls for file in EUutility.year_files(directory, country, start, end)
+              if file is not None]
+    print("Files:", len(filels))
+    time_dict = dict((reader, 0.0) for reader in readers)
+    diff_dict = dict((reader, 0) for reader in readers)
+    for file in filels:
+        (reference_ls, t) = ReadFileSheets(file, 'openpyxl')
+        if 'openpyxl' in time_dict:
+            time_dict['openpyxl'] = time_dict['openpyxl']+t
+        for reader in readers:
+            if reader == 'openpyxl':
+                continue
+            (df_ls, t) = ReadFileSheets(file, reader)
+            time_dict[reader] = time_dict[reader]+t
+            for ((sheet, read_options), df, reference) in zip(bench_sheet_ls, df_ls, reference_ls):
+                if df is None or reference is None:
+                    same = df is reference
+                else:
+                    same = same_sheet(reference, df, read_options)
+                if not same:
+                    diff_dict[reader] = diff_dict[reader]+1
+                    print("DIFFERENT", reader, file, sheet)
+    base = time_dict.get('openpyxl')
+    row_ls = []
+    for reader in readers:
+        speedup = base/time_dict[reader] if base is not None and time_dict[reader] > 0 else float('nan')
+        row_ls.append([reader, time_dict[reader], time_dict[reader]/max(1, len(filels)), speedup, diff_dict[reader]])
+    df = pd.DataFrame(row_ls, columns=['Reader', 'Total (s)', 'Per file (s)', 'Speedup', 'Different sheets'])
+    print(df.to_string(index=False))
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare Excel reader backends on Reporting table files")
+    parser.add_argument("-d", "--directory", dest="f1",
+                        required=True, help="Inventory Parties Directory (or zip archive)")
+    parser.add_argument("-s", "--start", type=int, dest="f2",
+                        required=True, help="Inventory start year (1990)")
+    parser.add_argument("-e", "--end", type=int, dest="f3",
+                        required=True, help="Inventory end year")
+    parser.add_argument("-c", "--countries", dest="country", type=str, nargs='+', required=True,
+                        help="List of countries from the official acronyms separated by spaces")
+    parser.add_argument("-r", "--readers", dest="readers", nargs='+', choices=xlsxreader.reader_ls,
+                        default=['openpyxl', 'stream'], help="Reader backends to compare (default %(default)s)")
+    args = parser.parse_args()
+    # Check that the reader backends are available (stream falls back to openpyxl on other pandas versions)
+    for reader in args.readers:
+        if EUutility.set_reader(reader) != reader:
+            parser.error("Excel reader "+reader+" is not available")
+    BenchmarkReaders(args.f1, args.country, args.f2, args.f3, args.readers)
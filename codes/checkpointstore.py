@@ -0,0 +1,71 @@
+import os
+import pathlib
+import hashlib
+import pickle
+import archivefile
+from filemanifest import source_hash
+
+
+class CheckpointStore:
+    """Results of the Reporting table files saved for each country and table as soon as they are read.
+
+    A table is the read function and its arguments in map_country_files, e.g. Table4.Gs1
+    with ReadHWPTable or one Land Transition with ReadLandTransitionValue. The results of
+    a country are saved in their own file when all its files have been read, so an
+    interrupted run continues (resumes) from the countries and tables not yet saved and
+    the output files are written from the saved results. The results are tied to the
+    Reporting table files of the country (names and states) and the source code of the read
+    function and the modules it uses (see filemanifest.source_hash).
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory (str): checkpoint directory, created if it does not exist
+        """
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.resumed = 0
+        self.saved = 0
+
+    def key(self, func, country, args, file_ls):
+        """Checkpoint key of the results of func(file, country, *args) for the files of the country
+
+        Args:
+            func: read function
+            country (str): the country
+            args (tuple): additional arguments to func
+            file_ls (list): the Reporting table file of each year, None for missing files
+        """
+        # A file replaced under the same name (resubmission) changes its state, see archivefile.file_state
+        state_ls = [archivefile.file_state(file) if file is not None else None for file in file_ls]
+        key_ls = [func.__module__, func.__qualname__, source_hash(func), country, args, file_ls, state_ls]
+        return hashlib.sha1(repr(key_ls).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return (True,result_ls) if the results are saved, otherwise (False,None)"""
+        path = self.directory/(key+'.pkl')
+        try:
+            with open(path, 'rb') as f:
+                result_ls = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return (False, None)
+        self.resumed = self.resumed+1
+        return (True, result_ls)
+
+    def put(self, key, result_ls):
+        """Save the results of a country atomically"""
+        path = self.directory/(key+'.pkl')
+        tmp_path = path.with_name(path.name+'.'+str(os.getpid())+'.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(result_ls, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self.saved = self.saved+1
+
+    def print_report(self):
+        """Print the number of countries resumed and saved since the last report"""
+        print("Checkpoints:", self.resumed, "countries resumed,", self.saved, "countries saved", self.directory)
+        self.resumed = 0
+        self.saved = 0
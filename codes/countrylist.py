@@ -17,3 +17,8 @@ euls_short = ['FIN','AUT','BEL','BGR','CZE','DEU',
 
 allcountryls_missing = noneuls_short + euls_short
 allcountryls_missing_noeua = noneuls_short_no_eua + euls_short
+
+#Country groups for the group totals in euaggregate.py. EUA (the EU submission) is not summed into the groups
+country_group_dict = {'EU27':euls,'EU27+GBR+ISL+NOR':euplusls,
+                      'Others':[country for country in noneuls if country != 'EUA'],
+                      'All':[country for country in allcountryls if country != 'EUA']}
@@ -0,0 +1,261 @@
+import argparse
+import numpy as np
+import pandas as pd
+from countrylist import country_group_dict
+import EUutility
+import runreport
+from runreport import stage
+import eurestoration
+from euallproducts import ReadAllProductsFile, ResultInventoryCube, product_ls
+from notationkey import NotationKeyCodes, split_values
+
+# The EU submission compared with the EU27 totals
+eua_country = 'EUA'
+eu27_group = 'EU27'
+# The EEA file of the EU inventory (e.g. sheets/EU_CRT_1990_2023.xlsx): the year and Table4.A
+# total forest land in the columns of eurestoration.Table4A_columns_ls (and HWP in the last column)
+eea_table = 'Table4.A'
+eea_row = eurestoration.substr_ls[0]
+eea_column_ls = eurestoration.Table4A_columns_ls
+
+
+def summable(column):
+    """False for the measures per area (e.g. 'LivingBMGains(tC/ha)'), their sum over countries is meaningless"""
+    return '/ha)' not in column
+
+
+def MeasureArray(array_dict, countryls, start: int, end: int):
+    """
+    Arrange the values of the inventory cube into a dense array with one measure for each table, row and column
+    \param array_dict The inventory cube arrays, see inventorycube.InventoryCube.arrays (or the npz file)
+    \param countryls List of countries, the values of other countries are not used
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \return (array (country,year,measure) with NaN for missing values and notation keys,
+             DataFrame of the Table, Row and Column of each measure in the cube order)
+    """
+    table_codes = array_dict['Table'].astype(np.int64)
+    row_codes = array_dict['Row'].astype(np.int64)
+    column_codes = array_dict['Column'].astype(np.int64)
+    measure_keys = (table_codes*len(array_dict['Row_categories'])+row_codes)*len(array_dict['Column_categories'])+column_codes
+    (measure_index, unique_keys) = pd.factorize(measure_keys)
+    (table_column_keys, column_index) = np.divmod(unique_keys, len(array_dict['Column_categories']))
+    (table_index, row_index) = np.divmod(table_column_keys, len(array_dict['Row_categories']))
+    measure_df = pd.DataFrame({'Table': array_dict['Table_categories'][table_index],
+                               'Row': array_dict['Row_categories'][row_index],
+                               'Column': array_dict['Column_categories'][column_index]})
+    # The index of each cube country in countryls, -1 if not used
+    country_lookup = np.array([countryls.index(country) if country in countryls else -1
+                               for country in array_dict['Country_categories']], dtype=np.int64)
+    country_index = country_lookup[array_dict['Country'].astype(np.int64)]
+    year_index = array_dict['Year'].astype(np.int64)-start
+    selected = (country_index >= 0) & (year_index >= 0) & (year_index <= end-start)
+    values = np.full((len(countryls), end-start+1, len(measure_df)), np.nan)
+    values[country_index[selected], year_index[selected], measure_index[selected]] = array_dict['Value'][selected]
+    return (values, measure_df)
+
+
+def GroupTotals(values, countryls, group_dict):
+    """
+    Sum the values of the countries in each group, the countries not reporting a value are left out of the sum
+    \param values Array (country,year,measure), see MeasureArray
+    \param countryls List of countries of the values
+    \param group_dict Country groups, e.g. countrylist.country_group_dict
+    \return (totals (group,year,measure), number of countries reporting (group,year,measure)),
+            the total is NaN if no country of the group reports the value
+    """
+    membership = np.array([[country in group_ls for country in countryls] for group_ls in group_dict.values()],
+                          dtype=np.float64).reshape(len(group_dict), len(countryls))
+    reported = ~np.isnan(values)
+    totals = np.tensordot(membership, np.nan_to_num(values), axes=(1, 0))
+    counts = np.tensordot(membership, reported.astype(np.float64), axes=(1, 0)).astype(np.int64)
+    totals[counts == 0] = np.nan
+    return (totals, counts)
+
+
+def MissingParties(values, countryls, group_dict, start: int):
+    """
+    The countries of each group missing from each inventory year: not in the data (e.g. HUN and CYP)
+    or no value reported for the year (no Reporting table file)
+    \param values Array (country,year,measure), see MeasureArray
+    \param countryls List of countries of the values
+    \param group_dict Country groups
+    \param start Inventory start year (1990)
+    \return DataFrame with the Group, Year, number of Members and Reporting countries and the Missing countries
+    """
+    year_reported = ~np.isnan(values).all(axis=2)
+    row_ls = []
+    for (group, group_ls) in group_dict.items():
+        for year_index in range(values.shape[1]):
+            missing_ls = [country for country in group_ls
+                          if country not in countryls or not year_reported[countryls.index(country), year_index]]
+            row_ls.append([group, start+year_index, len(group_ls), len(group_ls)-len(missing_ls), ' '.join(missing_ls)])
+    return pd.DataFrame(row_ls, columns=['Group', 'Year', 'Members', 'Reporting', 'Missing'])
+
+
+def GroupTotalFrame(totals, counts, measure_df, group_dict, start: int):
+    """
+    The group totals as long DataFrame: Group, Year, Table, Row, Column, Total and the number of countries Reporting
+    \param totals Array (group,year,measure), see GroupTotals
+    \param counts Array (group,year,measure), see GroupTotals
+    \param measure_df The measures, see MeasureArray
+    \param group_dict Country groups
+    \param start Inventory start year (1990)
+    """
+    (group_index, year_index, measure_index) = np.indices(totals.shape).reshape(3, -1)
+    df = pd.DataFrame({'Group': np.array(list(group_dict), dtype=object)[group_index], 'Year': start+year_index})
+    df = pd.concat((df, measure_df.iloc[measure_index].reset_index(drop=True)), axis=1)
+    df['Total'] = totals.ravel()
+    df['Reporting'] = counts.ravel()
+    return df
+
+
+def EUACheck(values, totals, counts, measure_df, countryls, group_dict, start: int):
+    """
+    Compare the EU27 totals with the EU submission (EUA) for each measure and year
+    \param values Array (country,year,measure), see MeasureArray
+    \param totals Array (group,year,measure), see GroupTotals
+    \param counts Array (group,year,measure), see GroupTotals
+    \param measure_df The measures, see MeasureArray
+    \param countryls List of countries of the values
+    \param group_dict Country groups with eu27_group
+    \param start Inventory start year (1990)
+    \return DataFrame: Year, Table, Row, Column, EU27, Reporting, EUA, Difference (EU27-EUA) and RelativeDifference
+    """
+    group_index = list(group_dict).index(eu27_group)
+    eua = values[countryls.index(eua_country)]
+    eu27 = totals[group_index]
+    difference = eu27-eua
+    scale = np.fmax(np.abs(eu27), np.abs(eua))
+    relative = np.divide(np.abs(difference), scale, out=np.full_like(difference, np.nan), where=scale > 0)
+    (year_index, measure_index) = np.indices(eua.shape).reshape(2, -1)
+    df = pd.concat((pd.DataFrame({'Year': start+year_index}),
+                    measure_df.iloc[measure_index].reset_index(drop=True)), axis=1)
+    df[eu27_group] = eu27.ravel()
+    df['Reporting'] = counts[group_index].ravel()
+    df[eua_country] = eua.ravel()
+    df['Difference'] = difference.ravel()
+    df['RelativeDifference'] = relative.ravel()
+    return df[[summable(column) for column in df.Column]]
+
+
+def ReadEEAFile(file_name, start: int, end: int):
+    """
+    Read the EU inventory of the EEA (Table4.A total forest land)
+    \param file_name The EEA Excel file, e.g. sheets/EU_CRT_1990_2023.xlsx
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \return Array (year,column) of eea_column_ls, NaN for notation keys and years not in the file
+    """
+    df = pd.read_excel(file_name, sheet_name=0)
+    year_index = pd.to_numeric(df.iloc[:, 0], errors='coerce').to_numpy()-start
+    selected = (year_index >= 0) & (year_index <= end-start)
+    (file_values, file_keys) = split_values(df.iloc[:, 1:len(eea_column_ls)+1].to_numpy(), NotationKeyCodes())
+    eea = np.full((end-start+1, len(eea_column_ls)), np.nan)
+    eea[year_index[selected].astype(np.int64), :file_values.shape[1]] = file_values[selected]
+    return eea
+
+
+def EEACheck(values, totals, measure_df, countryls, group_dict, eea, start: int):
+    """
+    Compare the EU27 totals and the EU submission (EUA) with the EEA file for each column of Table4.A and year
+    \param values Array (country,year,measure), see MeasureArray
+    \param totals Array (group,year,measure), see GroupTotals
+    \param measure_df The measures, see MeasureArray
+    \param countryls List of countries of the values
+    \param group_dict Country groups with eu27_group
+    \param eea Array (year,column), see ReadEEAFile
+    \param start Inventory start year (1990)
+    \return DataFrame: Year, Column, EU27, EUA, EEA and the differences to EEA
+    """
+    measure_ls = list(zip(measure_df.Table, measure_df.Row, measure_df.Column))
+    measure_index = np.array([measure_ls.index((eea_table, eea_row, column)) if (eea_table, eea_row, column) in measure_ls
+                              else -1 for column in eea_column_ls])
+    # The values of the EEA columns (year,column), NaN if not read
+    eu27 = np.where(measure_index >= 0, totals[list(group_dict).index(eu27_group)][:, measure_index], np.nan)
+    eu27[:, [not summable(column) for column in eea_column_ls]] = np.nan
+    eua = np.full(eea.shape, np.nan)
+    if eua_country in countryls:
+        eua = np.where(measure_index >= 0, values[countryls.index(eua_country)][:, measure_index], np.nan)
+    (year_index, column_index) = np.indices(eea.shape).reshape(2, -1)
+    return pd.DataFrame({'Year': start+year_index,
+                         'Column': np.array(eea_column_ls, dtype=object)[column_index],
+                         eu27_group: eu27.ravel(),
+                         eua_country: eua.ravel(),
+                         'EEA': eea.ravel(),
+                         eu27_group+'-EEA': (eu27-eea).ravel(),
+                         eua_country+'-EEA': (eua-eea).ravel()})
+
+
+def CreateGroupTotals(file_name, array_dict, countryls, start: int, end: int, eea_file=None):
+    """
+    Compute the group totals of all measures in the inventory cube and write them with the missing countries
+    of each group and the EU27 comparisons into an Excel file
+    \param file_name Output Excel file
+    \param array_dict The inventory cube arrays, see inventorycube.InventoryCube.arrays (or the npz file)
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \param eea_file If given, compare the EU27 totals and EUA also with this EEA file (see ReadEEAFile)
+    """
+    (values, measure_df) = MeasureArray(array_dict, countryls, start, end)
+    (totals, counts) = GroupTotals(values, countryls, country_group_dict)
+    summable_measures = np.array([summable(column) for column in measure_df.Column], dtype=bool)
+    total_df = GroupTotalFrame(totals[:, :, summable_measures], counts[:, :, summable_measures],
+                               measure_df[summable_measures].reset_index(drop=True), country_group_dict, start)
+    missing_df = MissingParties(values, countryls, country_group_dict, start)
+    for (group, year, missing) in missing_df[['Group', 'Year', 'Missing']].itertuples(index=False):
+        if missing != '':
+            print("Group", group, year, "missing", missing)
+    print("Writing results to:", file_name)
+    with stage('write'):
+        writer = pd.ExcelWriter(file_name, engine='xlsxwriter')
+        total_df.to_excel(writer, sheet_name='Group totals', index=False, na_rep='NaN')
+        missing_df.to_excel(writer, sheet_name='Missing parties', index=False)
+        if eua_country in countryls:
+            eua_df = EUACheck(values, totals, counts, measure_df, countryls, country_group_dict, start)
+            eua_df.to_excel(writer, sheet_name='EU27 vs EUA', index=False, na_rep='NaN')
+        else:
+            print("No", eua_country, "in the countries, EU27 totals not compared with", eua_country)
+        if eea_file is not None:
+            eea_df = EEACheck(values, totals, measure_df, countryls, country_group_dict,
+                              ReadEEAFile(eea_file, start, end), start)
+            eea_df.to_excel(writer, sheet_name='EU27 vs EEA', index=False, na_rep='NaN')
+        writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Group totals of all measures for the country groups in countrylist.py")
+    input_group = parser.add_mutually_exclusive_group(required=True)
+    input_group.add_argument("-d", "--directory", dest="f1", default=None,
+                             help="Inventory Parties Directory (or zip archive)")
+    input_group.add_argument("--cube", dest="cube", default=None,
+                             help="Read the values from the inventory cube file (npz) of euallproducts.py --cube instead")
+    parser.add_argument("-s", "--start", type=int, dest="f2",
+                        required=True, help="Inventory start year (1990)")
+    parser.add_argument("-e", "--end", type=int, dest="f3",
+                        required=True, help="Inventory end year")
+    EUutility.add_country_arguments(parser, directory_list=False)
+    parser.add_argument("--eea", dest="eea", default=None,
+                        help="EEA file of the EU inventory (e.g. ../sheets/EU_CRT_1990_2023.xlsx) compared with the EU27 totals and EUA")
+    EUutility.add_run_arguments(parser, long_table=False)
+    args = parser.parse_args()
+    EUutility.apply_run_arguments(args)
+    inventory_start = int(args.f2)
+    print("Inventory start:", inventory_start)
+    inventory_end = int(args.f3)
+    print("Inventory end:", inventory_end)
+    (countryls, file_prefix) = EUutility.select_countries(args)
+    if args.cube is not None:
+        print("Inventory cube:", args.cube)
+        with np.load(args.cube, allow_pickle=False) as npz:
+            array_dict = dict(npz)
+    else:
+        print("Inventory Parties data directory:", args.f1)
+        country_result_lss = EUutility.map_country_files(ReadAllProductsFile, args.f1, countryls, inventory_start,
+                                                         inventory_end, product_ls)
+        array_dict = ResultInventoryCube(countryls, product_ls, country_result_lss, inventory_start).arrays()
+    file_name = file_prefix+'_group_totals_'+str(inventory_start)+'_'+str(inventory_end)+'.xlsx'
+    CreateGroupTotals(file_name, array_dict, countryls, inventory_start, inventory_end, args.eea)
+    runreport.finish()
+    print("Done")
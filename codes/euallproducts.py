@@ -0,0 +1,224 @@
+import argparse
+import pandas as pd
+import EUutility
+import runreport
+from runreport import stage
+import eulandtransitionmatrix
+import eurestoration
+import euco2hwp
+import euco2hwp_gains_losses
+import hwpengine
+from inventorycube import InventoryCube
+from longtable import LongTable
+
+# The products and the output file name (after the file prefix) for each
+product_ls = ['landtransition', 'restoration', 'hwp', 'hwpgainslosses']
+product_file_name_dict = {'landtransition': '_Table4.1_Land_Transition_Matrix_',
+                          'restoration': '_Restoration_',
+                          'hwp': '_Table4.Gs1_HWP_',
+                          'hwpgainslosses': '_Table4.Gs1_HWP_gains_losses_'}
+# Row and column names in the inventory cube
+land_transition_row_ls = eulandtransitionmatrix.row_name_ls
+# HWP rows named as in the long table (see hwpengine.category_ls), e.g. 'Solid wood (Domestic)'
+hwp_row_ls = hwpengine.category_ls
+hwp_column_ls = ['NetCO2Emissions']
+hwp_gains_losses_column_ls = ['Gains', 'Losses']
+
+
+def ReadAllProductsFile(file, country, products):
+    """
+    Read one CRFReporter Reporting table file for all products. The file is opened once
+    and each sheet is parsed once: Table4.1 for the land transition matrix, Table4.A-D for
+    restoration and Table4.Gs1 for both HWP net emissions and HWP gains and losses.
+    \param file Reporting table file
+    \param country The country of the file
+    \param products List of products (see product_ls)
+    \return dictionary of the results for each product
+    """
+    result_dict = {}
+    with EUutility.open_workbook(file):
+        if 'landtransition' in products:
+            result_dict['landtransition'] = eulandtransitionmatrix.ReadLandTransitionMatrixFile(
+                file, country, eulandtransitionmatrix.land_transition_matrix_sheet)
+        if 'restoration' in products:
+            result_dict['restoration'] = eurestoration.ReadTable4Rows(file, country)
+        if 'hwp' in products or 'hwpgainslosses' in products:
+            # Both HWP products from the same array (see hwpengine.ReadHWPTable)
+            result_dict['hwptable'] = hwpengine.ReadHWPTable(file, country, hwpengine.table4Gs1_sheet)
+    return result_dict
+
+
+def product_results(country_result_lss, product):
+    """The results of one product for each country in year order, None for missing files"""
+    return [[result_dict[product] if result_dict is not None else None for result_dict in result_dict_ls]
+            for result_dict_ls in country_result_lss]
+
+
+def hwp_values(table, measures):
+    """The rows (product and origin as in hwp_row_ls) and the measure columns of one hwpengine.ReadHWPTable array"""
+    measure_index_ls = [hwpengine.measure_ls.index(measure) for measure in measures]
+    return table[:, :, measure_index_ls].reshape(-1, len(measure_index_ls))
+
+
+def ResultInventoryCube(countryls, products, country_result_lss, start):
+    """
+    Collect all values read for the products into one inventory cube (see inventorycube.py).
+    Notation keys are kept as codes next to the float values.
+    \param countryls List of countries
+    \param products List of products (see product_ls)
+    \param country_result_lss For each country the list of ReadAllProductsFile results in year order
+    \param start Inventory start year (1990)
+    \return the inventory cube
+    """
+    cube = InventoryCube()
+    if 'restoration' in products:
+        # The data columns as in eurestoration.WriteEUTable4Total2, found from all countries and years
+        restoration_rows_ls = [result_dict['restoration'] for result_dict_ls in country_result_lss
+                               for result_dict in result_dict_ls if result_dict is not None]
+        restoration_col_range_ls = eurestoration.data_column_ranges(restoration_rows_ls)
+    for (country, result_dict_ls) in zip(countryls, country_result_lss):
+        for (year_index, result_dict) in enumerate(result_dict_ls):
+            if result_dict is None:
+                continue
+            year = start+year_index
+            if 'landtransition' in products:
+                cube.add(country, year, eulandtransitionmatrix.land_transition_matrix_sheet, land_transition_row_ls,
+                         eulandtransitionmatrix.to_col_ls, result_dict['landtransition'])
+            if 'restoration' in products:
+                for (sheet, row_name, columns_ls, rows, (first_col, last_col)) in zip(
+                        eurestoration.sheet_ls, eurestoration.substr_ls, eurestoration.columns_lss,
+                        result_dict['restoration'], restoration_col_range_ls):
+                    cube.add(country, year, sheet, [row_name], columns_ls, [rows[first_col:last_col]])
+            if 'hwp' in products:
+                cube.add(country, year, euco2hwp.sheetls[0], hwp_row_ls, hwp_column_ls,
+                         hwp_values(result_dict['hwptable'], hwp_column_ls))
+            if 'hwpgainslosses' in products:
+                cube.add(country, year, euco2hwp_gains_losses.sheetls[0], hwp_row_ls, hwp_gains_losses_column_ls,
+                         hwp_values(result_dict['hwptable'], hwp_gains_losses_column_ls))
+    return cube
+
+
+def CreateInventoryCube(file_name, countryls, products, country_result_lss, start):
+    """
+    Collect all values read for the products into one inventory cube (see ResultInventoryCube) and save it
+    \param file_name Output file name (npz)
+    \param countryls List of countries
+    \param products List of products (see product_ls)
+    \param country_result_lss For each country the list of ReadAllProductsFile results in year order
+    \param start Inventory start year (1990)
+    \return the inventory cube
+    """
+    cube = ResultInventoryCube(countryls, products, country_result_lss, start)
+    print("Writing inventory cube to:", file_name)
+    with stage('write'):
+        cube.save(file_name)
+    return cube
+
+
+def CreateLongTable(file_name, countryls, products, country_result_lss, hwp, start, end):
+    """
+    Collect all values read for the products into one long table (see longtable.py) and save it
+    \param file_name Output file name (.parquet, .feather, .csv or .sqlite)
+    \param countryls List of countries
+    \param products List of products (see product_ls)
+    \param country_result_lss For each country the list of ReadAllProductsFile results in year order
+    \param hwp HWP array (see hwpengine.HWPArray), None if no HWP product
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \return the long table
+    """
+    long_table = LongTable()
+    if 'landtransition' in products:
+        matrix = eulandtransitionmatrix.LandTransitionMatrixArray(
+            product_results(country_result_lss, 'landtransition'), countryls, start, end)
+        eulandtransitionmatrix.AddLandTransitionLongTable(long_table, matrix, countryls, start)
+    if 'restoration' in products:
+        eurestoration.AddRestorationLongTable(long_table, countryls, product_results(country_result_lss, 'restoration'),
+                                              start)
+    measures = [measure for (product, product_measures) in [('hwpgainslosses', ['Gains', 'Losses']),
+                                                             ('hwp', ['NetCO2Emissions'])]
+                if product in products for measure in product_measures]
+    if measures:
+        hwpengine.AddHWPLongTable(long_table, hwp, countryls, measures, start)
+    print("Writing long table to:", file_name)
+    with stage('write'):
+        long_table.save(file_name)
+    return long_table
+
+
+def CreateAllProducts(file_prefix, directory, countryls, products, start, end, cube_file=None, long_file=None):
+    """
+    Read CRFReporter Reporting tables once for all products and write the output excel file
+    of each product. The excel files are the same as from eulandtransitionmatrix.py (--singlepass),
+    eurestoration.py, euco2hwp.py and euco2hwp_gains_losses.py with the same countries.
+    \param file_prefix Output file name prefix
+    \param directory The directory where the Reporting tables are located
+    \param countryls List of countries
+    \param products List of products (see product_ls)
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \param cube_file If given, save also all values read as inventory cube to this file (see CreateInventoryCube)
+    \param long_file If given, save also all values read as long table to this file (see CreateLongTable)
+    \return list of output file names
+    """
+    country_result_lss = EUutility.map_country_files(ReadAllProductsFile, directory, countryls, start, end, products)
+    if cube_file is not None:
+        CreateInventoryCube(cube_file, countryls, products, country_result_lss, start)
+    hwp = None
+    if 'hwp' in products or 'hwpgainslosses' in products:
+        hwp = hwpengine.HWPArray(product_results(country_result_lss, 'hwptable'), countryls, start, end)
+    if long_file is not None:
+        CreateLongTable(long_file, countryls, products, country_result_lss, hwp, start, end)
+    file_name_ls = []
+    for product in products:
+        file_name = file_prefix+product_file_name_dict[product]+str(start)+'_'+str(end)+'.xlsx'
+        print("Writing results to:", file_name)
+        with stage('write'):
+            writer = pd.ExcelWriter(file_name, engine='xlsxwriter')
+            if product == 'landtransition':
+                matrix = eulandtransitionmatrix.LandTransitionMatrixArray(
+                    product_results(country_result_lss, product), countryls, start, end)
+                eulandtransitionmatrix.WriteLandTransitionMatrix(writer, matrix, countryls, start, end)
+            elif product == 'restoration':
+                # eurestoration.py uses countries in alphabetical order
+                index_ls = sorted(range(len(countryls)), key=lambda i: countryls[i])
+                country_rows_lss = product_results(country_result_lss, product)
+                eurestoration.WriteEUTable4Total2(writer, [countryls[i] for i in index_ls],
+                                                  [country_rows_lss[i] for i in index_ls], start, end)
+            elif product == 'hwp':
+                euco2hwp.WriteHWPExcelSheet(writer, countryls, euco2hwp.table4Gs1_sheet_name_ls, hwp, start, end)
+            elif product == 'hwpgainslosses':
+                euco2hwp_gains_losses.WriteHWPExcelSheet(writer, countryls, euco2hwp_gains_losses.table4Gs1_sheet_name_ls,
+                                                         hwp, start, end)
+            writer.close()
+        file_name_ls.append(file_name)
+    return file_name_ls
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--directory", dest="f1",
+                        required=True, help="Inventory Parties Directory (or zip archive)")
+    parser.add_argument("-s", "--start", type=int, dest="f2",
+                        required=True, help="Inventory start year (1990)")
+    parser.add_argument("-e", "--end", type=int, dest="f3",
+                        required=True, help="Inventory end year")
+    EUutility.add_country_arguments(parser)
+    parser.add_argument("-p", "--products", dest="products", nargs='+', choices=product_ls, default=product_ls,
+                        help="Products to create (default all)")
+    parser.add_argument("--cube", dest="cube", default=None,
+                        help="Save also all values read into one columnar inventory cube file (npz), see inventorycube.py")
+    EUutility.add_run_arguments(parser)
+    args = parser.parse_args()
+    EUutility.apply_run_arguments(args)
+    directory = args.f1
+    print("Inventory Parties data directory:", directory)
+    inventory_start = int(args.f2)
+    print("Inventory start:", inventory_start)
+    inventory_end = int(args.f3)
+    print("Inventory end:", inventory_end)
+    (countryls, file_prefix) = EUutility.select_countries(args)
+    CreateAllProducts(file_prefix, directory, countryls, args.products, inventory_start, inventory_end, args.cube,
+                      args.long)
+    runreport.finish()
+    print("Done")
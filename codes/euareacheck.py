@@ -0,0 +1,200 @@
+import argparse
+import numpy as np
+import pandas as pd
+import EUutility
+import runreport
+from runreport import stage
+import eulandtransitionmatrix
+import eurestoration
+from euallproducts import ReadAllProductsFile, product_results
+from inventorycube import ReadInventoryCube
+from notationkey import NotationKeyCodes, split_values
+
+# The total area of each Table4.[A,B,C,D] (eurestoration.py) is compared with the final area
+# of the land use class in the Table4.1 land transition matrix (eulandtransitionmatrix.py).
+# Table4.A-D report the managed land, Table4.1 has separate managed and unmanaged classes.
+land_use_ls = ['FL', 'CL', 'GL', 'WL']
+table41_column_ls = ['FL(manag.)', 'CL', 'GL(manag.)', 'WL(manag.)']
+table41_area_row = 'Final area'
+table4_area_column = 'TotalArea(kha)'
+# Default tolerances: absolute in kha and relative to the larger of the two areas
+default_atol = 0.01
+default_rtol = 0.001
+# Columns of the area check report, one row for each country, year and land use exceeding the tolerance
+report_column_ls = ['Country', 'Year', 'LandUse', 'Table4.1(kha)', 'Table4.A-D(kha)', 'Difference(kha)',
+                    'RelativeDifference', 'Status']
+
+
+def AreaArrays(country_result_lss, countryls, start: int, end: int):
+    """
+    Collect the Table4.1 final areas and the Table4.A-D total areas into aligned arrays
+    \param country_result_lss For each country the list of euallproducts.ReadAllProductsFile results
+           (landtransition and restoration) in year order
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \return (Table4.1 areas, Table4.A-D areas), float arrays (country,year,land use) of land_use_ls,
+            notation keys and missing files are NaN
+    """
+    matrix = eulandtransitionmatrix.LandTransitionMatrixArray(product_results(country_result_lss, 'landtransition'),
+                                                              countryls, start, end)
+    row_ls = eulandtransitionmatrix.from_ls+eulandtransitionmatrix.area_row_ls
+    column_index_ls = [eulandtransitionmatrix.to_col_ls.index(column) for column in table41_column_ls]
+    key_codes = NotationKeyCodes()
+    (table41_area, table41_keys) = split_values(matrix[:, :, row_ls.index(table41_area_row)][:, :, column_index_ls],
+                                                key_codes)
+    country_rows_lss = product_results(country_result_lss, 'restoration')
+    rows_ls = [rows for country_rows_ls in country_rows_lss for rows in country_rows_ls if rows is not None]
+    area_cells = np.full((len(countryls), end-start+1, len(land_use_ls)), np.nan, dtype=object)
+    if len(rows_ls) > 0:
+        col_range_ls = eurestoration.data_column_ranges(rows_ls)
+        area_col_ls = [first_col+columns_ls.index(table4_area_column)
+                       for ((first_col, last_col), columns_ls) in zip(col_range_ls, eurestoration.columns_lss)]
+        for (country_index, country_rows_ls) in enumerate(country_rows_lss):
+            for (year_index, rows) in enumerate(country_rows_ls):
+                if rows is not None:
+                    area_cells[country_index, year_index] = [row[col] if col < len(row) else np.nan
+                                                             for (row, col) in zip(rows, area_col_ls)]
+    (table4_area, table4_keys) = split_values(area_cells, key_codes)
+    return (table41_area, table4_area)
+
+
+def CubeAreaArrays(cube_file, countryls, start: int, end: int):
+    """
+    The areas as in AreaArrays from the inventory cube saved with euallproducts.py --cube
+    \param cube_file Inventory cube file (npz), see inventorycube.py
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \return (Table4.1 areas, Table4.A-D areas), float arrays (country,year,land use)
+    """
+    df = ReadInventoryCube(cube_file)
+    shape = (len(countryls), end-start+1, len(land_use_ls))
+    area_ls = []
+    for (table_ls, row_ls, column_ls) in [([eulandtransitionmatrix.land_transition_matrix_sheet]*len(land_use_ls),
+                                           [table41_area_row]*len(land_use_ls), table41_column_ls),
+                                          (eurestoration.sheet_ls, eurestoration.substr_ls,
+                                           [table4_area_column]*len(land_use_ls))]:
+        # The land use of each value in the cube, -1 for other values
+        land_use_index = np.full(len(df), -1)
+        for (index, (table, row, column)) in enumerate(zip(table_ls, row_ls, column_ls)):
+            land_use_index[((df.Table == table) & (df.Row == row) & (df.Column == column)).to_numpy()] = index
+        country_index = pd.Categorical(df.Country.astype(str), categories=countryls).codes
+        year_index = df.Year.to_numpy().astype(np.int64)-start
+        selected = (land_use_index >= 0) & (country_index >= 0) & (year_index >= 0) & (year_index < shape[1])
+        area = np.full(shape, np.nan)
+        area[country_index[selected], year_index[selected], land_use_index[selected]] = df.Value.to_numpy()[selected]
+        area_ls.append(area)
+    return tuple(area_ls)
+
+
+def AreaResiduals(table41_area, table4_area, atol: float = default_atol, rtol: float = default_rtol):
+    """
+    Compare the areas of all countries, years and land uses at once.
+    A notation key or a missing value on one side only is compared as 0.
+    \param table41_area Table4.1 final areas (country,year,land use)
+    \param table4_area Table4.A-D total areas (country,year,land use)
+    \param atol Absolute tolerance (kha)
+    \param rtol Relative tolerance (of the larger area)
+    \return (difference, relative difference, exceeds tolerance) arrays (country,year,land use)
+    """
+    compared = ~(np.isnan(table41_area) & np.isnan(table4_area))
+    difference = np.nan_to_num(table4_area)-np.nan_to_num(table41_area)
+    scale = np.fmax(np.abs(table41_area), np.abs(table4_area))
+    relative = np.divide(np.abs(difference), scale, out=np.zeros_like(difference), where=scale > 0)
+    exceeds = compared & (np.abs(difference) > atol) & (relative > rtol)
+    return (difference, relative, exceeds)
+
+
+def AreaCheckReport(table41_area, table4_area, countryls, start: int, atol: float = default_atol,
+                    rtol: float = default_rtol):
+    """
+    The cells exceeding the tolerance (see AreaResiduals) as DataFrame with the report_column_ls columns
+    \param table41_area Table4.1 final areas (country,year,land use)
+    \param table4_area Table4.A-D total areas (country,year,land use)
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    \param atol Absolute tolerance (kha)
+    \param rtol Relative tolerance
+    \return DataFrame in country, year and land use order
+    """
+    (difference, relative, exceeds) = AreaResiduals(table41_area, table4_area, atol, rtol)
+    (country_index, year_index, land_use_index) = np.nonzero(exceeds)
+    area41 = table41_area[exceeds]
+    area4 = table4_area[exceeds]
+    status = np.where(np.isnan(area41), 'missing in Table4.1',
+                      np.where(np.isnan(area4), 'missing in Table4.A-D', 'difference'))
+    return pd.DataFrame({'Country': np.array(countryls, dtype=object)[country_index],
+                         'Year': start+year_index,
+                         'LandUse': np.array(land_use_ls, dtype=object)[land_use_index],
+                         'Table4.1(kha)': area41,
+                         'Table4.A-D(kha)': area4,
+                         'Difference(kha)': difference[exceeds],
+                         'RelativeDifference': relative[exceeds],
+                         'Status': status}, columns=report_column_ls)
+
+
+def WriteAreaCheckReport(file_name, report_df, table41_area, table4_area, countryls, atol: float, rtol: float):
+    """
+    Write the area check report and the number of cells compared and exceeding the tolerance for each country
+    \param file_name Output excel file
+    \param report_df AreaCheckReport result
+    \param table41_area Table4.1 final areas (country,year,land use)
+    \param table4_area Table4.A-D total areas (country,year,land use)
+    \param countryls List of countries
+    \param atol Absolute tolerance (kha)
+    \param rtol Relative tolerance
+    """
+    compared = (~(np.isnan(table41_area) & np.isnan(table4_area))).sum(axis=(1, 2))
+    exceeding = report_df.groupby('Country').size().reindex(countryls, fill_value=0).to_numpy()
+    summary_df = pd.DataFrame({'Compared': compared, 'Exceeding': exceeding}, index=countryls)
+    print("Area check:", int(compared.sum()), "cells compared,", len(report_df), "exceed the tolerance",
+          "atol", atol, "kha rtol", rtol)
+    for country in summary_df.index[summary_df.Exceeding > 0]:
+        print("Area check", country, summary_df.loc[country, 'Exceeding'], "of", summary_df.loc[country, 'Compared'],
+              "cells exceed the tolerance")
+    writer = pd.ExcelWriter(file_name, engine='xlsxwriter')
+    report_df.to_excel(writer, sheet_name='Area check', index=False, na_rep='NaN')
+    summary_df.to_excel(writer, sheet_name='Summary')
+    writer.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the Table4.A-D total areas with the Table4.1 final areas")
+    input_group = parser.add_mutually_exclusive_group(required=True)
+    input_group.add_argument("-d", "--directory", dest="f1", default=None,
+                             help="Inventory Parties Directory (or zip archive)")
+    input_group.add_argument("--cube", dest="cube", default=None,
+                             help="Read the areas from the inventory cube file (npz) of euallproducts.py --cube instead")
+    parser.add_argument("-s", "--start", type=int, dest="f2",
+                        required=True, help="Inventory start year (1990)")
+    parser.add_argument("-e", "--end", type=int, dest="f3",
+                        required=True, help="Inventory end year")
+    EUutility.add_country_arguments(parser, directory_list=False)
+    parser.add_argument("--atol", dest="atol", type=float, default=default_atol,
+                        help="Absolute tolerance in kha (default %(default)s)")
+    parser.add_argument("--rtol", dest="rtol", type=float, default=default_rtol,
+                        help="Relative tolerance of the larger area (default %(default)s)")
+    EUutility.add_run_arguments(parser, long_table=False)
+    args = parser.parse_args()
+    EUutility.apply_run_arguments(args)
+    inventory_start = int(args.f2)
+    print("Inventory start:", inventory_start)
+    inventory_end = int(args.f3)
+    print("Inventory end:", inventory_end)
+    (countryls, file_prefix) = EUutility.select_countries(args)
+    if args.cube is not None:
+        print("Inventory cube:", args.cube)
+        (table41_area, table4_area) = CubeAreaArrays(args.cube, countryls, inventory_start, inventory_end)
+    else:
+        print("Inventory Parties data directory:", args.f1)
+        country_result_lss = EUutility.map_country_files(ReadAllProductsFile, args.f1, countryls, inventory_start,
+                                                         inventory_end, ['landtransition', 'restoration'])
+        (table41_area, table4_area) = AreaArrays(country_result_lss, countryls, inventory_start, inventory_end)
+    report_df = AreaCheckReport(table41_area, table4_area, countryls, inventory_start, args.atol, args.rtol)
+    file_name = file_prefix+'_Table4_area_check_'+str(inventory_start)+'_'+str(inventory_end)+'.xlsx'
+    print("Writing results to:", file_name)
+    with stage('write'):
+        WriteAreaCheckReport(file_name, report_df, table41_area, table4_area, countryls, args.atol, args.rtol)
+    runreport.finish()
+    print("Done")
@@ -1,15 +1,28 @@
-import os
 import argparse
-import pathlib
-import glob
 import pandas as pd
 import numpy as np
-from countrylist import euls,euplusls,noneuls,allcountryls, allcountryls_missing
+import EUutility
+from labelindex import sheet_label_index
+import runreport
+import longtable
+from runreport import stage
 
 land_transition_matrix_sheet = 'Table4.1'
 #Rows for FROM Land Use Class in Table4.1
 from_ls = ["Forest land \(managed\)","Forest land \(unmanaged\)","Cropland","Grassland \(managed\)","Grassland \(unmanaged\)",
            "Wetlands \(managed","Wetlands \(unmanaged\)","Settlements","Other land"]
+#Area rows in Table4.1 after the FROM Land Use Classes
+area_row_ls = ["Total unmanaged land","Final area","Net change"]
+#Columns in Table4.1 after the row name: TO Land Use Classes and the area columns
+to_col_ls = ['FL(manag.)','FL(unmanag.)','CL','GL(manag.)','GL(unmanag.)','WL(manag.)','WL(unmanag.)','SL','OL',
+             'Total unmanaged land','Initial area']
+#Row names for *from_ls* and *area_row_ls* in the long table and the inventory cube
+row_name_ls = to_col_ls[:len(from_ls)]+area_row_ls
+#Unit of the areas in Table4.1
+area_unit = 'kha'
+#Table4.1 read options (see EUutility.read_sheet): only the columns B:M and the rows up to the first row of each row name
+table41_read_options = dict(cell_range='B:M',stop_labels=('B',from_ls+area_row_ls),
+                            keep_default_na=False,na_values=[''],header=7,usecols='B:M')
 #Result sheet names for Land use change classes
 sheet_name_dict = {0:[r'FL(manag.)->FL(manag.)',r'FL(manag.)->FL(unmanag.)',r'FL(manag.)->CL',
                       r'FL(manag.)->GL(manag.)',r'FL(manag.)->GL(unmanag.)',r'FL(manag.)->WL(manag.)',r'FL(manag.)->WL(unmanag.)',
@@ -40,7 +53,29 @@ sheet_name_dict = {0:[r'FL(manag.)->FL(manag.)',r'FL(manag.)->FL(unmanag.)',r'FL
                       r'OL->SL',r'OL->OL']
                    }
 
-def CreateLandTransitionMatrix(writer,directory,countryls,sheet:str,sheet_name:str,from_row:str,to_col:int,start:int,end:int):
+def ReadLandTransitionValue(file,country,sheet:str,from_row:str,to_col:int):
+    """
+    Read one Land Transition value from CRFReporter Reporting table file
+    \param file Reporting table file
+    \param country The country of the file
+    \param sheet Land Transition Matrix sheet name
+    \param from_row Name of the row name in *from_ls* (*FROM* Land Use classes Table4.1)
+    \param to_col Column number for *TO*  Land Use Class
+    """
+    print(file)
+    row_ls = from_ls+area_row_ls
+    #Only the columns B:M and the rows up to the first row of each row name are read, see table41_read_options
+    df = EUutility.read_sheet(file,sheet,**table41_read_options)
+    if from_row in row_ls:
+        #The rows are searched once for each layout of the country, see EUutility.sheet_layout
+        layout = EUutility.sheet_layout(file,country,sheet,df,df.columns[0],ResolveLandTransitionLayout)
+        row = df.iloc[layout[row_ls.index(from_row)]]
+    else:
+        row = df.iloc[sheet_label_index(df,df.columns[0]).contains(from_row)]
+    return row.iloc[0,to_col]
+
+def CreateLandTransitionMatrix(writer,directory,countryls,sheet:str,sheet_name:str,from_row:str,to_col:int,start:int,end:int,
+                               long_table=None):
     """
     Read CRFReporter Reporting tables and create Land transition sheets for each country and year.
     Use Excel sheet Table 4.1 Land Transition Matrix
@@ -53,99 +88,180 @@ def CreateLandTransitionMatrix(writer,directory,countryls,sheet:str,sheet_name:s
     \param to_col Column number for *TO*  Land Use Class
     \param start Inventory start year (1990)
     \param end Inventory end year
+    \param long_table If given, add the values also to the long table (see longtable.py)
     """
-    
-    datarowlss=[]
-    for country in countryls:
-        rowls=[]
-        #List all excel files and sort the files in ascending order (1990,1991,...,2021)
-        #Exclude years in 1980's that some countries report
-        # excelfilels=list(set(glob.glob(directory+'/'+country+'/*.xlsx'))-set(glob.glob(directory+'/'+country+'/*_198??*.xlsx')))
-        # excelfilels=sorted(excelfilels)
-
-        # MOD: 2024 require that the filename starts with letter A-Z or a-z
-        excelfilels = list(set(glob.glob(directory+'/'+country+'/[A-z]*.xlsx'))-set(
-            glob.glob(directory+'/'+country+'/*[_,-]198??*.xlsx')))
-        excelfilels = sorted(excelfilels)
-        print(country,sheet_name)
-        # print(excelfilels)
-        i = start
-        for file in excelfilels:
-            print(file)
-            if i>end:
-                break
-            xlsx = pd.ExcelFile(file)
-            df = pd.read_excel(xlsx,sheet,keep_default_na=False,na_values=[''], header=7, usecols='B:M')
-            row = df[df[df.columns[0]].str.contains(from_row)==True]
-            rowls.append(row.iloc[0,to_col])
-            i = i+1
-        datarowlss.append(rowls)
+    print(sheet_name)
+    #Reporting table file for each country and year (1990,1991,...,2021), see EUutility.year_files
+    datarowlss = EUutility.map_country_files(ReadLandTransitionValue,directory,countryls,start,end,
+                                             sheet,from_row,to_col)
+    if long_table is not None:
+        row_name = row_name_ls[(from_ls+area_row_ls).index(from_row)]
+        for (country,datarowls) in zip(countryls,datarowlss):
+            for (year,value) in zip(range(start,end+1),datarowls):
+                long_table.add(country,year,sheet,[row_name],[to_col_ls[to_col-1]],[[value]],[area_unit])
     dftotal = pd.DataFrame(datarowlss)
     dftotal.index = countryls
     dftotal.columns =  list(range(start,end+1))
-    dftotal.to_excel(writer,sheet_name,na_rep='NaN')
-    
+    with stage('write'):
+        dftotal.to_excel(writer,sheet_name,na_rep='NaN')
+
+def ResolveLandTransitionLayout(df,country,file):
+    """
+    Find the rows of the FROM Land Use Classes (*from_ls*) and the area rows (*area_row_ls*) in Table4.1
+    \param df Table4.1 parsed from the Reporting table file
+    \param country The country of the file
+    \param file Reporting table file
+    \return list of row positions for each row name, the first position is used
+    """
+    label_index = sheet_label_index(df,df.columns[0])
+    return [label_index.contains(row_name) for row_name in from_ls+area_row_ls]
+
+def ReadLandTransitionMatrixFile(file,country,sheet:str):
+    """
+    Read the whole Table4.1 Land Transition Matrix from one CRFReporter Reporting table file
+    \param file Reporting table file
+    \param country The country of the file
+    \param sheet Land Transition Matrix sheet name
+    \return Array (from,to), see ReadLandTransitionMatrix
+    """
+    print(file)
+    row_ls = from_ls+area_row_ls
+    matrix = np.full((len(row_ls),len(to_col_ls)),np.nan,dtype=object)
+    #Only the columns B:M and the rows up to the first row of each row name are read, see table41_read_options
+    df = EUutility.read_sheet(file,sheet,**table41_read_options)
+    #The rows are searched once for each layout of the country, see EUutility.sheet_layout
+    layout = EUutility.sheet_layout(file,country,sheet,df,df.columns[0],ResolveLandTransitionLayout)
+    for (row_index,row_name) in enumerate(row_ls):
+        row = df.iloc[layout[row_index]]
+        if row.shape[0] == 0:
+            print("Missing row",row_name,"in",file)
+            continue
+        values = row.iloc[0,1:len(to_col_ls)+1].values
+        matrix[row_index,:len(values)] = values
+    return matrix
+
+def LandTransitionMatrixArray(country_matrix_lss,countryls,start:int,end:int):
+    """
+    Collect the Land Transition Matrices read from the Reporting table files into one array
+    \param country_matrix_lss For each country the list of ReadLandTransitionMatrixFile results in year order
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \return Array (country,year,from,to), missing files (None) are NaN
+    """
+    matrix = np.full((len(countryls),end-start+1,len(from_ls)+len(area_row_ls),len(to_col_ls)),np.nan,dtype=object)
+    for (country_index,country_matrix_ls) in enumerate(country_matrix_lss):
+        print(countryls[country_index],land_transition_matrix_sheet)
+        for (year_index,file_matrix) in enumerate(country_matrix_ls):
+            if file_matrix is not None:
+                matrix[country_index,year_index] = file_matrix
+    return matrix
+
+def ReadLandTransitionMatrix(directory,countryls,sheet:str,start:int,end:int):
+    """
+    Read CRFReporter Reporting tables once and collect the whole Table4.1 Land Transition Matrix
+    for each country and year: the FROM Land Use Class rows (*from_ls*) followed by the area rows (*area_row_ls*),
+    and the TO Land Use Class columns followed by the area columns (*to_col_ls*).
+    \param directory The direactory where the Reporting tables are located
+    \param countryls List of countries to be used
+    \param sheet Land Transition Matrix sheet name
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \return Array (country,year,from,to), missing files and rows are NaN
+    """
+    country_matrix_lss = EUutility.map_country_files(ReadLandTransitionMatrixFile,directory,countryls,start,end,sheet)
+    return LandTransitionMatrixArray(country_matrix_lss,countryls,start,end)
+
+def WriteLandTransitionMatrix(writer,matrix,countryls,start:int,end:int):
+    """
+    Create Land transition sheets for each country and year from the Land Transition Matrix array
+    \param writer Excel writer
+    \param matrix Array (country,year,from,to), see ReadLandTransitionMatrix
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    """
+    for from_index in range(len(from_ls)):
+        for (to_index,sheet_name) in enumerate(sheet_name_dict[from_index]):
+            dftotal = pd.DataFrame(matrix[:,:,from_index,to_index]).infer_objects()
+            dftotal.index = countryls
+            dftotal.columns =  list(range(start,end+1))
+            dftotal.to_excel(writer,sheet_name=sheet_name,na_rep='NaN')
+
+def AddLandTransitionLongTable(long_table,matrix,countryls,start:int):
+    """
+    Add the Land Transition Matrices to the long table (see longtable.py)
+    \param long_table longtable.LongTable
+    \param matrix Array (country,year,from,to), see ReadLandTransitionMatrix
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    """
+    for (country_index,country) in enumerate(countryls):
+        for year_index in range(matrix.shape[1]):
+            long_table.add(country,start+year_index,land_transition_matrix_sheet,row_name_ls,to_col_ls,
+                           matrix[country_index,year_index],[area_unit]*len(to_col_ls))
+
+def CreateLandTransitionMatrixSinglePass(writer,directory,countryls,sheet:str,start:int,end:int,long_table=None):
+    """
+    Read CRFReporter Reporting tables once (see ReadLandTransitionMatrix) and create
+    Land transition sheets for each country and year. The sheets are the same as with
+    CreateLandTransitionMatrix called for each FROM and TO Land Use Class.
+    \param writer Excel writer
+    \param directory The direactory where the Reporting tables are located
+    \param countryls List of countries to be used
+    \param sheet Land Transition Matrix sheet name
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \param long_table If given, add the values also to the long table (see longtable.py)
+    \return Array (country,year,from,to) of ReadLandTransitionMatrix
+    """
+    matrix = ReadLandTransitionMatrix(directory,countryls,sheet,start,end)
+    if long_table is not None:
+        AddLandTransitionLongTable(long_table,matrix,countryls,start)
+    with stage('write'):
+        WriteLandTransitionMatrix(writer,matrix,countryls,start,end)
+    return matrix
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("-d","--directory",dest="f1",required=True,help="Inventory Parties Directory")
+    parser.add_argument("-d","--directory",dest="f1",required=True,help="Inventory Parties Directory (or zip archive)")
     parser.add_argument("-s","--start",dest="f2",required=True,help="Inventory start year (usually 1990)")
     parser.add_argument("-e","--end",dest="f3",required=True,help="Inventory end year")
-    group=parser.add_mutually_exclusive_group(required=True)
-    group.add_argument("--eu",action="store_true",dest="eu",default=False,help="EU countries")
-    group.add_argument("--euplus",action="store_true",dest="euplus",default=False,help="EU countries plus GBR, ISL and NOR")
-    group.add_argument("-a","--all",action="store_true",dest="all",default=False,help="All countries (EU+others")
-    group.add_argument("-c","--countries",dest="country",type=str,nargs='+',help="List of countries")
-    group.add_argument("-l","--list",action="store_true",dest="countryls",default=False,
-                       help="List files in Inventory Parties Directory")
-    group.add_argument("--amissing", action="store_true", dest="all_missing", default=False,
-                    help='All countries where some are missing. See allcountryls_missing in countrylist.py')
-              
+    EUutility.add_country_arguments(parser)
+    parser.add_argument("--singlepass",action="store_true",dest="singlepass",default=False,
+                        help="Read Table4.1 once per Reporting table file and create all sheets from it")
+    EUutility.add_run_arguments(parser)
     args = parser.parse_args()
+    EUutility.apply_run_arguments(args)
     directory=args.f1
     print("Inventory Parties directory",directory)
     inventory_start=int(args.f2)
     print("Inventory start",inventory_start)
     inventory_end=int(args.f3)
     print("Inventory end",inventory_end)
-    file_prefix = 'EU'
-    if args.eu:
-        print("Using EU  countries")
-        countryls=euls
-    elif args.euplus:
-        print("Using EU  countries plus GBR, ISL, NOR")
-        countryls=euplusls
-        file_prefix = 'EU_GBR_ISL_NOR'
-    elif args.all:
-        print("Using all countries")
-        countryls = euls+noneuls
-        file_prefix='EU_and_Others'
-    elif args.countryls:
-        print("Listing countries in",args.f1)
-        ls = glob.glob(args.f1+'/???')
-        countryls = [pathlib.Path(x).name for x in ls]
-        countryls.sort()
-        file_prefix = pathlib.Path(args.f1).name
-    elif args.all_missing:
-        print("Using allcountry list missing")
-        countryls = allcountryls_missing
-        file_prefix = 'all_countries_some_missing'
-    else:
-        print("Using countries", args.country) 
-        countryls=args.country
-        file_prefix=countryls[0]
-        for country in countryls[1:]:
-            file_prefix = file_prefix+"_"+country
+    (countryls, file_prefix) = EUutility.select_countries(args)
 
     writer = pd.ExcelWriter(file_prefix+'_Table4.1_Land_Transition_Matrix_'+str(inventory_start)+'_'+str(inventory_end)+'.xlsx',
                             engine='xlsxwriter')
+    long_table = longtable.LongTable() if args.long is not None else None
     #1. Table4.1 Land transition matrix
-    index = 0
-    for land_use_class in from_ls:
-        col=1
-        sheet_name_ls = sheet_name_dict[index]
-        index=index+1
-        for sheet_name in sheet_name_ls:
-            CreateLandTransitionMatrix(writer,directory,countryls,land_transition_matrix_sheet,sheet_name,land_use_class,col,
-                                       inventory_start,inventory_end)
-            col=col+1
-    writer.close()
+    if args.singlepass:
+        CreateLandTransitionMatrixSinglePass(writer,directory,countryls,land_transition_matrix_sheet,
+                                             inventory_start,inventory_end,long_table)
+    else:
+        index = 0
+        for land_use_class in from_ls:
+            col=1
+            sheet_name_ls = sheet_name_dict[index]
+            index=index+1
+            for sheet_name in sheet_name_ls:
+                CreateLandTransitionMatrix(writer,directory,countryls,land_transition_matrix_sheet,sheet_name,land_use_class,col,
+                                           inventory_start,inventory_end,long_table)
+                col=col+1
+    with stage('write'):
+        writer.close()
+    if long_table is not None:
+        print("Writing long table to:",args.long)
+        with stage('write'):
+            long_table.save(args.long)
+    runreport.finish()
@@ -1,18 +1,20 @@
-import os
+import re
 import argparse
-import pathlib
 import glob
 import pandas as pd
 import numpy as np
-from countrylist import euls, euplusls, noneuls, allcountryls, allcountryls_missing, allcountryls_missing_noeua
 import EUutility
+from labelindex import sheet_label_index
+import runreport
+import longtable
+from notationkey import NotationKeyCodes, split_values
+from runreport import stage
 
 pd.set_option('display.max_colwidth', None)
 
 # Excel sheets needed
 sheet_ls = ['Table4.A', 'Table4.B', 'Table4.C', 'Table4.D']
 sheet_ext_ls = [' FL', ' CL', ' GL', ' WL']
-nan_list = ['NO', 'NA', 'IE', 'NE']
 # Search dataframe row with these names
 substr_ls = ['A. Total forest land', 'B. Total cropland',
              'C. Total grassland', 'D. Total wetlands']
@@ -30,6 +32,12 @@ Table4C_columns_ls = Table4B_columns_ls
 Table4D_columns_ls = Table4B_columns_ls
 columns_lss = [Table4A_columns_ls, Table4B_columns_ls,
                Table4C_columns_ls, Table4D_columns_ls]
+# The numbering of the category labels: 'A.' level 1, '1.' level 2, '2.1' level 3 etc.
+category_number_pattern = r'^\s*([A-Z]\.|\d+(?:\.\d+)*\.?)\s'
+# The separator of the labels in the category path, e.g. 'A. Total forest land / 1. Forest land remaining forest land'
+category_path_separator = ' / '
+# Table4.[A,B,C,D] read options (see EUutility.read_sheet)
+table4_read_options = dict(keep_default_na=False, na_values=['MISSING_VALUE'])
 
 
 def CreateEUTable4Total1(writer, data_dir, countryls: list, inv_start: int, inv_end: int):
@@ -61,12 +69,9 @@ def CreateEUTable4Total1(writer, data_dir, countryls: list, inv_start: int, inv_
             if i > inv_end:
                 break
             i = i+1
-            xlsx = pd.ExcelFile(excel_file)
-            df = pd.read_excel(
-                xlsx, sheet, keep_default_na=False, na_values=['MISSING_VALUE'])
+            df = EUutility.read_sheet(excel_file, sheet, **table4_read_options)
             # Find row by its name as Dataframe
-            row_df = df[df[df.columns[1]].str.contains(
-                substr_ls[substr_ls.index(row_name)]) == True]
+            row_df = df.iloc[sheet_label_index(df, df.columns[1]).contains(row_name)]
 
             # Row as Series
             row_s = row_df.iloc[0, :]
@@ -84,14 +89,307 @@ def CreateEUTable4Total1(writer, data_dir, countryls: list, inv_start: int, inv_
     return writer
 
 
-def CreateEUTable4Total2(writer, data_dir, countryls: list, inv_start: int, inv_end: int):
+def ReadTable4Row(excel_file, country, sheet, row_name):
+    """
+    Read one row from CRFReporter Excel file Table4 A,B,C or D
+    \param excel_file Reporting table file
+    \param country The country of the file
+    \param sheet Table4.[A,B,C,D] sheet name
+    \param row_name Row name in substr_ls
+    \return the row as list without the Title and Subdivision
+    """
+    # Only the rows up to the first row containing row_name are read, see EUutility.read_sheet
+    df = EUutility.read_sheet(excel_file, sheet, stop_labels=('B', [row_name]), **table4_read_options)
+    # print(df.head())
+    # Find row by its name as Dataframe
+    row_df = df.iloc[sheet_label_index(df, df.columns[1]).contains(row_name)]
+    # print('printing columns')
+    # print(df[df.columns[1]])
+    # Row as Series
+    row_s = row_df.iloc[0, :]
+    # Row as list
+    row_ls = list(row_s)
+    # Delete two first element: Title and Subdivision in CRFReporter excel
+    del row_ls[0:2]
+    return row_ls
+
+
+def ReadTable4Rows(excel_file, country):
+    """
+    Read row 10 from each Table4 A,B,C and D in one CRFReporter Excel file.
+    The file is opened only once for the four sheets.
+    \param excel_file Reporting table file
+    \param country The country of the file
+    \return list of rows (see ReadTable4Row) in the order of sheet_ls
+    """
+    print(excel_file)
+    with EUutility.open_workbook(excel_file):
+        return [ReadTable4Row(excel_file, country, sheet, row_name) for (sheet, row_name) in zip(sheet_ls, substr_ls)]
+
+
+def category_level(label):
+    """The level of the category label in Table4.[A,B,C,D], e.g. 'A. Total forest land' 1,
+    '1. Forest land remaining forest land' 2 and '2.1 Cropland converted to forest land' 3,
+    None if the label is not numbered
+    """
+    m = re.match(category_number_pattern, label)
+    if m is None:
+        return None
+    number = m.group(1)
+    if number[0].isalpha():
+        return 1
+    return len(number.rstrip('.').split('.'))+1
+
+
+def subcategory_rows(df, total_position):
+    """The category and subdivision rows from the total row down as (category path, row)
+
+    The numbered categories in the title column form the hierarchy, e.g. 'A. Total forest land' >
+    '2. Land converted to forest land' > '2.1 Cropland converted to forest land'. A subdivision
+    (e.g. by region or soil type, in the Subdivision column with empty title) is a leaf below
+    the category above it.
+
+    Args:
+        df (pd.DataFrame): Table4.[A,B,C,D] sheet read as in ReadTable4Row
+        total_position (int): the position of the total row (level 1)
+    Returns:
+        list: (category path tuple, row as list without the first two columns as in ReadTable4Row) for each row
+    """
+    title_ls = list(df.iloc[:, 1:3].itertuples(index=False, name=None))
+    path_ls = []
+    subcategory_ls = []
+    for position in range(total_position, df.shape[0]):
+        (title, subdivision) = title_ls[position]
+        title = title.strip() if isinstance(title, str) else ''
+        subdivision = subdivision.strip() if isinstance(subdivision, str) else ''
+        if title != '':
+            level = category_level(title)
+            if level is None:
+                continue
+            # The categories of the same or lower level end
+            path_ls = [(path_level, label) for (path_level, label) in path_ls if path_level < level]
+            path_ls.append((level, title))
+            path = tuple(label for (path_level, label) in path_ls)
+        elif subdivision != '' and len(path_ls) > 0:
+            path = tuple(label for (path_level, label) in path_ls)+(subdivision,)
+        else:
+            continue
+        subcategory_ls.append((path, list(df.iloc[position, 2:])))
+    return subcategory_ls
+
+
+def ReadTable4Subcategories(excel_file, country):
+    """
+    Read row 10 and all subcategory rows below it (see subcategory_rows) from each Table4 A,B,C and D
+    in one CRFReporter Excel file. Each sheet is parsed once for both.
+    \param excel_file Reporting table file
+    \param country The country of the file
+    \return tuple (rows, subcategory_lss): the rows as ReadTable4Rows and for each sheet the list of
+            (category path, row) in the order of sheet_ls
+    """
+    print(excel_file)
+    rows = []
+    subcategory_lss = []
+    with EUutility.open_workbook(excel_file):
+        for (sheet, row_name) in zip(sheet_ls, substr_ls):
+            # The whole sheet is needed, not only the rows up to row_name
+            df = EUutility.read_sheet(excel_file, sheet, **table4_read_options)
+            total_position = sheet_label_index(df, df.columns[1]).contains(row_name)[0]
+            row_ls = list(df.iloc[total_position, :])
+            # Delete two first element: Title and Subdivision in CRFReporter excel
+            del row_ls[0:2]
+            rows.append(row_ls)
+            subcategory_lss.append(subcategory_rows(df, total_position))
+    return (rows, subcategory_lss)
+
+
+def SubcategoryArrays(countryls: list, country_subcategory_lss, col_range_ls, key_codes, inv_start: int, inv_end: int):
+    """
+    Collect the subcategory rows of all countries and years into arrays (country,year,category path,measure)
+    \param countryls List of countries
+    \param country_subcategory_lss For each country the list of ReadTable4Subcategories subcategory_lss in year order
+    \param col_range_ls The data columns of each sheet, see data_column_ranges
+    \param key_codes notationkey.NotationKeyCodes of the run
+    \param inv_start Inventroy start year, 1990
+    \param inv_end Inventory end year
+    \return for each sheet in sheet_ls a tuple (path_ls, value_array, key_array, found_array): the category paths
+             in the order first found, the values and notation key codes (see split_values) and True for the paths
+             found in the file of the country and year
+    """
+    array_ls = []
+    for (sheet_index, columns_ls) in enumerate(columns_lss):
+        (first_col, last_col) = col_range_ls[sheet_index]
+        path_dict = {}
+        for subcategory_lss in country_subcategory_lss:
+            for subcategory_ls in subcategory_lss:
+                if subcategory_ls is not None:
+                    for (path, row) in subcategory_ls[sheet_index]:
+                        path_dict.setdefault(path, len(path_dict))
+        cells = np.full((len(countryls), inv_end-inv_start+1, len(path_dict), len(columns_ls)), np.nan, dtype=object)
+        found_array = np.zeros(cells.shape[:3], dtype=bool)
+        for (country_index, subcategory_lss) in enumerate(country_subcategory_lss):
+            for (year_index, subcategory_ls) in enumerate(subcategory_lss):
+                if subcategory_ls is None:
+                    continue
+                for (path, row) in subcategory_ls[sheet_index]:
+                    cells[country_index, year_index, path_dict[path]] = row[first_col:last_col]
+                    found_array[country_index, year_index, path_dict[path]] = True
+        (value_array, key_array) = split_values(cells, key_codes)
+        array_ls.append((list(path_dict), value_array, key_array, found_array))
+    return array_ls
+
+
+def WriteSubcategorySheets(writer, countryls: list, array_ls, inv_start: int, inv_end: int):
+    """
+    Create excel sheet for each Table4.[A,B,C,D] with the subcategory rows of each country and year
+    \param writer  Excel writer
+    \param countryls List of countries
+    \param array_ls The arrays of SubcategoryArrays
+    \param inv_start Inventroy start year, 1990
+    \param inv_end Inventory end year
+    \return the Excle writer with data
+    """
+    year_ls = list(range(inv_start, inv_end+1))
+    for ((sheet, sheet_ext, columns_ls), (path_ls, value_array, key_array, found_array)) in zip(
+            zip(sheet_ls, sheet_ext_ls, columns_lss), array_ls):
+        # Only the categories found in the file of the country and year
+        (country_index, year_index, path_index) = np.nonzero(found_array)
+        df = pd.DataFrame(value_array[country_index, year_index, path_index], columns=columns_ls,
+                          index=[countryls[i] for i in country_index])
+        df.insert(0, 'Year', [year_ls[i] for i in year_index])
+        df.insert(1, 'Level', [len(path_ls[i]) for i in path_index])
+        df.insert(2, 'Category', [category_path_separator.join(path_ls[i]) for i in path_index])
+        df.to_excel(writer, sheet_name=sheet+sheet_ext+' sub', na_rep='NaN')
+    return writer
+
+
+def AddSubcategoryLongTable(long_table, countryls: list, array_ls, key_codes, inv_start: int):
+    """
+    Add the subcategory rows below the totals to the long table (see longtable.py), the category is
+    the category path. The total rows are added by AddRestorationLongTable
+    \param long_table longtable.LongTable
+    \param countryls List of countries
+    \param array_ls The arrays of SubcategoryArrays
+    \param key_codes notationkey.NotationKeyCodes given to SubcategoryArrays
+    \param inv_start Inventroy start year, 1990
+    """
+    # Notation keys back as text for LongTable.add
+    key_ls = np.array(key_codes.key_ls(), dtype=object)
+    for ((sheet, columns_ls), (path_ls, value_array, key_array, found_array)) in zip(zip(sheet_ls, columns_lss), array_ls):
+        (measure_ls, unit_ls) = zip(*[longtable.unit_of(column) for column in columns_ls])
+        path_index_ls = [i for (i, path) in enumerate(path_ls) if len(path) > 1]
+        for (country_index, country) in enumerate(countryls):
+            for year_index in range(value_array.shape[1]):
+                found_index_ls = [i for i in path_index_ls if found_array[country_index, year_index, i]]
+                if len(found_index_ls) == 0:
+                    continue
+                values = np.where(key_array[country_index, year_index, found_index_ls] > 0,
+                                  key_ls[key_array[country_index, year_index, found_index_ls]],
+                                  value_array[country_index, year_index, found_index_ls])
+                long_table.add(country, inv_start+year_index, sheet,
+                               [category_path_separator.join(path_ls[i]) for i in found_index_ls],
+                               list(measure_ls), values, list(unit_ls))
+
+
+def empty_column_range(df):
+    """The indices of the first two columns where all rows are empty ('')
+
+    In the rows read with ReadTable4Row the data is between these two columns.
+
+    Args:
+        df (pd.DataFrame): rows read from one Table4.[A,B,C,D] sheet
+    Returns:
+        tuple: column indices of the two empty columns
+    """
+    empty_col_ind = [i for i in range(df.shape[1]) if (
+        df.iloc[:, i] == '').all()]
+    return (empty_col_ind[0], empty_col_ind[1])
+
+
+def data_column_ranges(rows_ls):
+    """The data columns in the rows of each Table4.[A,B,C,D] as in WriteEUTable4Total2
+
+    Args:
+        rows_ls (list): ReadTable4Rows results of all countries and years (not missing files)
+    Returns:
+        list: for each sheet in sheet_ls the first and the last+1 data column in the rows
+    """
+    col_range_ls = []
+    for sheet_index in range(len(sheet_ls)):
+        df = pd.DataFrame([rows[sheet_index] for rows in rows_ls])
+        (first_empty_col, second_empty_col) = empty_column_range(df)
+        col_range_ls.append((first_empty_col+1, second_empty_col))
+    return col_range_ls
+
+
+def AddRestorationLongTable(long_table, countryls: list, country_rows_lss, inv_start: int):
+    """
+    Add the rows collected with ReadTable4Rows to the long table (see longtable.py).
+    The measure and the unit are from the column names, e.g. 'TotalArea(kha)'
+    \param long_table longtable.LongTable
+    \param countryls List of countries
+    \param country_rows_lss For each country the list of ReadTable4Rows results in year order
+    \param inv_start Inventroy start year, 1990
+    """
+    rows_ls = [rows for country_rows_ls in country_rows_lss for rows in country_rows_ls if rows is not None]
+    if len(rows_ls) == 0:
+        return
+    col_range_ls = data_column_ranges(rows_ls)
+    for (country, country_rows_ls) in zip(countryls, country_rows_lss):
+        for (year_index, rows) in enumerate(country_rows_ls):
+            for (sheet_index, (sheet, row_name, columns_ls)) in enumerate(zip(sheet_ls, substr_ls, columns_lss)):
+                (measure_ls, unit_ls) = zip(*[longtable.unit_of(column) for column in columns_ls])
+                if rows is None:
+                    values = [[np.nan]*len(columns_ls)]
+                else:
+                    (first_col, last_col) = col_range_ls[sheet_index]
+                    values = [rows[sheet_index][first_col:last_col]]
+                long_table.add(country, inv_start+year_index, sheet, [row_name], list(measure_ls), values, list(unit_ls))
+
+
+def WriteEUTable4Total2(writer, countryls: list, country_rows_lss, inv_start: int, inv_end: int):
+    """
+    Create excel sheet for each Table4.[A,B,C,D] from the rows collected with ReadTable4Rows
+    \param writer  Excel writer
+    \param countryls List of countries
+    \param country_rows_lss For each country the list of ReadTable4Rows results in year order
+    \param inv_start Inventroy start year, 1990
+    \param inv_end Inventory end year
+    \return the Excle writer with data
+    """
+    rows_ls = [rows for country_rows_ls in country_rows_lss for rows in country_rows_ls if rows is not None]
+    # The data we want is between two empty columns
+    col_range_ls = data_column_ranges(rows_ls)
+    year_ls = list(range(inv_start, inv_end+1))
+    for (sheet_index, (sheet, sheet_ext, columns_ls)) in enumerate(zip(sheet_ls, sheet_ext_ls, columns_lss)):
+        (first_col, last_col) = col_range_ls[sheet_index]
+        data_row_lss = []
+        for (country, country_rows_ls) in zip(countryls, country_rows_lss):
+            print(country, sheet)
+            # Missing files (None) are empty rows, i.e. NaN in the output
+            data_row_lss.extend([rows[sheet_index][first_col:last_col] if rows is not None else []
+                                 for rows in country_rows_ls])
+        # Notation keys are NaN in the output, the whole sheet is split into values and notation key codes at once
+        (value_array, key_array) = split_values(pd.DataFrame(data_row_lss, columns=columns_ls).to_numpy(),
+                                                NotationKeyCodes())
+        # Title row and the country code as index
+        df_merge = pd.DataFrame(value_array, columns=columns_ls,
+                                index=[country for country in countryls for year in year_ls])
+        df_merge.insert(0, 'Year', year_ls*len(countryls))
+        # All countries for one sheet done
+        df_merge.to_excel(writer, sheet_name=sheet+sheet_ext, na_rep='NaN')
+    return writer
+
+
+def CreateEUTable4Total2(writer, data_dir, countryls: list, inv_start: int, inv_end: int, long_table=None,
+                         subcategories=False):
     """
     Collect row 10 from CRFReporter Excel files Table4 A,B,C and D 
     \pre It is assumed that immediate subdirectory of data_dir contains country directories denoted by three letter acronym.
+    For each country
+       For each each year
+          Collect row 10 (Total) from Table4.[A,B,C,D] in CRFReporter Excel files
     For each Table4.[A,B,C,D]
-       For each country
-          For each each year
-            Collect row 10 (Total) to dataframe from CRFReporter Excel files
        Create excel sheet
     Save Excel file
     \param writer  Excel writer
@@ -99,138 +397,76 @@ def CreateEUTable4Total2(writer, data_dir, countryls: list, inv_start: int, inv_
     \param countryls List of countries
     \param inv_start Inventroy start year, 1990
     \param inv_end Inventory end year
+    \param long_table If given, add the rows also to the long table (see longtable.py)
+    \param subcategories If True, collect also all subcategory rows below row 10 from the same
+           parsed sheets and create a sheet of them for each Table4.[A,B,C,D] (see SubcategoryArrays)
     \return the Excle writer with data
     \post Units are as in Excel files (no conversion to CO2)
     """
-    for (sheet, sheet_ext, row_name, columns_ls) in zip(sheet_ls, sheet_ext_ls, substr_ls, columns_lss):
-        df_merge = pd.DataFrame()
-        for country in countryls:
-            # excelfilels = list(set(glob.glob(directory+'/'+country+'/*.xlsx')) -
-            #                    set(glob.glob(directory+'/'+country+'/*_198??*.xlsx')))
-            # excelfilels.sort()
-            # List all excel files and sort the files in ascending order (1990,1991,...,2015)
-            # Exclude years in 1980's
-            # MOD: 2024 require that the filename starts with letter A-Z or a-z
-            excelfilels = list(set(glob.glob(directory+'/'+country+'/[A-z]*.xlsx'))-set(
-                glob.glob(directory+'/'+country+'/*[_,-]198??*.xlsx')))
-            excelfilels = sorted(excelfilels)
-            print(country, sheet)
-            data_row_lss = []
-            i = inv_start
-            for excel_file in excelfilels:
-                if i > inv_end:
-                    break
-                i = i+1
-                print(excel_file)
-                xlsx = pd.ExcelFile(excel_file)
-                df = pd.read_excel(
-                    xlsx, sheet, keep_default_na=False, na_values=['MISSING_VALUE'])
-                # print(df.head())
-                # Find row by its name as Dataframe
-                row_df = df[df[df.columns[1]].str.contains(
-                    substr_ls[substr_ls.index(row_name)]) == True]
-                # print('printing columns')
-                # print(df[df.columns[1]])
-                # Row as Series
-                row_s = row_df.iloc[0, :]
-                # Row as list
-                row_ls = list(row_s)
-                # Delete two first element: Title and Subdivision in CRFReporter excel
-                del row_ls[0:2]
-                # Append one year data
-                data_row_lss.append(row_ls)
-            # Data collected for one country, create data frame
-            df = pd.DataFrame(data_row_lss)
-            # Insert inventory years
-            df.insert(0, "Year", list(range(inv_start, inv_end+1)))
-            # Set the country code as index
-            df.index = [country]*len(range(inv_start, inv_end+1))
-            # Merge dataframes
-            # df_merge=df_merge.append(df)
-            df_merge = pd.concat((df_merge, df))
-        # The data we want is between two empty columns. Find first the columns
-        empty_col_ind = [i for i in range(df_merge.shape[1]) if (
-            df_merge.iloc[:, i] == '').all()]
-        df_merge = df_merge.iloc[:, empty_col_ind[0]:empty_col_ind[1]]
-        # Title row
-        df_merge.columns = ['Year']+columns_ls
-
-        # set all strings to NaN
-        for col in df_merge.columns:
-            df_merge[col] = pd.to_numeric(df_merge[col], errors='coerce')
-
-        # This is quick hack to return years to the dataframe. They get deleted from some reason because
-        # of the nan setting operation
-        df_merge['Year'] = list(range(inv_start, inv_end+1))*len(countryls)
-        # All countries for one sheet done
-        df_merge.to_excel(writer, sheet_name=sheet+sheet_ext, na_rep='NaN')
+    # List all excel files and sort the files in ascending order (1990,1991,...,2015)
+    # and collect the rows for each year, see EUutility.year_files
+    if not subcategories:
+        country_rows_lss = EUutility.map_country_files(
+            ReadTable4Rows, data_dir, countryls, inv_start, inv_end)
+    else:
+        country_result_lss = EUutility.map_country_files(
+            ReadTable4Subcategories, data_dir, countryls, inv_start, inv_end)
+        country_rows_lss = [[result[0] if result is not None else None for result in result_ls]
+                            for result_ls in country_result_lss]
+        country_subcategory_lss = [[result[1] if result is not None else None for result in result_ls]
+                                   for result_ls in country_result_lss]
+        col_range_ls = data_column_ranges([rows for country_rows_ls in country_rows_lss
+                                           for rows in country_rows_ls if rows is not None])
+        # The notation key codes of the subcategory arrays, decoded with the same codes for the long table
+        key_codes = NotationKeyCodes()
+        subcategory_array_ls = SubcategoryArrays(countryls, country_subcategory_lss, col_range_ls, key_codes,
+                                                 inv_start, inv_end)
+    if long_table is not None:
+        AddRestorationLongTable(long_table, countryls, country_rows_lss, inv_start)
+        if subcategories:
+            AddSubcategoryLongTable(long_table, countryls, subcategory_array_ls, key_codes, inv_start)
+    with stage('write'):
+        WriteEUTable4Total2(writer, countryls, country_rows_lss, inv_start, inv_end)
+        if subcategories:
+            WriteSubcategorySheets(writer, countryls, subcategory_array_ls, inv_start, inv_end)
     return writer
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("-d", "--directory", dest="f1",
-                        required=True, help="Inventory Parties Directory")
+                        required=True, help="Inventory Parties Directory (or zip archive)")
     parser.add_argument("-s", "--start", type=int, dest="f2",
                         required=True, help="Inventory start year (1990)")
     parser.add_argument("-e", "--end", type=int, dest="f3",
                         required=True, help="Inventory end year")
-    group = parser.add_mutually_exclusive_group(required=True)
-    group.add_argument("--eu", action="store_true", dest="eu",
-                       default=False, help="EU countries")
-    group.add_argument("--euplus", action="store_true", dest="euplus",
-                       default=False, help="EU countries plus GBR, ISL, NOR")
-    group.add_argument("-a", "--all", action="store_true",
-                       dest="all", default=False, help="All countries (EU+others")
-    group.add_argument("-l", "--list", action="store_true", dest="countryls", default=False,
-                       help="List files in Inventory Parties Directory")
-    group.add_argument("-c", "--countries", dest="country", type=str, nargs='+',
-                       help="List of countries from the official acronyms separated by spaces")
-    group.add_argument("--amissing", action="store_true", dest="all_missing", default=False,
-                       help='All countries where some are missing. See allcountryls_missing in countrylist.py')
+    EUutility.add_country_arguments(parser)
+    parser.add_argument("--subcategories", dest="subcategories", action="store_true", default=False,
+                        help="Collect also all subcategory rows (e.g. land converted to forest land by region and soil type) into a sheet for each Table4.[A,B,C,D]")
+    EUutility.add_run_arguments(parser)
     args = parser.parse_args()
+    EUutility.apply_run_arguments(args)
     directory = args.f1
     print("Inventory Parties data directory:", directory)
     inventory_start = int(args.f2)
     print("Inventory start:", inventory_start)
     inventory_end = int(args.f3)
     print("Inventory end:", inventory_end)
-    file_prefix = 'EU'
-    countryls = []
-    if args.eu:
-        print("Using EU  countries")
-        countryls = euls
-    elif args.euplus:
-        print("Using EU  countries plus GBR, ISL and NOR")
-        countryls = euplusls
-        file_prefix = 'EU_GBR_ISL_NOR'
-    elif args.all:
-        print("Using all countries")
-        countryls = allcountryls
-        file_prefix = 'EU_and_Others'
-    elif args.countryls:
-        print("Listing countries in", args.f1)
-        ls = glob.glob(args.f1+'/???')
-        countryls = [pathlib.Path(x).name for x in ls]
-        countryls.sort()
-        file_prefix = pathlib.Path(args.f1).name
-    elif args.all_missing:
-        print("Using allcountry list missing")
-        countryls = allcountryls_missing
-        file_prefix = 'all_countries'
-    else:
-        print("Using countries:", args.country)
-        countryls = args.country
-        file_prefix = args.country[0]
-        for country in args.country[1:]:
-            file_prefix = file_prefix+"_"+country
+    (countryls, file_prefix) = EUutility.select_countries(args, 'all_countries')
     file_name = file_prefix+'_Restoration_' + \
         str(inventory_start)+'_'+str(inventory_end)+'.xlsx'
     countryls = sorted(countryls)
     writer = pd.ExcelWriter(file_name, engine='xlsxwriter')
+    long_table = longtable.LongTable() if args.long is not None else None
     # countryls=['AUT','FIN']
     writer = CreateEUTable4Total2(
-        writer, directory, countryls, inventory_start, inventory_end)
+        writer, directory, countryls, inventory_start, inventory_end, long_table, args.subcategories)
     print("Writing results to:", file_name)
-    writer.close()
+    with stage('write'):
+        writer.close()
+    if long_table is not None:
+        print("Writing long table to:", args.long)
+        with stage('write'):
+            long_table.save(args.long)
+    runreport.finish()
     print("Done")
@@ -0,0 +1,251 @@
+import re
+import collections
+import argparse
+import numpy as np
+import pandas as pd
+import xlsxreader
+import EUutility
+import runreport
+import longtable
+from runreport import stage
+from inventorycube import InventoryCube
+from notationkey import is_notation_key
+
+# The Sector 4 (LULUCF) tables: Table4, Table4.1, Table4.A-F, Table4(I)-(V), Table4.Gs1, Table4.Gs2 etc.
+sector4_sheet_pattern = r'^\s*Table\s*4'
+# Label columns are searched left of the first column with numbers, at most this many
+max_label_columns = 4
+# The unit in parentheses at the end of a column header, e.g. 'Total area (kha)' or 'Net CO2 emissions (kt CO2)'.
+# Only text starting with a unit is a unit, e.g. not 'Forest land (managed)'
+unit_pattern = r'\(((?:kha|ha|years|kt|t|Gg|Mg|m3|%)(?=[\s/)])[^()]*)\)\s*$'
+# A header cell with only the unit, e.g. '(kha)', is the unit of the columns right of it
+unit_cell_pattern = r'^\s*'+unit_pattern
+# Footnote numbers at the end of labels and headers, e.g. 'Wetlands (managed) (3)' or '(1), (2)'
+footnote_pattern = r'(\s*\(\d+\),?)+\s*$'
+
+
+def sector4_sheet(sheet):
+    """True if the sheet is a Sector 4 table, e.g. 'Table4.A' or 'Table4(III)'"""
+    return re.match(sector4_sheet_pattern, sheet, flags=re.IGNORECASE) is not None
+
+
+def is_number(value):
+    """True if the cell value is a number (not NaN)"""
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool) and value == value
+
+
+def is_text(value):
+    """True if the cell value is a non-empty text"""
+    return isinstance(value, str) and value.strip() != ''
+
+
+def clean_text(text):
+    """Text with the whitespace (also line breaks) collapsed into single spaces and without footnote numbers"""
+    return re.sub(footnote_pattern, '', ' '.join(str(text).split()))
+
+
+def unique_names(name_ls, default_ls):
+    """The names made unique: empty names are replaced by the default, repeated names get ' (n)'"""
+    count_dict = {}
+    unique_ls = []
+    for (name, default) in zip(name_ls, default_ls):
+        if name == '':
+            name = default
+        count_dict[name] = count_dict.get(name, 0)+1
+        unique_ls.append(name if count_dict[name] == 1 else name+' ('+str(count_dict[name])+')')
+    return unique_ls
+
+
+def column_measure(header):
+    """Split the column header into measure and unit, e.g. 'Total area (kha)' -> ('Total area','kha')"""
+    m = re.search(unit_pattern, header)
+    if m is None:
+        return (header, '')
+    return (header[:m.start()].strip(), m.group(1).strip())
+
+
+def SweepSheet(df):
+    """
+    Find the data cells of one Sector 4 table read without header (header=None).
+    The label columns are the columns with text left of the first column with numbers,
+    the data rows are the rows with numbers or notation keys right of them. The rows above
+    the first data row are the column headers. A row label is the text of the label columns,
+    a row with an empty first label column (e.g. 'Mineral soils' below '1. Forest land
+    remaining forest land') gets the label of the row above as prefix.
+    \param df The sheet read with header=None
+    \return tuple (row_ls, column_ls, unit_ls, values) with values an object array (row,column) of the
+            numbers and notation keys (other cells NaN), None if the sheet has no numbers
+    """
+    cells = df.to_numpy(dtype=object)
+    if cells.size == 0:
+        return None
+    number = np.frompyfunc(is_number, 1, 1)(cells).astype(bool)
+    text = np.frompyfunc(is_text, 1, 1)(cells).astype(bool)
+    # The notation keys are checked once for each different text
+    (text_index, text_ls) = pd.factorize(cells[text])
+    key = np.zeros(cells.shape, dtype=bool)
+    key[text] = np.array([is_notation_key(value) for value in text_ls], dtype=bool)[text_index]
+    text = text & ~key
+    number_col_ls = np.flatnonzero(number.any(axis=0))
+    if len(number_col_ls) == 0:
+        return None
+    first_data_col = number_col_ls[0]
+    label_col_ls = [col for col in range(max(0, first_data_col-max_label_columns), first_data_col)
+                    if text[:, col].any()]
+    data = (number | key)[:, first_data_col:]
+    row_ls = np.flatnonzero(data.any(axis=1))
+    if len(label_col_ls) > 0:
+        row_ls = row_ls[text[row_ls][:, label_col_ls].any(axis=1)]
+    if len(row_ls) == 0:
+        return None
+    col_ls = first_data_col+np.flatnonzero(data[row_ls].any(axis=0))
+    # Row labels, the first label column carried down to the rows below. A label row without
+    # data (e.g. 'B. HWP produced and exported') is the section of the data rows below it, also
+    # in the header rows above the first data row (e.g. 'A. HWP produced and consumed domestically')
+    label_dict = {}
+    parent = ''
+    section = ''
+    data_row_set = set(row_ls)
+    for row in range(row_ls[-1]+1):
+        row_text_ls = [clean_text(cells[row, col]) for col in label_col_ls if text[row, col]]
+        if row < row_ls[0]:
+            if len(row_text_ls) > 0:
+                section = ' / '.join(row_text_ls)
+            continue
+        if len(label_col_ls) > 0 and text[row, label_col_ls[0]]:
+            parent = row_text_ls[0]
+            label = ' / '.join(row_text_ls)
+        else:
+            label = ' / '.join([parent]*(parent != '')+row_text_ls)
+        if row not in data_row_set:
+            section = label
+        label_dict[row] = (label, section)
+    # Labels repeated in different sections get the section as prefix
+    label_count_dict = collections.Counter(label_dict[row][0] for row in row_ls)
+    label_ls = []
+    for row in row_ls:
+        (label, section) = label_dict[row]
+        if label_count_dict[label] > 1 and section != '':
+            label = section+' / '+label
+        label_ls.append(label)
+    row_name_ls = unique_names(label_ls, ['Row '+str(row+1) for row in row_ls])
+    # Column headers and units from the rows above the first data row
+    header_lss = [[] for col in col_ls]
+    unit_ls = ['' for col in col_ls]
+    for row in range(row_ls[0]):
+        unit = ''
+        for col in range(first_data_col, col_ls[-1]+1):
+            m = re.match(unit_cell_pattern, str(cells[row, col])) if text[row, col] else None
+            if m is not None:
+                unit = m.group(1).strip()
+            if col in col_ls:
+                col_index = np.searchsorted(col_ls, col)
+                if m is None and text[row, col]:
+                    header_lss[col_index].append(str(cells[row, col]))
+                if unit != '':
+                    unit_ls[col_index] = unit
+    measure_unit_ls = [column_measure(clean_text(' '.join(header_ls))) for header_ls in header_lss]
+    column_name_ls = unique_names([measure for (measure, unit) in measure_unit_ls],
+                                  [xlsxreader.column_letter(col+1) for col in col_ls])
+    # The unit in the column header before the unit of the header row
+    unit_ls = [header_unit if header_unit != '' else unit for ((measure, header_unit), unit) in zip(measure_unit_ls, unit_ls)]
+    values = np.where((number | key)[np.ix_(row_ls, col_ls)], cells[np.ix_(row_ls, col_ls)], np.nan)
+    return (row_name_ls, column_name_ls, unit_ls, values)
+
+
+def ReadSweepFile(file, country):
+    """
+    Read all Sector 4 tables from one Reporting table file, the file is opened once for all sheets
+    \param file Reporting table file
+    \param country The country of the file
+    \return list of (sheet, row_ls, column_ls, unit_ls, values) of the tables with data (see SweepSheet)
+    """
+    print(file)
+    result_ls = []
+    with EUutility.open_workbook(file):
+        for sheet in EUutility.sheet_names(file):
+            if not sector4_sheet(sheet):
+                continue
+            df = EUutility.read_sheet(file, sheet, header=None, keep_default_na=False, na_values=[''])
+            with stage('sweep'):
+                result = SweepSheet(df)
+            if result is not None:
+                result_ls.append((sheet.strip(),)+result)
+    return result_ls
+
+
+def AddSweepTables(table, countryls, country_result_lss, start, units=False):
+    """
+    Add the tables read with ReadSweepFile to an inventory cube or long table
+    \param table InventoryCube or LongTable
+    \param countryls List of countries
+    \param country_result_lss For each country the list of ReadSweepFile results in year order
+    \param start Inventory start year (1990)
+    \param units True for LongTable, the unit of each column is added
+    """
+    for (country, result_ls) in zip(countryls, country_result_lss):
+        for (year_index, sheet_ls) in enumerate(result_ls):
+            if sheet_ls is None:
+                continue
+            for (sheet, row_ls, column_ls, unit_ls, values) in sheet_ls:
+                if units:
+                    table.add(country, start+year_index, sheet, row_ls, column_ls, values, unit_ls)
+                else:
+                    table.add(country, start+year_index, sheet, row_ls, column_ls, values)
+
+
+def SweepSector4(directory, countryls, start: int, end: int, cube_file, long_file=None):
+    """
+    Read all Sector 4 tables of all countries and years in one pass over the Reporting tables
+    and save them together as inventory cube and/or long table
+    \param directory The directory where the Reporting tables are located
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \param cube_file If given, save the values as inventory cube to this file (see inventorycube.py)
+    \param long_file If given, save the values as long table to this file (see longtable.py)
+    \return For each country the list of ReadSweepFile results in year order
+    """
+    country_result_lss = EUutility.map_country_files(ReadSweepFile, directory, countryls, start, end)
+    if cube_file is not None:
+        cube = InventoryCube()
+        AddSweepTables(cube, countryls, country_result_lss, start)
+        print("Writing inventory cube to:", cube_file)
+        with stage('write'):
+            cube.save(cube_file)
+    if long_file is not None:
+        long_table = longtable.LongTable()
+        AddSweepTables(long_table, countryls, country_result_lss, start, units=True)
+        print("Writing long table to:", long_file)
+        with stage('write'):
+            long_table.save(long_file)
+    return country_result_lss
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract all Sector 4 tables (Table4*) of all countries and years in one pass")
+    parser.add_argument("-d", "--directory", dest="f1",
+                        required=True, help="Inventory Parties Directory (or zip archive)")
+    parser.add_argument("-s", "--start", type=int, dest="f2",
+                        required=True, help="Inventory start year (1990)")
+    parser.add_argument("-e", "--end", type=int, dest="f3",
+                        required=True, help="Inventory end year")
+    EUutility.add_country_arguments(parser)
+    parser.add_argument("--cube", dest="cube", default=None,
+                        help="Inventory cube file (npz) of all values read, see inventorycube.py (default <prefix>_sector4_<start>_<end>.npz)")
+    EUutility.add_run_arguments(parser, layout_cache=False)
+    args = parser.parse_args()
+    EUutility.apply_run_arguments(args)
+    directory = args.f1
+    print("Inventory Parties data directory:", directory)
+    inventory_start = int(args.f2)
+    print("Inventory start:", inventory_start)
+    inventory_end = int(args.f3)
+    print("Inventory end:", inventory_end)
+    (countryls, file_prefix) = EUutility.select_countries(args)
+    cube_file = args.cube
+    if cube_file is None:
+        cube_file = file_prefix+'_sector4_'+str(inventory_start)+'_'+str(inventory_end)+'.npz'
+    SweepSector4(directory, countryls, inventory_start, inventory_end, cube_file, args.long)
+    runreport.finish()
+    print("Done")
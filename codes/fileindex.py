@@ -0,0 +1,150 @@
+import os
+import re
+import argparse
+import pathlib
+import archivefile
+
+# Reporting table file names, the inventory year is the second four digit part:
+# CRT: AUT-CRT-2025-V1.0-1990-20250411-120000_started.xlsx (submission 2025, version 1.0, inventory year 1990)
+# CRF: AUT_2023_1990_13042023_141234.xlsx (submission 2023, inventory year 1990)
+file_name_separator = r'[-_ ]'
+year_pattern = re.compile(r'\d{4}')
+version_pattern = re.compile(r'[Vv](\d+(?:\.\d+)*)')
+
+
+def parse_file_name(file_name):
+    """Find the inventory year, submission year and submission version from Reporting table file name
+
+    Args:
+        file_name (str): Reporting table file name, e.g. AUT-CRT-2025-V1.0-1990-20250411-120000_started.xlsx
+    Returns:
+        dict: 'year', 'submission' (None if not in the file name) and 'version' (tuple, () if not in the file name),
+              None if the inventory year is not found
+    """
+    token_ls = re.split(file_name_separator, pathlib.PurePath(archivefile.file_name(file_name)).stem)
+    year_ls = [int(token) for token in token_ls if year_pattern.fullmatch(token)]
+    version = ()
+    for token in token_ls:
+        match = version_pattern.fullmatch(token)
+        if match:
+            version = tuple(int(x) for x in match.group(1).split('.'))
+            break
+    if len(year_ls) == 0:
+        return None
+    elif len(year_ls) == 1:
+        return {'year': year_ls[0], 'submission': None, 'version': version}
+    return {'year': year_ls[1], 'submission': year_ls[0], 'version': version}
+
+
+class DirectoryIndex:
+    """Index of the Reporting table files in the Inventory Parties directory by country and inventory year.
+
+    The index of a country is built once from the file names (see parse_file_name)
+    and built again only if the country directory or archives change. If there are several
+    files for the same year (resubmissions) the latest submission and version is used.
+    The files of a country are read from the country directory (*.xlsx), from the zip
+    archives in the country directory, from the archive <country>.zip in the Inventory
+    Parties directory, or, if the Inventory Parties directory is itself a zip archive, from
+    its directory of the country. The archives are not unpacked, the files in them are
+    archive members (see archivefile.py).
+    """
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory (str): Inventory Parties directory with a directory or zip archive for each country,
+                             or zip archive with a directory for each country
+        """
+        self.directory = directory
+        self.country_dict = {}
+
+    def sources(self, country):
+        """The country directory and the zip archives containing the files of the country"""
+        directory = pathlib.Path(self.directory)
+        if archivefile.is_archive(directory):
+            return [directory]
+        country_dir = directory/country
+        source_ls = [path for path in [country_dir, directory/(country+'.zip')] if path.exists()]
+        if country_dir.is_dir():
+            source_ls.extend(sorted(country_dir.glob('*.zip')))
+        return source_ls
+
+    def source_files(self, country, source_ls):
+        """The Excel files in the country directory and archives (see sources)"""
+        file_ls = []
+        for source in source_ls:
+            if source.is_dir():
+                file_ls.extend(str(path) for path in sorted(source.glob('*.xlsx')))
+            elif source == pathlib.Path(self.directory):
+                file_ls.extend(archivefile.xlsx_members(source, country))
+            else:
+                file_ls.extend(archivefile.xlsx_members(source))
+        return file_ls
+
+    def build_country_index(self, country, file_ls):
+        """Index {year:file} of the Reporting table files of the country"""
+        candidate_dict = {}
+        for file in file_ls:
+            name = archivefile.file_name(file)
+            # MOD: 2024 require that the filename starts with letter A-Z or a-z
+            if not re.match('[A-Za-z]', name):
+                continue
+            info = parse_file_name(name)
+            if info is None:
+                print("Inventory year not found in file name", file)
+                continue
+            candidate_dict.setdefault(info['year'], []).append(
+                ((info['submission'] or 0, info['version'], name), file))
+        year_file_dict = {}
+        for (year, candidate_ls) in candidate_dict.items():
+            candidate_ls.sort()
+            if len(candidate_ls) > 1:
+                print("Several files for", year, "in", country, "using", candidate_ls[-1][1])
+            year_file_dict[year] = candidate_ls[-1][1]
+        return year_file_dict
+
+    def year_files(self, country):
+        """Dictionary {year:file} of the Reporting table files of the country"""
+        source_ls = self.sources(country)
+        if not source_ls:
+            return {}
+        state = tuple(os.stat(source).st_mtime_ns for source in source_ls)
+        if country not in self.country_dict or self.country_dict[country][0] != state:
+            self.country_dict[country] = (state, self.build_country_index(country, self.source_files(country, source_ls)))
+        return self.country_dict[country][1]
+
+    def countries(self):
+        """The three letter countries in the Inventory Parties directory (directories and zip archives) or archive"""
+        directory = pathlib.Path(self.directory)
+        if archivefile.is_archive(directory):
+            name_set = set(pathlib.PurePosixPath(archivefile.split_member(file)[1]).parent.name
+                           for file in archivefile.xlsx_members(directory))
+        else:
+            name_set = set(path.name for path in directory.glob('???')) | set(path.stem for path in directory.glob('???.zip'))
+        return sorted(name for name in name_set if len(name) == 3)
+
+    def file(self, country, year):
+        """The Reporting table file of the country for the inventory year, None if missing"""
+        return self.year_files(country).get(year)
+
+    def files(self, country, start, end):
+        """The Reporting table files of the country for the inventory years start..end, None for missing years"""
+        year_file_dict = self.year_files(country)
+        return [year_file_dict.get(year) for year in range(start, end+1)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the Reporting table file of each country and inventory year")
+    parser.add_argument("-d", "--directory", dest="f1",
+                        required=True, help="Inventory Parties Directory (or zip archive)")
+    parser.add_argument("-s", "--start", type=int, dest="f2",
+                        required=True, help="Inventory start year (1990)")
+    parser.add_argument("-e", "--end", type=int, dest="f3",
+                        required=True, help="Inventory end year")
+    parser.add_argument("-c", "--countries", dest="country", type=str, nargs='+', required=True,
+                        help="List of countries from the official acronyms separated by spaces")
+    args = parser.parse_args()
+    index = DirectoryIndex(args.f1)
+    for country in args.country:
+        for (year, file) in zip(range(args.f2, args.f3+1), index.files(country, args.f2, args.f3)):
+            print(country, year, file if file is not None else "MISSING")
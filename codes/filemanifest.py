@@ -0,0 +1,143 @@
+import os
+import sys
+import ast
+import pathlib
+import hashlib
+import pickle
+import archivefile
+
+
+def file_sha1(file):
+    """SHA-1 of the file contents (file or zip archive member, see archivefile.py)"""
+    sha1 = hashlib.sha1()
+    with archivefile.open_binary(file) as f:
+        for block in iter(lambda: f.read(1024*1024), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+# SHA-1 of the source files of each module file, see source_hash
+source_hash_dict = {}
+
+
+def local_imports(source_file):
+    """The python files in the directory of source_file imported by it (also within functions)
+
+    Args:
+        source_file (pathlib.Path): python file
+    """
+    module_set = set()
+    for node in ast.walk(ast.parse(source_file.read_text(encoding='utf-8'))):
+        if isinstance(node, ast.Import):
+            module_set.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module is not None:
+            module_set.add(node.module.split('.')[0])
+    return [source_file.parent/(module+'.py') for module in sorted(module_set)
+            if (source_file.parent/(module+'.py')).is_file()]
+
+
+def source_files(source_file):
+    """The python file and the python files of the same directory it imports directly or through them"""
+    file_set = {source_file}
+    file_ls = [source_file]
+    while len(file_ls) > 0:
+        for imported_file in local_imports(file_ls.pop()):
+            if imported_file not in file_set:
+                file_set.add(imported_file)
+                file_ls.append(imported_file)
+    return sorted(file_set)
+
+
+def source_hash(func):
+    """SHA-1 of the module of func and the modules it imports, None if func has no source file
+
+    The values read depend on the module of func and on the reader and parser modules it uses
+    (e.g. hwpengine.py, labelindex.py, EUutility.py and xlsxreader.py), found from the imports.
+    The other scripts (e.g. euaggregate.py or benchmark.py) are not hashed: changing them does
+    not invalidate the results of func.
+    """
+    source_file = getattr(sys.modules.get(func.__module__), '__file__', None)
+    if source_file is None:
+        return None
+    source_file = pathlib.Path(source_file).resolve()
+    if source_file not in source_hash_dict:
+        source_hash_dict[source_file] = hashlib.sha1(
+            ''.join(f.name+file_sha1(f) for f in source_files(source_file)).encode('utf-8')).hexdigest()
+    return source_hash_dict[source_file]
+
+
+class FileManifest:
+    """Manifest of the Reporting table files read and the values extracted from each file.
+
+    For each file the manifest keeps the size, modification time and SHA-1 of the
+    contents and the results of the read functions (function, country and arguments).
+    On the next run the stored results are used for the files that have not changed,
+    i.e. only new or resubmitted files are read. A file with new modification time
+    but the same contents (e.g. copied again) is not read again. The results are
+    tied also to the source code of the read function and the modules it uses (see
+    source_hash), so after updating them the files are read again.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): manifest file, created if it does not exist
+        """
+        self.path = pathlib.Path(path)
+        self.file_dict = {}
+        if self.path.exists():
+            with open(self.path, 'rb') as f:
+                self.file_dict = pickle.load(f)
+        self.checked_file_set = set()
+        self.reused = 0
+        self.read = 0
+
+    def source_hash(self, func):
+        """SHA-1 of the module of func and the modules it imports, see source_hash"""
+        return source_hash(func)
+
+    def func_key(self, func, country, args):
+        """Key for the results of func(file, country, *args)"""
+        return repr([func.__module__, func.__qualname__, country, args])
+
+    def file_entry(self, file):
+        """The manifest entry of the file, results of the earlier contents are removed"""
+        path = os.path.abspath(file)
+        entry = self.file_dict.get(path)
+        if path in self.checked_file_set:
+            return entry
+        self.checked_file_set.add(path)
+        state = archivefile.file_state(file)
+        if entry is not None and entry['state'] == state:
+            return entry
+        sha1 = file_sha1(file)
+        if entry is None or entry['sha1'] != sha1:
+            entry = {'sha1': sha1, 'results': {}}
+            self.file_dict[path] = entry
+        entry['state'] = state
+        return entry
+
+    def get(self, file, func, country, args):
+        """Return (True,result) if the result of func(file,country,*args) is in the manifest, otherwise (False,None)"""
+        results = self.file_entry(file)['results']
+        key = self.func_key(func, country, args)
+        if key in results:
+            (source_hash, result) = results[key]
+            if source_hash == self.source_hash(func):
+                self.reused = self.reused+1
+                return (True, result)
+        return (False, None)
+
+    def put(self, file, func, country, args, result):
+        """Store the result of func(file,country,*args)"""
+        self.file_entry(file)['results'][self.func_key(func, country, args)] = (self.source_hash(func), result)
+        self.read = self.read+1
+
+    def save(self):
+        """Save the manifest, the files that no longer exist are removed"""
+        self.file_dict = dict((path, entry) for (path, entry) in self.file_dict.items() if archivefile.exists(path))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name+'.'+str(os.getpid())+'.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self.file_dict, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,262 @@
+import pandas as pd
+import numpy as np
+import EUutility
+from labelindex import sheet_label_index
+from notationkey import NotationKeyCodes, split_values
+
+# Table4.Gs1 is read once for each Reporting table file into an array (product, origin, measure)
+# and the HWP results of all files are collected into one array (country, year, product, origin, measure).
+# euco2hwp.py writes the net emissions and euco2hwp_gains_losses.py the gains and losses from the array.
+table4Gs1_sheet = 'Table4.Gs1'
+product_ls = ['Total HWP', 'Solid wood', 'Paper and paperboard', 'Other']
+origin_ls = ['Total', 'Domestic', 'Exported']
+# Name of each product and origin in the long table and the inventory cube, e.g. 'Solid wood (Domestic)'
+category_ls = [product+' ('+origin+')' for product in product_ls for origin in origin_ls]
+measure_ls = ['Gains', 'Losses', 'NetCO2Emissions']
+# Table4.Gs1 column index of each measure (after dropping the empty columns)
+measure_col_ls = [1, 2, 5]
+# Unit of each measure in Table4.Gs1
+measure_unit_ls = ['kt C', 'kt C', 'kt CO2']
+# Table4.Gs1 read options (see EUutility.read_sheet): the default set of missing values includes NA,
+# override the default values and set empty string ('') as the missing value
+table4Gs1_read_options = dict(keep_default_na=False, na_values=[''])
+# Rows in Table4.Gs1: TOTAL HWP (Approach B, domestic and exported together), Total (domestic and exported separately)
+# and the products. The pattern is used if the product name is found in more than the expected number of rows
+table4Gs1_row_ls = ['TOTAL HWP', 'Total', 'Solid wood',
+                    'Paper and paperboard', 'Other']
+patter_ls = [None, None, r'4.G*1*', r'4.G*2*', r'4.G*3*']
+
+# List here countries that have summed exported and domestic to domestic
+country_ls_included_in_domestic = ['ita']
+
+
+def get_row_positions(df, title_col, str_to_contain, num_expected, pat=None):
+    """MOD 2024 Helper function to find the rows that match str_to_contain
+
+    Args:
+        df (pd.DataFrame): Excel file that is read as pandas dataframe
+        title_col (str): column name which includes the titles to search for str_to_contain. title col elements have to be strings.
+        str_to_contain (str): string that the title col row has to contain for data to be extracted
+        num_expected (int): how many rows are expected
+        pat (str): pattern to search for if the str_to_contain returns more rows than
+    Returns:
+        tuple: row positions for df.iloc and True if the rows were found with pat (notation keys are then NaN, see row_values)
+    """
+
+    # Choose only rows that contain the string, see labelindex.py
+    label_index = sheet_label_index(df, title_col)
+    positions = label_index.contains(str_to_contain, case=False)
+    if len(positions) != num_expected:
+        print(
+            f'Warning: got more rows than expected when searching for {str_to_contain}')
+        print('This can happen especially when searching for rows starting with "other"')
+        if pat is not None:
+            print(f'Choosing {num_expected} first values that match pat')
+            positions = label_index.match(pat+rf'{str_to_contain}*')
+            print(pat+rf'{str_to_contain}*')
+            print(label_index.labels(positions))
+            return (positions, True)
+        else:
+            print('No pattern to search for')
+            print(f'Choosing {num_expected} first values')
+            positions = positions[:num_expected]
+    return (positions, False)
+
+
+def row_values(df, positions, value_col, keys_to_nan):
+    """The values of the rows (see get_row_positions) in the column value_col (df.iloc), notation keys NaN if keys_to_nan"""
+    values = df.iloc[positions, value_col].values
+    if keys_to_nan:
+        (values, key_codes) = split_values(values, NotationKeyCodes())
+    return values
+
+
+def remove_rows_startwith(df, title_col, title_starts_with):
+    remove_set = set(sheet_label_index(df, title_col).startswith(title_starts_with))
+    return df.iloc[[i for i in range(df.shape[0]) if i not in remove_set]]
+
+
+def ReadHWPTable(file, country, sheet=table4Gs1_sheet):
+    """Read Table4.Gs1 once from one CRFReporter Reporting table file (excel) and find all HWP values
+       (gains, losses and net emissions) for one inventory year.
+       \param file: Reporting table file
+       \param country: the country of the file
+       \param sheet: the name of the excel sheet to be read
+       \return array (product, origin, measure) of the values, see product_ls, origin_ls and measure_ls.
+               Values not reported are NaN, e.g. domestic and exported if the country reports only TOTAL HWP
+    """
+    print(file)
+    with EUutility.open_workbook(file):
+        # MOD 2026: for some reason EUA has now "Table4.Gs1 " (with trailing whitespace)
+        # find_sheet_name finds the correct sheet name
+        sheet_to_use = EUutility.find_sheet_name(file, sheet)
+        df1 = EUutility.read_sheet(file, sheet_to_use, **table4Gs1_read_options).dropna(
+            axis=1, how='all').dropna(axis=0, how='all')
+    index = list(df1.columns)[0]
+
+    # MOD 2024: remove rows starting with '('. These corresponds to rows that have text explanation of the footnotes
+    # and make selecting rows harder
+    df1 = remove_rows_startwith(df1, index, '(')
+    # The rows are searched once for each layout of the country, see EUutility.sheet_layout
+    layout = EUutility.sheet_layout(file, country, sheet, df1, index, ResolveHWPLayout)
+    return HWPTableValues(df1, layout)
+
+
+def ResolveHWPLayout(df1, country, file):
+    """Find the HWP rows from Table4.Gs1 parsed in ReadHWPTable
+       \param df1: Table4.Gs1 without empty rows and columns and footnote rows
+       \param country: the country of the file
+       \param file: Reporting table file
+       \return layout dictionary: 'cut' the rows used (None for all), 'is_total_hwp' True if only TOTAL HWP is reported,
+                'row_ls' for each product the row positions (see get_row_positions), None if not found
+    """
+    index = list(df1.columns)[0]
+    label_index = sheet_label_index(df1, index)
+    layout = {'cut': None}
+
+    # MOD 2024: countries that have 'TOTAL HWP' report import+exported only, countries that don't have 'TOTAL HWP' report
+    # import and export separately and searching for 'total' substring should return exactly two values first for domestic
+    # and second for exported
+
+    # MOD 2024: First check is there 'TOTAL HWP'
+    is_total_hwp = len(label_index.contains(table4Gs1_row_ls[0])) > 0
+    total_row_name = table4Gs1_row_ls[0]
+
+    if country.lower() in country_ls_included_in_domestic:
+        # Country has summed exported and domestic to domestic. Take only the domestic part
+        # of the array and continue
+        print(
+            f'Country {country} has reported that the domestic and exported hwp are summed in domestic')
+        print('Removing exported part of the table')
+        rows_before_exported = label_index.contains('exported', case=False)
+        layout['cut'] = rows_before_exported[0]
+        df1 = df1.iloc[:rows_before_exported[0], :]
+        is_total_hwp = True  # Set true because there is no TOTAL HWP string
+        total_row_name = 'total'
+
+    if not is_total_hwp:
+        # Country has reported both total and domestic hwp emissions
+        # Searches for rows that include 'total'. Should return two values. First is for domestic HWP and second for exported HWP emissions
+        total_row_name = table4Gs1_row_ls[1]
+    layout['is_total_hwp'] = is_total_hwp
+    # The number of rows for each product: TOTAL HWP only, or domestic and exported
+    nrows = 1 if is_total_hwp else 2
+    total_rows = get_row_positions(df1, index, total_row_name, num_expected=nrows)
+    if len(total_rows[0]) != nrows:
+        # Warn if the country has something else than one TOTAL HWP row or two total rows
+        print(f'{country} - {file}: country has not exactly {nrows} total hwp rows in Table4.Gs1')
+        print('Outputting nan to total, domestic and exported hwp')
+        total_rows = None
+    layout['row_ls'] = [total_rows]
+
+    # MOD 2024: Start collecting detailed emission information
+    # It seems that every country uses Approach B so simply collect the correct rows based on is_total_hwp
+    # Solid wood, Paper and paperboard and Other, each total, domestic and exported
+    for (row_name, pat) in zip(table4Gs1_row_ls[2:5], patter_ls[2:5]):
+        layout['row_ls'].append(get_row_positions(df1, index, row_name, nrows, pat=pat))
+    return layout
+
+
+def HWPTableValues(df1, layout):
+    """The HWP values from the rows found with ResolveHWPLayout
+       \param df1: Table4.Gs1 parsed in ReadHWPTable
+       \param layout: see ResolveHWPLayout
+       \return array (product, origin, measure) of the values, see ReadHWPTable
+    """
+    table = np.full((len(product_ls), len(origin_ls), len(measure_ls)), np.nan, dtype=object)
+    if layout['cut'] is not None:
+        df1 = df1.iloc[:layout['cut'], :]
+    for (product_index, rows) in enumerate(layout['row_ls']):
+        if rows is None:
+            continue
+        (positions, keys_to_nan) = rows
+        for (measure_index, col) in enumerate(measure_col_ls):
+            values = row_values(df1, positions, col, keys_to_nan)
+            if layout['is_total_hwp']:
+                # Country has only one set of information, Total hwp domestic
+                # and total hwp exported are nan
+                table[product_index, 0, measure_index] = values[0]
+            else:
+                table[product_index, :, measure_index] = [np.sum(values), values[0], values[1]]
+    return table
+
+
+def HWPArray(country_table_lss, countryls, start, end):
+    """Collect the HWP values read with ReadHWPTable into one array
+       \param country_table_lss: for each country the list of ReadHWPTable results in year order, None for missing files
+       \param countryls: list of countries
+       \param start: inventory start year
+       \param end: inventory end year
+       \return array (country, year, product, origin, measure), missing files are NaN and missing countries pd.NA
+    """
+    hwp = np.full((len(countryls), end-start+1, len(product_ls), len(origin_ls), len(measure_ls)), np.nan,
+                  dtype=object)
+    for (country_index, (country, table_ls)) in enumerate(zip(countryls, country_table_lss)):
+        if all(table is None for table in table_ls):
+            print("Missing country", country)
+            hwp[country_index] = pd.NA
+            continue
+        for (year_index, table) in enumerate(table_ls):
+            if table is not None:
+                hwp[country_index, year_index] = table
+    return hwp
+
+
+def ReadHWPArray(directory, countryls, sheet, start, end):
+    """Read Table4.Gs1 once from the CRFReporter Reporting table files (excel) for given EU countries
+       for each inventory year and collect all HWP values (see ReadHWPTable).
+       \param directory: directory for the countries (each country is a directory containing excel files)
+       \param countryls: list of (EU) countries
+       \param sheet: the name of the excel sheet to be read
+       \param start: inventory start year
+       \param end: inventory end year
+       \return array (country, year, product, origin, measure), see HWPArray
+    """
+    # Read the files of all countries, see EUutility.year_files for the files
+    # (ascending order 1990,1991,...,2015, years in 1980's excluded)
+    country_table_lss = EUutility.map_country_files(ReadHWPTable, directory, countryls, start, end, sheet)
+    return HWPArray(country_table_lss, countryls, start, end)
+
+
+def AddHWPLongTable(long_table, hwp, countryls, measures, start):
+    """Add the HWP values to the long table (see longtable.py), the category is the product and the origin,
+       e.g. 'Solid wood (Domestic)'
+       \param long_table: longtable.LongTable
+       \param hwp: array (country, year, product, origin, measure), see HWPArray
+       \param countryls: list of countries
+       \param measures: measures in measure_ls to add
+       \param start: inventory start year
+    """
+    measure_index_ls = [measure_ls.index(measure) for measure in measures]
+    unit_ls = [measure_unit_ls[measure_index] for measure_index in measure_index_ls]
+    for (country_index, country) in enumerate(countryls):
+        for year_index in range(hwp.shape[1]):
+            values = hwp[country_index, year_index][:, :, measure_index_ls].reshape(-1, len(measure_index_ls))
+            long_table.add(country, start+year_index, table4Gs1_sheet, category_ls, measures, values, unit_ls)
+
+
+def WriteHWPSheets(writer, hwp, countryls, measures, sheet_name_ls, value_title, start, end):
+    """Create one output excel sheet for each product, origin and measure from the HWP array.
+       The sheets are in the order of product_ls, origin_ls and measures, i.e. the measures of one
+       product and origin are next to each other. Each sheet has one row for each country and inventory year.
+       \param writer: excel writer that collects all Reporting tables into one excel file
+       \param hwp: array (country, year, product, origin, measure), see HWPArray
+       \param countryls: list of countries
+       \param measures: measures in measure_ls to write
+       \param sheet_name_ls: sheet names in the output excel file
+       \param value_title: the title of the value column
+       \param start: inventory start year
+       \param end: inventory end year
+    """
+    measure_index_ls = [measure_ls.index(measure) for measure in measures]
+    sheet_index = 0
+    for product_index in range(len(product_ls)):
+        for origin_index in range(len(origin_ls)):
+            for measure_index in measure_index_ls:
+                data = pd.DataFrame(hwp[:, :, product_index, origin_index, measure_index]).infer_objects()
+                data.index = countryls
+                data.columns = list(range(start, end+1))
+                data = data.transpose().unstack().reset_index().rename(columns={
+                    'level_0': 'country', 'level_1': 'year', 0: value_title})
+                data.to_excel(writer, sheet_name=sheet_name_ls[sheet_index], na_rep='NaN')
+                sheet_index = sheet_index+1
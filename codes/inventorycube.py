@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from notationkey import NotationKeyCodes, split_values
+
+# The dimensions of the cube stored as categorical codes, and the code type of each
+dimension_ls = ['Country', 'Table', 'Row', 'Column']
+dimension_dtype_dict = {'Country': np.uint16, 'Table': np.uint16, 'Row': np.uint16, 'Column': np.uint16}
+
+
+class InventoryCube:
+    """All extracted values in one columnar table (country x year x table x row x column).
+
+    Country, table, row and column are stored as categorical codes, the values as float
+    and the notation keys as a separate uint8 code column (0 for numbers). The cube is
+    saved with numpy (npz) and read back with ReadInventoryCube as pandas DataFrame.
+    """
+
+    def __init__(self):
+        self.category_dict = dict((dimension, {}) for dimension in dimension_ls)
+        self.notation_key_codes = NotationKeyCodes()
+        self.code_ls_dict = dict((dimension, []) for dimension in dimension_ls)
+        self.year_ls = []
+        self.value_ls = []
+        self.key_ls = []
+
+    def code(self, dimension, name):
+        """The categorical code of the name in the dimension, new names get the next code"""
+        category_dict = self.category_dict[dimension]
+        if name not in category_dict:
+            category_dict[name] = len(category_dict)
+        return category_dict[name]
+
+    def add(self, country, year, table, row_ls, column_ls, values):
+        """Add a block of values from one table of one Reporting table file
+
+        Args:
+            country (str): country
+            year (int): inventory year
+            table (str): table (sheet) name, e.g. 'Table4.1'
+            row_ls (list): row names
+            column_ls (list): column names
+            values: array like of shape (len(row_ls),len(column_ls))
+        """
+        values = np.asarray(values, dtype=object).reshape(len(row_ls), len(column_ls))
+        n = values.size
+        self.code_ls_dict['Country'].append(np.full(n, self.code('Country', country)))
+        self.code_ls_dict['Table'].append(np.full(n, self.code('Table', table)))
+        row_codes = [self.code('Row', row) for row in row_ls]
+        column_codes = [self.code('Column', column) for column in column_ls]
+        self.code_ls_dict['Row'].append(np.repeat(row_codes, len(column_ls)))
+        self.code_ls_dict['Column'].append(np.tile(column_codes, len(row_ls)))
+        self.year_ls.append(np.full(n, year))
+        (value_array, key_array) = split_values(values, self.notation_key_codes)
+        self.value_ls.append(value_array.ravel())
+        self.key_ls.append(key_array.ravel())
+
+    def arrays(self):
+        """The cube as dictionary of numpy arrays: codes and category names for each dimension,
+           Year, Value and NotationKey codes and names
+        """
+        array_dict = {}
+        for dimension in dimension_ls:
+            array_dict[dimension] = concatenate(self.code_ls_dict[dimension], dimension_dtype_dict[dimension])
+            array_dict[dimension+'_categories'] = np.array(list(self.category_dict[dimension]), dtype=str)
+        array_dict['Year'] = concatenate(self.year_ls, np.uint16)
+        array_dict['Value'] = concatenate(self.value_ls, np.float64)
+        array_dict['NotationKey'] = concatenate(self.key_ls, np.uint8)
+        array_dict['NotationKey_categories'] = np.array(self.notation_key_codes.key_ls(), dtype=str)
+        return array_dict
+
+    def save(self, file_name):
+        """Save the cube as compressed numpy npz file"""
+        np.savez_compressed(file_name, **self.arrays())
+
+
+def concatenate(array_ls, dtype):
+    """Concatenate the list of arrays as dtype, empty list gives an empty array"""
+    if len(array_ls) == 0:
+        return np.array([], dtype=dtype)
+    return np.concatenate(array_ls).astype(dtype)
+
+
+def ReadInventoryCube(file_name):
+    """
+    Read the inventory cube saved with InventoryCube.save
+    \param file_name The npz file
+    \return DataFrame with columns Country, Year, Table, Row, Column, Value and NotationKey,
+            Country, Table, Row, Column and NotationKey are categorical
+    """
+    with np.load(file_name, allow_pickle=False) as npz:
+        data_dict = {}
+        for dimension in ['Country', 'Year', 'Table', 'Row', 'Column']:
+            if dimension == 'Year':
+                data_dict[dimension] = npz['Year']
+            else:
+                data_dict[dimension] = pd.Categorical.from_codes(npz[dimension].astype(np.int32),
+                                                                 categories=npz[dimension+'_categories'])
+        data_dict['Value'] = npz['Value']
+        data_dict['NotationKey'] = pd.Categorical.from_codes(npz['NotationKey'].astype(np.int32),
+                                                             categories=npz['NotationKey_categories'])
+    return pd.DataFrame(data_dict)
@@ -0,0 +1,221 @@
+import os
+import time
+import sqlite3
+import argparse
+import numpy as np
+import pandas as pd
+import longtable
+from inventorycube import ReadInventoryCube
+
+# Normalized schema: the names are stored once, the values refer to them by id. The index
+# (table, country, year, category) answers the queries of one table and category in milliseconds
+schema_sql = """
+CREATE TABLE inventory_table (table_id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE country (country_id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE category (category_id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE measure (measure_id INTEGER PRIMARY KEY, name TEXT NOT NULL, unit TEXT NOT NULL, UNIQUE (name, unit));
+CREATE TABLE notation_key (notation_key_id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE inventory_value (
+    table_id INTEGER NOT NULL REFERENCES inventory_table,
+    country_id INTEGER NOT NULL REFERENCES country,
+    year INTEGER NOT NULL,
+    category_id INTEGER NOT NULL REFERENCES category,
+    measure_id INTEGER NOT NULL REFERENCES measure,
+    value REAL,
+    notation_key_id INTEGER REFERENCES notation_key
+);
+CREATE VIEW inventory AS
+SELECT c.name AS country, v.year AS year, t.name AS "table", g.name AS category, m.name AS measure,
+       m.unit AS unit, v.value AS value, k.name AS notation_key
+FROM inventory_value v
+JOIN inventory_table t USING (table_id)
+JOIN country c USING (country_id)
+JOIN category g USING (category_id)
+JOIN measure m USING (measure_id)
+LEFT JOIN notation_key k USING (notation_key_id);
+"""
+# Rows inserted with one executemany call, all in the same transaction
+insert_batch_size = 100000
+# Created after the bulk insert, faster than updating the index for each row
+index_sql = """
+CREATE INDEX inventory_value_index ON inventory_value (table_id, country_id, year, category_id);
+"""
+
+
+def name_codes(column):
+    """The codes (from 1, 0 for missing) and the names of the column of the long table (also categorical)"""
+    (codes, names) = pd.factorize(column, use_na_sentinel=True)
+    return (codes+1, list(names))
+
+
+def SaveInventoryDB(file_name, df):
+    """
+    Save the long table into a new SQLite database (see schema_sql), an existing file is replaced.
+    The values are inserted in bulk in one transaction.
+    \param file_name The database file, e.g. amissing_all_products.sqlite
+    \param df The long table as DataFrame (see longtable.long_column_ls)
+    """
+    if os.path.exists(file_name):
+        os.remove(file_name)
+    connection = sqlite3.connect(file_name)
+    try:
+        # The file is written once from scratch, no journal needed
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+        connection.executescript(schema_sql)
+        with connection:
+            code_dict = {}
+            for (column, table) in [('table', 'inventory_table'), ('country', 'country'), ('category', 'category'),
+                                    ('notation_key', 'notation_key')]:
+                (code_dict[column], name_ls) = name_codes(df[column])
+                connection.executemany('INSERT INTO '+table+' VALUES (?, ?)',
+                                       [(code, str(name)) for (code, name) in enumerate(name_ls, 1)])
+            # A measure is the pair of name and unit, missing unit is ''
+            (name_code_array, name_ls) = name_codes(df['measure'])
+            (unit_code_array, unit_ls) = name_codes(df['unit'])
+            unit_ls = ['']+[str(unit) for unit in unit_ls]
+            (measure_codes, pair_ls) = name_codes(name_code_array*len(unit_ls)+unit_code_array)
+            connection.executemany('INSERT INTO measure VALUES (?, ?, ?)',
+                                   [(code, str(name_ls[pair//len(unit_ls)-1]), unit_ls[pair % len(unit_ls)])
+                                    for (code, pair) in enumerate(pair_ls, 1)])
+            value_array = df['value'].to_numpy(dtype=np.float64)
+            year_array = df['year'].to_numpy(dtype=np.int64)
+            # The rows are converted to python values in batches to keep the memory flat
+            for first in range(0, len(df), insert_batch_size):
+                rows = slice(first, first+insert_batch_size)
+                # NULL for the missing values and notation keys, and for no notation key
+                value_ls = np.where(np.isnan(value_array[rows]), None, value_array[rows].astype(object))
+                key_ls = np.where(code_dict['notation_key'][rows] == 0, None, code_dict['notation_key'][rows].astype(object))
+                connection.executemany('INSERT INTO inventory_value VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                       zip(code_dict['table'][rows].tolist(), code_dict['country'][rows].tolist(),
+                                           year_array[rows].tolist(), code_dict['category'][rows].tolist(),
+                                           measure_codes[rows].tolist(), value_ls.tolist(), key_ls.tolist()))
+            connection.executescript(index_sql)
+        connection.execute('ANALYZE')
+    finally:
+        connection.close()
+
+
+def CubeLongFrame(cube_file):
+    """
+    Read the inventory cube (see inventorycube.py) as long table. The cube has no units, the measure
+    is the column name as in the cube, e.g. 'TotalArea(kha)' or 'FL(manag.)'
+    \param cube_file The npz file
+    \return DataFrame with the columns of longtable.long_column_ls
+    """
+    cube = ReadInventoryCube(cube_file)
+    return pd.DataFrame({'country': cube['Country'], 'year': cube['Year'].astype(np.int32), 'table': cube['Table'],
+                         'category': cube['Row'], 'measure': cube['Column'], 'unit': '',
+                         'value': cube['Value'],
+                         # '' is a number, no notation key
+                         'notation_key': cube['NotationKey'].astype(object).replace('', np.nan)})[longtable.long_column_ls]
+
+
+def LongFrame(file_name):
+    """
+    Read a long table (.parquet, .feather or .csv, see longtable.py) or an inventory cube (.npz)
+    \param file_name The file
+    \return DataFrame with the columns of longtable.long_column_ls
+    """
+    if file_name.lower().endswith('.npz'):
+        return CubeLongFrame(file_name)
+    if file_name.lower().endswith('.parquet'):
+        return pd.read_parquet(file_name)
+    if file_name.lower().endswith('.feather'):
+        return pd.read_feather(file_name)
+    return pd.read_csv(file_name, keep_default_na=False, na_values=[''])
+
+
+def QueryInventoryDB(file_name, table=None, category=None, measure=None, countryls=None, start=None, end=None):
+    """
+    Query the values from the SQLite database, the names can be SQL LIKE patterns (e.g. '%(Exported)')
+    \param file_name The database file
+    \param table Table (sheet) name, e.g. 'Table4.1'
+    \param category Category (row) name, e.g. 'CL'
+    \param measure Measure (column) name, e.g. 'FL(manag.)'
+    \param countryls List of countries
+    \param start First year
+    \param end Last year
+    \return DataFrame with the columns of longtable.long_column_ls
+    """
+    condition_ls = []
+    parameter_ls = []
+    for (column, pattern) in [('"table"', table), ('category', category), ('measure', measure)]:
+        if pattern is not None:
+            condition_ls.append(column+' LIKE ?')
+            parameter_ls.append(pattern)
+    if countryls is not None:
+        condition_ls.append('country IN ('+', '.join(['?']*len(countryls))+')')
+        parameter_ls.extend(countryls)
+    if start is not None:
+        condition_ls.append('year >= ?')
+        parameter_ls.append(start)
+    if end is not None:
+        condition_ls.append('year <= ?')
+        parameter_ls.append(end)
+    sql = 'SELECT * FROM inventory'
+    if len(condition_ls) > 0:
+        sql = sql+' WHERE '+' AND '.join(condition_ls)
+    connection = sqlite3.connect(file_name)
+    try:
+        return pd.read_sql_query(sql, connection, params=parameter_ls)
+    finally:
+        connection.close()
+
+
+def ReportingParties(df):
+    """
+    The countries reporting numbers (not only notation keys or missing values) in the query result
+    \param df The result of QueryInventoryDB
+    \return DataFrame with the number of values reported, the first and the last year for each country
+    """
+    reported_df = df[df['value'].notna()]
+    return reported_df.groupby('country').agg(values=('value', 'size'), first_year=('year', 'min'),
+                                              last_year=('year', 'max'))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite store of all values read: load a long table or inventory cube, query it")
+    parser.add_argument("db", help="SQLite database file (.sqlite or .db, see longtable.db_format_ls)")
+    parser.add_argument("--load", dest="load", default=None,
+                        help="Create the database from the long table (.parquet, .feather, .csv, see longtable.py) or inventory cube (.npz)")
+    parser.add_argument("-t", "--table", dest="table", default=None,
+                        help="Table (sheet) name, e.g. Table4.1, SQL LIKE patterns allowed as in all names (e.g. Table4._)")
+    parser.add_argument("--category", dest="category", default=None,
+                        help="Category (row), e.g. CL or '%%(Exported)'")
+    parser.add_argument("--measure", dest="measure", default=None,
+                        help="Measure (column), e.g. 'FL(manag.)'")
+    parser.add_argument("-c", "--countries", dest="country", type=str, nargs='+', default=None,
+                        help="List of countries from the official acronyms separated by spaces")
+    parser.add_argument("-s", "--start", type=int, dest="start", default=None, help="First year")
+    parser.add_argument("-e", "--end", type=int, dest="end", default=None, help="Last year")
+    output_group = parser.add_mutually_exclusive_group()
+    output_group.add_argument("--pivot", action="store_true", dest="pivot", default=False,
+                              help="Print the values with a row for each country and a column for each year")
+    output_group.add_argument("--parties", action="store_true", dest="parties", default=False,
+                              help="Print only the countries reporting numbers and the years reported")
+    output_group.add_argument("--sql", dest="sql", default=None,
+                              help="Run this SQL query instead, e.g. on the view inventory")
+    args = parser.parse_args()
+    if args.load is not None:
+        print("Reading:", args.load)
+        df = LongFrame(args.load)
+        print("Writing", len(df), "values to:", args.db)
+        SaveInventoryDB(args.db, df)
+    if args.load is None or any([args.table, args.category, args.measure, args.country, args.sql]):
+        query_start = time.perf_counter()
+        if args.sql is not None:
+            connection = sqlite3.connect(args.db)
+            df = pd.read_sql_query(args.sql, connection)
+            connection.close()
+        else:
+            df = QueryInventoryDB(args.db, args.table, args.category, args.measure, args.country, args.start, args.end)
+        query_time = time.perf_counter()-query_start
+        if args.parties:
+            df = ReportingParties(df)
+        elif args.pivot:
+            df = df.pivot_table(index=['table', 'category', 'measure', 'country'], columns='year', values='value',
+                                aggfunc='first', dropna=False, observed=True)
+        with pd.option_context('display.max_rows', None, 'display.max_columns', None, 'display.width', 250):
+            print(df.to_string())
+        print(len(df), "rows,", round(query_time*1000, 1), "ms")
@@ -0,0 +1,80 @@
+import re
+import fnmatch
+import functools
+
+# Maximum number of different label columns (sheet layouts) kept in label_index
+label_index_cache_size = 256
+
+
+class LabelIndex:
+    """Index of the row labels (title column) of one parsed Reporting table sheet.
+
+    The labels are indexed once to their row positions. A lookup (substring or regular
+    expression as in pandas str.contains, fnmatch pattern or prefix) is resolved once
+    against the distinct labels and then kept, so the same lookup again, e.g. for each
+    value column or for the same layout in the next inventory year (see label_index),
+    is a dictionary hit instead of a scan of the title column.
+    """
+
+    def __init__(self, label_tuple):
+        """
+        Args:
+            label_tuple (tuple): the labels in row order, None for empty and non-text cells
+        """
+        self.label_ls = list(label_tuple)
+        self.position_dict = {}
+        for (position, label) in enumerate(label_tuple):
+            if label is not None:
+                self.position_dict.setdefault(label, []).append(position)
+        self.lookup_dict = {}
+
+    def lookup(self, key, match):
+        """Row positions (ascending) of the labels for which match(label) is true, cached by key"""
+        if key not in self.lookup_dict:
+            self.lookup_dict[key] = sorted(position for (label, position_ls) in self.position_dict.items()
+                                           if match(label) for position in position_ls)
+        return self.lookup_dict[key]
+
+    def contains(self, pattern, case=True):
+        """Row positions of the labels containing the regular expression, as str.contains(pattern)
+
+        Args:
+            pattern (str): regular expression, e.g. 'Wetlands \\(managed'
+            case (bool): False to compare lower case labels and pattern, as str.lower().str.contains(pattern.lower())
+        """
+        if case:
+            return self.lookup(('contains', pattern), lambda label: re.search(pattern, label) is not None)
+        pattern = pattern.lower()
+        return self.lookup(('icontains', pattern), lambda label: re.search(pattern, label.lower()) is not None)
+
+    def match(self, pattern):
+        """Row positions of the labels matching the fnmatch pattern, e.g. '4.G*1*Solid wood*'"""
+        return self.lookup(('match', pattern), lambda label: fnmatch.fnmatch(label, pattern))
+
+    def startswith(self, prefix):
+        """Row positions of the labels starting with the prefix after stripping whitespace and in lower case"""
+        return self.lookup(('startswith', prefix), lambda label: label.strip().lower().startswith(prefix))
+
+    def labels(self, position_ls):
+        """The labels in the row positions"""
+        return [self.label_ls[position] for position in position_ls]
+
+
+@functools.lru_cache(maxsize=label_index_cache_size)
+def label_index(label_tuple):
+    """The LabelIndex of the labels, the same labels (e.g. the same layout every year) share one index
+
+    Args:
+        label_tuple (tuple): the labels in row order, None for empty and non-text cells
+    """
+    return LabelIndex(label_tuple)
+
+
+def sheet_label_index(df, column):
+    """The LabelIndex of the title column of the parsed sheet
+
+    Args:
+        df (pd.DataFrame): parsed sheet
+        column: the title column name
+    """
+    return label_index(tuple(label if isinstance(label, str) else None for label in df[column]))
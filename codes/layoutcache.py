@@ -0,0 +1,159 @@
+import os
+import pathlib
+import hashlib
+import pickle
+import argparse
+import archivefile
+from filemanifest import source_hash
+from fileindex import parse_file_name
+
+
+def layout_fingerprint(df, column):
+    """SHA-1 of the column names and the row labels of the parsed sheet
+
+    The rows and columns found in a sheet depend only on these, so the same fingerprint
+    means the same positions.
+
+    Args:
+        df (pd.DataFrame): parsed sheet
+        column: the title column name
+    """
+    label_ls = [label if isinstance(label, str) else None for label in df[column]]
+    return hashlib.sha1(repr((list(map(str, df.columns)), label_ls)).encode('utf-8')).hexdigest()
+
+
+class LayoutCache:
+    """Persistent cache of the row and column positions found in the Reporting table sheets of each country.
+
+    The positions (layout) found from the first file of a country are stored under the
+    fingerprint of the sheet (see layout_fingerprint). The files of the other years with
+    the same fingerprint use the stored positions directly, only a changed layout is
+    searched again. The fingerprint of each country, sheet and inventory year is kept so
+    that the years and the resubmissions where the layout changes can be reported.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): cache file, created if it does not exist
+        """
+        self.path = pathlib.Path(path)
+        self.layout_dict = {}
+        self.year_dict = {}
+        self.drift_ls = []
+        if self.path.exists():
+            with open(self.path, 'rb') as f:
+                (self.layout_dict, self.year_dict, self.drift_ls) = pickle.load(f)
+        self.update_ls = []
+        self.observation_ls = []
+        self.hits = 0
+        self.misses = 0
+
+    def source_hash(self, resolve):
+        """SHA-1 of the sources (see filemanifest.source_hash), layouts of earlier versions are not used
+
+        The positions depend on the resolve function and on the label matching of labelindex.py,
+        so the module of resolve and the modules it imports are hashed as for the manifest.
+        """
+        return source_hash(resolve)
+
+    def observe(self, country, sheet, file, fingerprint):
+        """Keep the fingerprint of the file, recorded in record_observations"""
+        info = parse_file_name(file)
+        if info is not None:
+            self.observation_ls.append((country, sheet, info['year'], archivefile.file_name(file), fingerprint))
+
+    def record_observations(self):
+        """Record the fingerprints of the files read, a resubmission with a different layout is a drift"""
+        for (country, sheet, year, file_name, fingerprint) in sorted(set(self.observation_ls)):
+            year_dict = self.year_dict.setdefault((country, sheet), {})
+            previous = year_dict.get(year)
+            if previous is not None and previous[0] != file_name and previous[1] != fingerprint:
+                print("Layout changed", country, sheet, year, previous[0], "->", file_name)
+                self.drift_ls.append((country, sheet, year, previous[0], file_name))
+            year_dict[year] = (file_name, fingerprint)
+        self.observation_ls = []
+
+    def layout(self, file, country, sheet, df, column, resolve):
+        """The layout of the sheet, resolve(df, country, file) only if the layout is not in the cache
+
+        Args:
+            file (str): Reporting table file
+            country (str): the country of the file
+            sheet (str): sheet name
+            df (pd.DataFrame): parsed sheet
+            column: the title column name (see layout_fingerprint)
+            resolve: function (at module level) that finds the positions from df
+        """
+        fingerprint = layout_fingerprint(df, column)
+        self.observe(country, sheet, file, fingerprint)
+        key = (country, sheet, resolve.__module__+'.'+resolve.__qualname__, fingerprint)
+        source_hash = self.source_hash(resolve)
+        entry = self.layout_dict.get(key)
+        if entry is not None and entry[0] == source_hash:
+            self.hits = self.hits+1
+            return entry[1]
+        self.misses = self.misses+1
+        layout = resolve(df, country, file)
+        self.layout_dict[key] = (source_hash, layout)
+        self.update_ls.append((key, (source_hash, layout)))
+        return layout
+
+    def take_updates(self):
+        """The layouts and fingerprints found since the last call (in a process pool worker)"""
+        updates = (self.update_ls, self.observation_ls, self.hits, self.misses)
+        self.update_ls = []
+        self.observation_ls = []
+        self.hits = 0
+        self.misses = 0
+        return updates
+
+    def merge(self, updates):
+        """Merge the updates of a process pool worker (see take_updates)"""
+        (update_ls, observation_ls, hits, misses) = updates
+        for (key, entry) in update_ls:
+            self.layout_dict[key] = entry
+        self.observation_ls.extend(observation_ls)
+        self.hits = self.hits+hits
+        self.misses = self.misses+misses
+
+    def year_drift(self):
+        """List of (country, sheet, year) where the layout differs from the previous inventory year"""
+        drift_ls = []
+        for ((country, sheet), year_dict) in sorted(self.year_dict.items()):
+            year_ls = sorted(year_dict)
+            for (previous_year, year) in zip(year_ls, year_ls[1:]):
+                if year_dict[previous_year][1] != year_dict[year][1]:
+                    drift_ls.append((country, sheet, year))
+        return drift_ls
+
+    def print_report(self):
+        """Print the layout cache use and the years where the layout changes"""
+        self.record_observations()
+        print("Layout cache:", self.hits, "layouts from cache,", self.misses, "searched", self.path)
+        for (country, sheet, year) in self.year_drift():
+            print("Layout drift", country, sheet, year-1, "->", year)
+
+    def save(self):
+        """Save the cache atomically"""
+        self.record_observations()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name+'.'+str(os.getpid())+'.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((self.layout_dict, self.year_dict, self.drift_ls), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List the layout changes in the sheets of the Reporting table files")
+    parser.add_argument("layoutcache", help="Layout cache file (see --layoutcache in the python scripts)")
+    args = parser.parse_args()
+    cache = LayoutCache(args.layoutcache)
+    print("Layouts:", len(cache.layout_dict))
+    for ((country, sheet), year_dict) in sorted(cache.year_dict.items()):
+        print(country, sheet, "years", min(year_dict), "-", max(year_dict), "layouts",
+              len(set(fingerprint for (file_name, fingerprint) in year_dict.values())))
+    for (country, sheet, year) in cache.year_drift():
+        print("Layout drift between years", country, sheet, year-1, "->", year)
+    for (country, sheet, year, previous_file, file_name) in cache.drift_ls:
+        print("Layout drift between submissions", country, sheet, year, previous_file, "->", file_name)
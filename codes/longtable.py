@@ -0,0 +1,104 @@
+import pathlib
+import numpy as np
+import pandas as pd
+from inventorycube import InventoryCube, concatenate
+
+# Columns of the long table, one row for each value
+long_column_ls = ['country', 'year', 'table', 'category', 'measure', 'unit', 'value', 'notation_key']
+# The SQLite inventory store, see inventorydb.py
+db_format_ls = ['.sqlite', '.db']
+# Output formats by file extension. Parquet and Feather require pyarrow
+long_format_ls = ['.parquet', '.feather', '.csv']+db_format_ls
+
+
+def check_long_file(file_name):
+    """Check the long table output file before the Reporting tables are read
+
+    Args:
+        file_name (str): output file, .parquet, .feather, .csv, .sqlite or .db
+    """
+    suffix = pathlib.Path(file_name).suffix.lower()
+    if suffix not in long_format_ls:
+        raise ValueError("Unknown long table format "+str(file_name)+", use one of "+str(long_format_ls))
+    if suffix in ['.parquet', '.feather']:
+        try:
+            # Only checks that the package is installed before the Reporting tables are read, pandas imports it when saving
+            import pyarrow
+        except ImportError:
+            raise ImportError("Parquet and Feather output requires pyarrow: pip install pyarrow")
+
+
+class LongTable(InventoryCube):
+    """All extracted values as a tidy long table for analysis, e.g. in R with arrow::read_parquet.
+
+    One row for each value: country, year, table (sheet), category (row), measure (column),
+    unit, the value as float and the notation key (NO, NA, IE, NE etc.). Missing values and
+    notation keys are real missing values (NaN), not 'NaN' strings as in the Excel output
+    files. The values are collected as in the inventory cube (inventorycube.py) with the unit
+    of each measure as an additional dimension.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.category_dict['Unit'] = {}
+        self.code_ls_dict['Unit'] = []
+
+    def add(self, country, year, table, row_ls, column_ls, values, unit_ls):
+        """Add a block of values from one table of one Reporting table file
+
+        Args:
+            country (str): country
+            year (int): inventory year
+            table (str): table (sheet) name, e.g. 'Table4.1'
+            row_ls (list): row names (category)
+            column_ls (list): column names (measure)
+            values: array like of shape (len(row_ls),len(column_ls))
+            unit_ls (list): the unit of each column
+        """
+        super().add(country, year, table, row_ls, column_ls, values)
+        unit_codes = [self.code('Unit', unit) for unit in unit_ls]
+        self.code_ls_dict['Unit'].append(np.tile(unit_codes, len(row_ls)))
+
+    def frame(self):
+        """The long table as DataFrame (see long_column_ls), text columns are categorical"""
+        array_dict = self.arrays()
+        data_dict = {}
+        for (column, dimension) in [('country', 'Country'), ('table', 'Table'), ('category', 'Row'), ('measure', 'Column')]:
+            data_dict[column] = pd.Categorical.from_codes(array_dict[dimension].astype(np.int32),
+                                                          categories=array_dict[dimension+'_categories'])
+        data_dict['year'] = array_dict['Year'].astype(np.int32)
+        data_dict['unit'] = pd.Categorical.from_codes(concatenate(self.code_ls_dict['Unit'], np.int32),
+                                                      categories=list(self.category_dict['Unit']))
+        data_dict['value'] = array_dict['Value']
+        # Code 0 (a number) is a missing notation key
+        data_dict['notation_key'] = pd.Categorical.from_codes(array_dict['NotationKey'].astype(np.int32)-1,
+                                                              categories=array_dict['NotationKey_categories'][1:])
+        return pd.DataFrame(data_dict)[long_column_ls]
+
+    def save(self, file_name):
+        """Save the long table as Parquet, Feather, CSV or SQLite file by the file extension (see check_long_file)
+
+        In CSV the missing values are empty fields and the notation key NA is 'NA': read it with only ''
+        as missing value, e.g. read.csv(file, na.strings="") in R or pd.read_csv(file, keep_default_na=False,
+        na_values=['']), otherwise the notation key NA is read as missing (see inventorydb.LongFrame).
+        """
+        check_long_file(file_name)
+        df = self.frame()
+        suffix = pathlib.Path(file_name).suffix.lower()
+        if suffix == '.parquet':
+            df.to_parquet(file_name, index=False)
+        elif suffix == '.feather':
+            df.to_feather(file_name)
+        elif suffix in db_format_ls:
+            import inventorydb
+            inventorydb.SaveInventoryDB(file_name, df)
+        else:
+            df.to_csv(file_name, index=False, na_rep='')
+
+
+def unit_of(column):
+    """Split column name with the unit in parentheses, e.g. 'TotalArea(kha)' -> ('TotalArea','kha')"""
+    if column.endswith(')') and '(' in column:
+        (name, unit) = column[:-1].rsplit('(', 1)
+        return (name, unit)
+    return (column, '')
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+# Notation key code 0: the value is a number (or empty, i.e. NaN)
+no_notation_key = ''
+# The notation keys of the Reporting tables have the codes 1-4, other notation keys
+# and combinations (e.g. 'NO,NA' or 'C') get the next codes when first seen
+notation_key_ls = ['NO', 'NA', 'IE', 'NE']
+# The notation keys recognized in the cells of any table, C is confidential
+notation_key_token_ls = notation_key_ls+['C']
+
+
+class NotationKeyCodes:
+    """The uint8 codes of the notation keys, at most 256 different notation keys.
+
+    The codes of the keys other than notation_key_ls depend on the order they are first
+    seen: create one for each run (e.g. for each output) and decode the codes with it.
+    """
+
+    def __init__(self):
+        self.code_dict = dict((key, code) for (code, key) in enumerate([no_notation_key]+notation_key_ls))
+
+    def code(self, key):
+        """The code of the notation key, new notation keys get the next code"""
+        if key not in self.code_dict:
+            if len(self.code_dict) > np.iinfo(np.uint8).max:
+                raise ValueError("Too many different notation keys: "+key)
+            self.code_dict[key] = len(self.code_dict)
+        return self.code_dict[key]
+
+    def key_ls(self):
+        """The notation keys in the code order, i.e. key_ls()[code]"""
+        return list(self.code_dict)
+
+
+def is_notation_key(text):
+    """True if the text is a notation key or a combination of them, e.g. 'NO', 'NO,NA' or 'C'"""
+    token_ls = [token.strip() for token in text.split(',')]
+    return all(token in notation_key_token_ls for token in token_ls)
+
+
+def split_values(values, key_codes):
+    """Split a block of values read from a Reporting table into float values and notation key codes
+
+    The numbers of the whole block are converted at once (as pd.to_numeric), the notation
+    keys are coded once for each different text in the cells that are not numbers. Other
+    texts (e.g. 'MISSING_VALUE', '-1.#IND' or labels) are not notation keys (see is_notation_key)
+    but missing values.
+
+    Args:
+        values: array like of numbers, notation keys (e.g. 'NO', 'NA', 'IE', 'NE', 'NO,NA') and missing values
+        key_codes (NotationKeyCodes): the notation key codes of the run, decode the codes with the same object
+    Returns:
+        tuple: (float64 array, uint8 array) of the shape of values, notation keys are NaN with a code
+               other than 0, numbers, missing values and other texts have the code 0
+    """
+    value_array = np.asarray(values, dtype=object)
+    cell_array = value_array.ravel()
+    number_array = pd.to_numeric(pd.Series(cell_array, dtype=object), errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    code_array = np.zeros(cell_array.shape, dtype=np.uint8)
+    key_index = np.flatnonzero(np.isnan(number_array))
+    if len(key_index) > 0:
+        # Missing values (None, NaN) get the index -1, i.e. the last code 0
+        (index_array, unique_ls) = pd.factorize(cell_array[key_index])
+        code_lookup = np.array([key_codes.code(str(key).strip()) if is_notation_key(str(key)) else 0
+                                for key in unique_ls]+[0], dtype=np.uint8)
+        code_array[key_index] = code_lookup[index_array]
+    return (number_array.reshape(value_array.shape), code_array.reshape(value_array.shape))
@@ -0,0 +1,88 @@
+import collections
+import concurrent.futures
+import archivefile
+
+# Default number of Reporting table files read ahead into memory, see Prefetcher
+default_prefetch = 4
+# Reader threads of the Prefetcher, at most
+max_reader_threads = 2
+
+
+def ordered_map(executor, func, arg_iter, depth):
+    """func(*args) for the args in the executor, the results yielded in the order of arg_iter
+
+    At most depth tasks are submitted ahead of the result yielded: a slow consumer
+    stops the producers (backpressure), so at most depth results wait in memory
+    however many tasks there are.
+
+    Args:
+        executor: concurrent.futures executor (threads or processes)
+        func: task function, at module level for a process pool
+        arg_iter: iterable of argument tuples, consumed only as far as needed
+        depth (int): maximum number of tasks in the executor, at least 1
+    """
+    pending = collections.deque()
+    for args in arg_iter:
+        if len(pending) >= max(1, depth):
+            yield pending.popleft().result()
+        pending.append(executor.submit(func, *args))
+    while len(pending) > 0:
+        yield pending.popleft().result()
+
+
+class Prefetcher:
+    """Reader threads that read the next Reporting table files into memory while the current one is parsed.
+
+    Disk reads and zip decompression (archivefile.read_bytes) release the GIL, so they
+    overlap with the parsing in the main thread. The files are read at most depth files
+    ahead of the file parsed, which keeps the memory flat also on runs of all countries.
+    """
+
+    def __init__(self, depth):
+        """
+        Args:
+            depth (int): number of files read ahead, 0 reads each file only when parsed
+        """
+        self.depth = depth
+        self.executor = None
+        if depth > 0:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(depth, max_reader_threads),
+                                                                  thread_name_prefix='prefetch')
+
+    def contents(self, file_iter, skip=None):
+        """Yield (file, contents) for the files in order, contents None if not read ahead (depth 0)
+
+        Args:
+            file_iter: iterable of Reporting table files
+            skip: function skip(file), True if the file is not needed (e.g. all its sheets are in
+                the sheet cache), the file is not read and its contents is None
+        """
+        if self.executor is None:
+            for file in file_iter:
+                yield (file, None)
+            return
+        # The files submitted and not yet yielded, in the order of the results
+        file_queue = collections.deque()
+        for contents in ordered_map(self.executor, read_needed, submit_files(file_iter, file_queue, skip),
+                                    self.depth):
+            yield (file_queue.popleft(), contents)
+
+    def close(self):
+        """Stop the reader threads"""
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+
+def read_needed(file, skip):
+    """The contents of the file (archivefile.read_bytes), None if skip(file)"""
+    if skip is not None and skip(file):
+        return None
+    return archivefile.read_bytes(file)
+
+
+def submit_files(file_iter, file_queue, skip=None):
+    """The argument tuples of read_needed, each file is queued to file_queue when submitted"""
+    for file in file_iter:
+        file_queue.append(file)
+        yield (file, skip)
@@ -0,0 +1,206 @@
+import sys
+import time
+import json
+import cProfile
+import contextlib
+import tracemalloc
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak memory is not reported
+    resource = None
+
+# Run report of the stages (open, parse, extract, write etc.), see start
+run_report = None
+# Profiler of the main process, see start
+profiler = None
+
+
+def peak_rss_mb():
+    """Peak resident memory of the process in MB, None if not available"""
+    if resource is None:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    if sys.platform == 'darwin':
+        return maxrss/(1024*1024)
+    return maxrss/1024
+
+
+def merge_stats(stats_dict, name, stats):
+    """Add the stats of a stage to the stats of the stage with the same name in stats_dict"""
+    if name not in stats_dict:
+        stats_dict[name] = {'count': 0, 'time': 0.0, 'self_time': 0.0, 'peak_rss_mb': None, 'peak_traced_mb': None}
+    total = stats_dict[name]
+    total['count'] = total['count']+stats['count']
+    total['time'] = total['time']+stats['time']
+    total['self_time'] = total['self_time']+stats['self_time']
+    for key in ['peak_rss_mb', 'peak_traced_mb']:
+        if stats[key] is not None:
+            total[key] = stats[key] if total[key] is None else max(total[key], stats[key])
+
+
+class RunReport:
+    """Wall time, call count and peak memory of each stage and each (country, file).
+
+    A stage is timed with the stage context manager. The time of a stage includes the
+    stages nested in it, the self time excludes them, e.g. the self time of 'extract'
+    is the time used in finding the rows and values after the sheet has been parsed.
+    The stages within the 'extract' stage of a Reporting table file are reported also
+    for the file. Peak memory is the peak resident memory of the process at the end of
+    the stage, and with trace_memory the peak of the memory allocated during the stage
+    (tracemalloc, makes the run slower).
+    """
+
+    def __init__(self, trace_memory=False):
+        """
+        Args:
+            trace_memory (bool): trace memory allocations with tracemalloc
+        """
+        self.start_time = time.time()
+        self.t0 = time.perf_counter()
+        self.trace_memory = trace_memory
+        self.stage_dict = {}
+        self.file_dict = {}
+        self.stack = []
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def begin(self, name, country, file):
+        """Start the stage"""
+        if self.trace_memory:
+            # The peak of the outer stage until now, the peak is then reset for this stage
+            if self.stack:
+                self.stack[-1]['traced_peak'] = max(self.stack[-1]['traced_peak'], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self.stack.append({'name': name, 'country': country, 'file': file, 't0': time.perf_counter(),
+                           'nested_time': 0.0, 'traced_peak': 0})
+
+    def end(self):
+        """End the latest stage and record its stats"""
+        entry = self.stack.pop()
+        elapsed = time.perf_counter()-entry['t0']
+        traced_peak = None
+        if self.trace_memory:
+            traced_peak = max(entry['traced_peak'], tracemalloc.get_traced_memory()[1])
+            if self.stack:
+                self.stack[-1]['traced_peak'] = max(self.stack[-1]['traced_peak'], traced_peak)
+            traced_peak = traced_peak/(1024*1024)
+        if self.stack:
+            self.stack[-1]['nested_time'] = self.stack[-1]['nested_time']+elapsed
+        stats = {'count': 1, 'time': elapsed, 'self_time': elapsed-entry['nested_time'],
+                 'peak_rss_mb': peak_rss_mb(), 'peak_traced_mb': traced_peak}
+        merge_stats(self.stage_dict, entry['name'], stats)
+        # The file of this stage or of the enclosing stage
+        for file_entry in [entry]+self.stack[::-1]:
+            if file_entry['file'] is not None:
+                key = (file_entry['country'], file_entry['file'])
+                if key not in self.file_dict:
+                    self.file_dict[key] = {}
+                merge_stats(self.file_dict[key], entry['name'], stats)
+                break
+
+    def records(self):
+        """The stats of the stages and files (to merge into the report of another process)"""
+        return {'stages': self.stage_dict, 'files': self.file_dict}
+
+    def merge(self, records):
+        """Merge the records of a process pool worker"""
+        for (name, stats) in records['stages'].items():
+            merge_stats(self.stage_dict, name, stats)
+        for (key, stage_dict) in records['files'].items():
+            if key not in self.file_dict:
+                self.file_dict[key] = {}
+            for (name, stats) in stage_dict.items():
+                merge_stats(self.file_dict[key], name, stats)
+
+    def report(self):
+        """The run report as dictionary, stages and files in descending time order"""
+        stage_ls = sorted(self.stage_dict.items(), key=lambda item: -item[1]['time'])
+        file_ls = []
+        for ((country, file), stage_dict) in self.file_dict.items():
+            file_time = stage_dict['extract']['time'] if 'extract' in stage_dict else 0.0
+            file_ls.append({'country': country, 'file': file, 'time': file_time, 'stages': stage_dict})
+        file_ls.sort(key=lambda file_stats: -file_stats['time'])
+        return {'command': sys.argv,
+                'start_time': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.start_time)),
+                'wall_time': time.perf_counter()-self.t0,
+                'peak_rss_mb': peak_rss_mb(),
+                'stages': dict(stage_ls),
+                'files': file_ls}
+
+    def write(self, file_name):
+        """Write the run report as JSON file"""
+        with open(file_name, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+
+@contextlib.contextmanager
+def stage(name, country=None, file=None):
+    """Record the time and memory of the stage in the run report if the report is started
+
+    Args:
+        name (str): stage name, e.g. 'open', 'parse', 'extract', 'write'
+        country (str): the country of the Reporting table file (extract stage)
+        file (str): the Reporting table file (extract stage)
+    """
+    if run_report is None:
+        yield
+        return
+    run_report.begin(name, country, file)
+    try:
+        yield
+    finally:
+        run_report.end()
+
+
+def extract(func, file, country, *args):
+    """Call func(file, country, *args) as the 'extract' stage of the file"""
+    with stage('extract', country, file):
+        return func(file, country, *args)
+
+
+def extract_task(trace_memory, func, file, country, *args):
+    """Process pool task: extract with a new run report in the worker
+
+    Returns:
+        tuple: the result of func and the records of the run report to merge
+    """
+    global run_report
+    run_report = RunReport(trace_memory)
+    result = extract(func, file, country, *args)
+    records = run_report.records()
+    run_report = None
+    return (result, records)
+
+
+def start(report_file, profile_file=None, trace_memory=False):
+    """Start the run report and the profiler
+
+    Args:
+        report_file (str): JSON file of the run report, None for no report
+        profile_file (str): cProfile output file (pstats), None for no profile
+        trace_memory (bool): trace memory allocations of each stage with tracemalloc
+    """
+    global run_report, profiler
+    if report_file is not None:
+        run_report = RunReport(trace_memory)
+        run_report.file_name = report_file
+    if profile_file is not None:
+        profiler = cProfile.Profile()
+        profiler.file_name = profile_file
+        profiler.enable()
+
+
+def finish():
+    """Stop the profiler and write the profile and the run report"""
+    global run_report, profiler
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(profiler.file_name)
+        print("Profile written to:", profiler.file_name)
+        profiler = None
+    if run_report is not None:
+        run_report.write(run_report.file_name)
+        print("Run report written to:", run_report.file_name)
+        run_report = None
@@ -0,0 +1,95 @@
+import os
+import pathlib
+import hashlib
+import pickle
+import archivefile
+
+# Default maximum size of the cache directory in megabytes
+default_cache_size = 2048
+
+
+class SheetCache:
+    """Persistent on-disk cache of parsed Reporting table sheets.
+
+    Each parsed sheet (pandas DataFrame) is stored as a pickle file. The cache key is
+    made of the Reporting table file path, size and modification time, the sheet name
+    and the read options, i.e. a changed Reporting table file is parsed again.
+    The total size of the cache is kept below max_size by removing the least
+    recently used files (file modification time is updated on each cache hit).
+    """
+
+    def __init__(self, cache_dir, max_size=default_cache_size):
+        """
+        Args:
+            cache_dir (str): cache directory, created if it does not exist
+            max_size (int): maximum size of the cache in megabytes
+        """
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_size)*1024*1024
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = sum(f.stat().st_size for f in self.cache_dir.glob('*.pkl'))
+
+    def key(self, file, sheet, read_options):
+        """Cache key for the sheet in the file read with read_options (dict)"""
+        key_ls = [os.path.abspath(file), *archivefile.file_state(file), sheet,
+                  sorted((k, repr(v)) for (k, v) in read_options.items())]
+        return hashlib.sha1(repr(key_ls).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached object or None if not in cache"""
+        path = self.cache_dir/(key+'.pkl')
+        try:
+            with open(path, 'rb') as f:
+                obj = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses = self.misses+1
+            return None
+        # Mark as recently used
+        os.utime(path)
+        self.hits = self.hits+1
+        return obj
+
+    def contains(self, key):
+        """True if the key is in the cache, not counted as hit or miss"""
+        return (self.cache_dir/(key+'.pkl')).exists()
+
+    def put(self, key, obj):
+        """Store the object in the cache and evict least recently used files if needed"""
+        path = self.cache_dir/(key+'.pkl')
+        tmp_path = self.cache_dir/(key+'.pkl.'+str(os.getpid())+'.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        if path.exists():
+            self.total_bytes = self.total_bytes-path.stat().st_size
+        os.replace(tmp_path, path)
+        self.total_bytes = self.total_bytes+path.stat().st_size
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used files until the cache is below 90% of the maximum size"""
+        files = []
+        for f in self.cache_dir.glob('*.pkl'):
+            try:
+                stat = f.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime_ns, stat.st_size, f))
+        files.sort()
+        self.total_bytes = sum(size for (mtime, size, f) in files)
+        for (mtime, size, f) in files:
+            if self.total_bytes <= 0.9*self.max_bytes:
+                break
+            try:
+                f.unlink()
+            except FileNotFoundError:
+                pass
+            self.total_bytes = self.total_bytes-size
+
+    def clear(self):
+        """Remove all files in the cache"""
+        for f in self.cache_dir.glob('*.pkl'):
+            f.unlink()
+        self.total_bytes = 0
@@ -0,0 +1,295 @@
+import json
+import pathlib
+import argparse
+import numpy as np
+import pandas as pd
+import EUutility
+import runreport
+import longtable
+from runreport import stage
+from labelindex import sheet_label_index
+from notationkey import NotationKeyCodes, split_values
+
+# Output layouts of a spec: 'table' one sheet for each table row with a row for each country and year
+# and a column for each value column (as eurestoration.py), 'matrix' one sheet for each table row and
+# value column with a row for each country and a column for each year (as eulandtransitionmatrix.py)
+layout_ls = ['table', 'matrix']
+# Default output sheet names of the layouts, formatted with the sheet, row and column names
+sheet_name_format_dict = {'table': '{sheet} {row}', 'matrix': '{row} {column}'}
+# Excel limits the sheet names to 31 characters
+max_sheet_name_length = 31
+
+
+def load_spec(file_name):
+    """Load an extraction spec from a JSON or YAML (requires PyYAML) file and check it (see check_spec)
+
+    Args:
+        file_name (str): spec file, .json, .yaml or .yml
+    """
+    suffix = pathlib.Path(file_name).suffix.lower()
+    with open(file_name, encoding='utf-8') as f:
+        if suffix in ['.yaml', '.yml']:
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("YAML specs require PyYAML: pip install pyyaml")
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    check_spec(spec, file_name)
+    return spec
+
+
+def check_spec(spec, file_name):
+    """Check the keys of the spec and fill in the defaults, the format is described in the README
+
+    Args:
+        spec (dict): the spec
+        file_name (str): spec file for the error messages
+    """
+    for key in ['name', 'tables']:
+        if key not in spec:
+            raise ValueError("Spec "+str(file_name)+" has no '"+key+"'")
+    spec.setdefault('output', spec['name'])
+    spec.setdefault('layout', 'table')
+    if spec['layout'] not in layout_ls:
+        raise ValueError("Unknown layout "+str(spec['layout'])+" in spec "+str(file_name)+", use one of "+str(layout_ls))
+    spec.setdefault('sheet_name', sheet_name_format_dict[spec['layout']])
+    for table in spec['tables']:
+        for key in ['sheet', 'rows', 'columns']:
+            if key not in table:
+                raise ValueError("Table in spec "+str(file_name)+" has no '"+key+"'")
+        table.setdefault('label_column', 0)
+        table.setdefault('read', {})
+        table.setdefault('drop_empty', False)
+        for row in table['rows']:
+            if 'label' not in row:
+                raise ValueError("Row in table "+table['sheet']+" of spec "+str(file_name)+" has no 'label'")
+            row.setdefault('name', row['label'])
+            row.setdefault('case', True)
+            row.setdefault('occurrence', 0)
+            row.setdefault('fallback', [])
+            row.setdefault('after', None)
+        for column in table['columns']:
+            if 'index' not in column:
+                raise ValueError("Column in table "+table['sheet']+" of spec "+str(file_name)+" has no 'index'")
+            column.setdefault('name', str(column['index']))
+            column.setdefault('unit', '')
+
+
+def row_position(label_index, row):
+    """The position of the row of the spec in the sheet, None if not found
+
+    With 'after' (regular expression) only the rows below the first row matching it are
+    searched, e.g. the rows of the section 'B. HWP produced and exported', and the row is
+    not found if the sheet has no such section. The occurrence of the label (regular
+    expression) is used. If the label has no such occurrence the first row matching each
+    fallback pattern (fnmatch) is tried in order, only for the first occurrence: a fallback
+    never stands in for a later occurrence.
+
+    Args:
+        label_index (labelindex.LabelIndex): the title column of the sheet
+        row (dict): row of a spec table
+    """
+    first_position = 0
+    if row['after'] is not None:
+        anchor_positions = label_index.contains(row['after'], case=row['case'])
+        if len(anchor_positions) == 0:
+            return None
+        first_position = anchor_positions[0]+1
+    positions = [position for position in label_index.contains(row['label'], case=row['case'])
+                 if position >= first_position]
+    if len(positions) > row['occurrence']:
+        return positions[row['occurrence']]
+    if row['occurrence'] > 0:
+        return None
+    for pattern in row['fallback']:
+        positions = [position for position in label_index.match(pattern) if position >= first_position]
+        if len(positions) > 0:
+            return positions[0]
+    return None
+
+
+def ReadSpecTable(file, table):
+    """
+    Read the rows and columns of one spec table from a Reporting table file
+    \param file Reporting table file
+    \param table Table of a spec (sheet, read options, label column, rows and columns)
+    \return array (row,column) of the values as read, None if the sheet is missing
+    """
+    sheet = EUutility.find_sheet_name(file, table['sheet'])
+    if sheet is None:
+        print("Missing sheet", table['sheet'], "in", file)
+        return None
+    read_options = dict(table['read'])
+    if 'cell_range' in table:
+        read_options['cell_range'] = table['cell_range']
+    df = EUutility.read_sheet(file, sheet, **read_options)
+    if table['drop_empty']:
+        df = df.dropna(axis=1, how='all').dropna(axis=0, how='all')
+    label_index = sheet_label_index(df, df.columns[table['label_column']])
+    column_index_ls = [column['index'] for column in table['columns']]
+    values = np.full((len(table['rows']), len(column_index_ls)), np.nan, dtype=object)
+    for (row_index, row) in enumerate(table['rows']):
+        position = row_position(label_index, row)
+        if position is None:
+            print("Missing row", row['name'], "in", table['sheet'], file)
+            continue
+        values[row_index] = [df.iat[position, col] if col < df.shape[1] else np.nan for col in column_index_ls]
+    return values
+
+
+def ReadSpecFile(file, country, spec_ls):
+    """
+    Read the tables of all specs from one Reporting table file. The file is opened once
+    and each sheet is parsed once for all specs reading it with the same options.
+    \param file Reporting table file
+    \param country The country of the file
+    \param spec_ls List of specs
+    \return for each spec the list of ReadSpecTable results
+    """
+    print(file)
+    with EUutility.open_workbook(file):
+        return [[ReadSpecTable(file, table) for table in spec['tables']] for spec in spec_ls]
+
+
+def SpecArrays(spec_index, spec, country_result_lss, countryls, start: int, end: int):
+    """
+    Collect the values of one spec read from all files into float arrays, notation keys are NaN
+    \param spec_index The index of the spec in the spec list read with ReadSpecFile
+    \param spec The spec
+    \param country_result_lss For each country the list of ReadSpecFile results in year order
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \return for each table of the spec an array (country,year,row,column)
+    """
+    array_ls = []
+    for (table_index, table) in enumerate(spec['tables']):
+        cells = np.full((len(countryls), end-start+1, len(table['rows']), len(table['columns'])), np.nan, dtype=object)
+        for (country_index, result_ls) in enumerate(country_result_lss):
+            for (year_index, result) in enumerate(result_ls):
+                if result is not None and result[spec_index][table_index] is not None:
+                    cells[country_index, year_index] = result[spec_index][table_index]
+        (values, key_codes) = split_values(cells, NotationKeyCodes())
+        array_ls.append(values)
+    return array_ls
+
+
+def column_title(column):
+    """The output title of the value column, the name and the unit in parentheses, e.g. 'TotalArea(kha)'"""
+    if column['unit'] == '':
+        return column['name']
+    return column['name']+'('+column['unit']+')'
+
+
+def spec_sheet_name(spec, table, row, column=None):
+    """The output sheet name of the row (and the column) of the table, see sheet_name_format_dict"""
+    name = table.get('sheet_name', spec['sheet_name']).format(sheet=table['sheet'], row=row['name'],
+                                                              column=column_title(column) if column is not None else '')
+    return name[:max_sheet_name_length]
+
+
+def WriteSpecSheets(writer, spec, array_ls, countryls, start: int, end: int):
+    """
+    Write the output sheets of a spec in its layout (see layout_ls)
+    \param writer Excel writer
+    \param spec The spec
+    \param array_ls SpecArrays result
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    """
+    year_ls = list(range(start, end+1))
+    for (table, values) in zip(spec['tables'], array_ls):
+        for (row_index, row) in enumerate(table['rows']):
+            if spec['layout'] == 'table':
+                df = pd.DataFrame(values[:, :, row_index, :].reshape(-1, len(table['columns'])),
+                                  columns=[column_title(column) for column in table['columns']],
+                                  index=[country for country in countryls for year in year_ls])
+                df.insert(0, 'Year', year_ls*len(countryls))
+                df.to_excel(writer, sheet_name=spec_sheet_name(spec, table, row), na_rep='NaN')
+            else:
+                for (column_index, column) in enumerate(table['columns']):
+                    df = pd.DataFrame(values[:, :, row_index, column_index], index=countryls, columns=year_ls)
+                    df.to_excel(writer, sheet_name=spec_sheet_name(spec, table, row, column), na_rep='NaN')
+
+
+def AddSpecLongTable(long_table, spec_index, spec, country_result_lss, countryls, start: int):
+    """
+    Add the values of a spec to the long table (see longtable.py), notation keys are kept
+    \param long_table longtable.LongTable
+    \param spec_index The index of the spec in the spec list read with ReadSpecFile
+    \param spec The spec
+    \param country_result_lss For each country the list of ReadSpecFile results in year order
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    """
+    for (country, result_ls) in zip(countryls, country_result_lss):
+        for (year_index, result) in enumerate(result_ls):
+            for (table_index, table) in enumerate(spec['tables']):
+                if result is None or result[spec_index][table_index] is None:
+                    continue
+                long_table.add(country, start+year_index, table['sheet'], [row['name'] for row in table['rows']],
+                               [column['name'] for column in table['columns']], result[spec_index][table_index],
+                               [column['unit'] for column in table['columns']])
+
+
+def RunSpecs(file_prefix, directory, countryls, spec_ls, start: int, end: int, long_file=None):
+    """
+    Read the Reporting table files once for all specs and write the output file of each spec
+    \param file_prefix Output file name prefix
+    \param directory The directory where the Reporting tables are located
+    \param countryls List of countries
+    \param spec_ls List of specs (see load_spec)
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \param long_file If given, save also all values read as long table to this file (see longtable.py)
+    \return list of output file names
+    """
+    country_result_lss = EUutility.map_country_files(ReadSpecFile, directory, countryls, start, end, spec_ls)
+    long_table = longtable.LongTable() if long_file is not None else None
+    file_name_ls = []
+    for (spec_index, spec) in enumerate(spec_ls):
+        array_ls = SpecArrays(spec_index, spec, country_result_lss, countryls, start, end)
+        if long_table is not None:
+            AddSpecLongTable(long_table, spec_index, spec, country_result_lss, countryls, start)
+        file_name = file_prefix+'_'+spec['output']+'_'+str(start)+'_'+str(end)+'.xlsx'
+        print("Writing results to:", file_name)
+        with stage('write'):
+            writer = pd.ExcelWriter(file_name, engine='xlsxwriter')
+            WriteSpecSheets(writer, spec, array_ls, countryls, start, end)
+            writer.close()
+        file_name_ls.append(file_name)
+    if long_table is not None:
+        print("Writing long table to:", long_file)
+        with stage('write'):
+            long_table.save(long_file)
+    return file_name_ls
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract the tables declared in the spec files in one pass over the Reporting tables")
+    parser.add_argument("specs", nargs='+', help="Spec files (.json, or .yaml with PyYAML), e.g. specs/restoration.json")
+    parser.add_argument("-d", "--directory", dest="f1",
+                        required=True, help="Inventory Parties Directory (or zip archive)")
+    parser.add_argument("-s", "--start", type=int, dest="f2",
+                        required=True, help="Inventory start year (1990)")
+    parser.add_argument("-e", "--end", type=int, dest="f3",
+                        required=True, help="Inventory end year")
+    EUutility.add_country_arguments(parser)
+    EUutility.add_run_arguments(parser, layout_cache=False)
+    args = parser.parse_args()
+    spec_ls = [load_spec(file_name) for file_name in args.specs]
+    EUutility.apply_run_arguments(args)
+    directory = args.f1
+    print("Inventory Parties data directory:", directory)
+    inventory_start = int(args.f2)
+    print("Inventory start:", inventory_start)
+    inventory_end = int(args.f3)
+    print("Inventory end:", inventory_end)
+    print("Specs:", [spec['name'] for spec in spec_ls])
+    (countryls, file_prefix) = EUutility.select_countries(args)
+    RunSpecs(file_prefix, directory, countryls, spec_ls, inventory_start, inventory_end, args.long)
+    runreport.finish()
+    print("Done")
@@ -0,0 +1,220 @@
+import os
+import argparse
+import pathlib
+import numpy as np
+import xlsxwriter
+from countrylist import allcountryls
+
+# Synthetic CRT Reporting table files for testing and benchmarking the python scripts.
+# The sheets read by the scripts (Table4.1, Table4.A-D and Table4.Gs1) have the row labels and
+# layout of the real Reporting tables, the values are random. Other sheets are filler of similar size.
+
+# Table4.1 FROM rows (column B, from row 9 onwards) and TO columns (row 8, from column C onwards)
+table41_row_ls = ['Forest land (managed)', 'Forest land (unmanaged)', 'Cropland', 'Grassland (managed)',
+                  'Grassland (unmanaged)', 'Wetlands (managed) (3)', 'Wetlands (unmanaged)', 'Settlements',
+                  'Other land', 'Total unmanaged land', 'Final area', 'Net change']
+table41_col_ls = ['Forest land (managed)', 'Forest land (unmanaged)', 'Cropland', 'Grassland (managed)',
+                  'Grassland (unmanaged)', 'Wetlands (managed)', 'Wetlands (unmanaged)', 'Settlements',
+                  'Other land', 'Total unmanaged land', 'Initial area']
+# Table4.A-D: total row, land use category and the number of data columns
+table4_total_ls = ['A. Total forest land', 'B. Total cropland', 'C. Total grassland', 'D. Total wetlands']
+table4_land_ls = ['forest land', 'cropland', 'grassland', 'wetlands']
+table4_other_ls = ['Forest land', 'Cropland', 'Grassland', 'Wetlands', 'Settlements', 'Other land']
+table4_ncols_ls = [18, 16, 16, 16]
+# Table4.Gs1 HWP categories
+table4gs1_product_ls = ['4.G.1 Solid wood', '4.G.2 Paper and paperboard', '4.G.3 Other']
+table4gs1_column_ls = ['Gains', 'Losses', 'Half-life (years)', 'Annual change in stock (kt C)',
+                       'Net CO2 emissions/removals (kt CO2)']
+notation_key_ls = ['NO', 'NA', 'IE', 'NE', 'NO,NA', 'NA,NO,IE']
+# Countries with domestic and exported HWP reported separately, and with exported summed to domestic (ITA)
+split_hwp_country_ls = ['AUT', 'FIN', 'SWE']
+domestic_hwp_country_ls = ['ITA']
+# Filler sheets before and after the LULUCF tables: (sheet names, rows, columns)
+filler_sheet_ls = [(['Table1', 'Table1.A(a)s1', 'Table1.A(a)s2', 'Table1.B.1', 'Table2(I)', 'Table2(II)',
+                     'Table3.A', 'Table3.B(a)', 'Table3.B(b)', 'Table3.D'], 60, 20)]
+lulucf_filler_sheet_ls = [(['Table4.E', 'Table4.F', 'Table4(I)', 'Table4(II)', 'Table4(III)', 'Table4(IV)',
+                            'Table4(V)'], 20, 12)]
+end_filler_sheet_ls = [(['Table4.Gs2'], 20, 8),
+                       (['Table5', 'Table5.A', 'Table6', 'Summary1', 'Summary2', 'Summary3'], 60, 20)]
+
+
+def cell_value(rng, p_key=0.15):
+    """Random value or notation key with probability p_key
+
+    Args:
+        rng: numpy random generator
+        p_key (float): probability of notation key
+    """
+    if rng.random() < p_key:
+        return notation_key_ls[rng.integers(len(notation_key_ls))]
+    return float(rng.normal(1000.0, 300.0))
+
+
+def write_filler(wb, rng, sheet_name, nrows, ncols):
+    """Sheet of random values that is not read by the scripts"""
+    ws = wb.add_worksheet(sheet_name)
+    ws.write(0, 1, sheet_name.upper()+' SECTORAL REPORT')
+    for i in range(nrows):
+        ws.write(4+i, 1, 'Category '+str(i+1))
+        for j in range(ncols):
+            ws.write(4+i, 2+j, cell_value(rng))
+
+
+def write_table41(wb, rng):
+    """Table4.1 Land Transition Matrix: header in row 8, FROM rows from row 9 and footnotes"""
+    ws = wb.add_worksheet('Table4.1')
+    ws.write(0, 1, 'TABLE 4.1 LAND TRANSITION MATRIX')
+    ws.write(1, 1, 'Areas and changes in areas between the previous and the current inventory year (1), (2)')
+    ws.write(6, 2, '(kha)')
+    ws.write(7, 1, 'TO:')
+    for (j, col) in enumerate(table41_col_ls):
+        ws.write(7, 2+j, col)
+    for (i, row) in enumerate(table41_row_ls):
+        ws.write(8+i, 1, row)
+        for j in range(len(table41_col_ls)):
+            ws.write(8+i, 2+j, cell_value(rng, 0.3))
+    ws.write(21, 1, '(1) Cropland and Grassland footnote: the Forest land (managed) areas.')
+    ws.write(22, 1, '(2) Other land includes ...')
+
+
+def write_table4abcd(wb, rng, index):
+    """Table4.A-D: total row in row 10, land remaining and land converted rows with subdivisions"""
+    letter = 'ABCD'[index]
+    land = table4_land_ls[index]
+    ncols = table4_ncols_ls[index]
+    ws = wb.add_worksheet('Table4.'+letter)
+    ws.write(0, 1, 'TABLE 4.'+letter+' SECTORAL BACKGROUND DATA FOR LAND USE, LAND-USE CHANGE AND FORESTRY')
+    ws.write(1, 1, land.capitalize())
+    ws.write(3, 1, 'GREENHOUSE GAS SOURCE AND SINK CATEGORIES')
+    ws.write(3, 2, 'Subdivision (1)')
+    for j in range(ncols):
+        ws.write(3, 3+j, 'Measure '+str(j+1))
+    ws.write(3, 3+ncols+2, 'Information item')
+    row_ls = [(table4_total_ls[index], '')]
+    row_ls.append(('1. '+land.capitalize()+' remaining '+land, ''))
+    for subdivision in ['Mineral soils', 'Organic soils']:
+        row_ls.append(('', subdivision))
+    row_ls.append(('2. Land converted to '+land, ''))
+    k = 1
+    for other in table4_other_ls:
+        if other.lower() == land:
+            continue
+        row_ls.append(('2.'+str(k)+' '+other+' converted to '+land, ''))
+        row_ls.append(('', 'Region '+str(k)))
+        k = k+1
+    r = 9
+    for (label, subdivision) in row_ls:
+        if label:
+            ws.write(r, 1, label)
+        if subdivision:
+            ws.write(r, 2, subdivision)
+        for j in range(ncols):
+            ws.write(r, 3+j, cell_value(rng))
+        r = r+1
+    ws.write(r+1, 1, '(1) Parties may add subdivisions. Total forest land is the sum of ...')
+
+
+def write_table4gs1(wb, rng, sheet_name, layout):
+    """Table4.Gs1 HWP with layout 'total' (TOTAL HWP only), 'split' (domestic and exported)
+       or 'domestic' (exported summed to domestic, exported part has notation keys)
+    """
+    ws = wb.add_worksheet(sheet_name)
+    ws.write(0, 1, 'TABLE 4.Gs1 SECTORAL BACKGROUND DATA FOR LAND USE, LAND-USE CHANGE AND FORESTRY')
+    ws.write(1, 1, 'Harvested wood products (HWP)')
+    ws.write(4, 1, 'HWP categories')
+    for (j, title) in enumerate(table4gs1_column_ls):
+        ws.write(4, 3+j, title)
+
+    def write_block(r, total_label, keys=False):
+        for label in [total_label]+table4gs1_product_ls:
+            ws.write(r, 1, label)
+            for j in range(len(table4gs1_column_ls)):
+                ws.write(r, 3+j, 'NO' if keys else cell_value(rng, 0.0))
+            r = r+1
+        return r
+    r = 6
+    if layout == 'total':
+        r = write_block(r, 'TOTAL HWP')
+    else:
+        ws.write(r, 1, 'A. HWP produced and consumed domestically')
+        r = write_block(r+1, 'Total')
+        ws.write(r, 1, 'B. HWP produced and exported')
+        r = write_block(r+1, 'Total', keys=(layout == 'domestic'))
+    ws.write(r, 1, 'Other (please specify)')
+    ws.write(r+2, 1, '(1) Total HWP: Solid wood, Paper and paperboard and Other according to the Approach B')
+
+
+def WriteReportingTable(file, country, year, seed):
+    """
+    Write one synthetic Reporting table file
+    \param file Output file name
+    \param country The country (EUA has "Table4.Gs1 " with trailing whitespace, ITA has domestic HWP only)
+    \param year Inventory year
+    \param seed Random seed
+    """
+    rng = np.random.default_rng(seed)
+    wb = xlsxwriter.Workbook(file)
+    for (sheet_name_ls, nrows, ncols) in filler_sheet_ls:
+        for sheet_name in sheet_name_ls:
+            write_filler(wb, rng, sheet_name, nrows, ncols)
+    write_table41(wb, rng)
+    for index in range(len(table4_total_ls)):
+        write_table4abcd(wb, rng, index)
+    for (sheet_name_ls, nrows, ncols) in lulucf_filler_sheet_ls:
+        for sheet_name in sheet_name_ls:
+            write_filler(wb, rng, sheet_name, nrows, ncols)
+    layout = 'total'
+    if country in domestic_hwp_country_ls:
+        layout = 'domestic'
+    elif country in split_hwp_country_ls:
+        layout = 'split'
+    # MOD 2026: EUA has "Table4.Gs1 " (with trailing whitespace)
+    write_table4gs1(wb, rng, 'Table4.Gs1 ' if country == 'EUA' else 'Table4.Gs1', layout)
+    for (sheet_name_ls, nrows, ncols) in end_filler_sheet_ls:
+        for sheet_name in sheet_name_ls:
+            write_filler(wb, rng, sheet_name, nrows, ncols)
+    wb.close()
+
+
+def GenerateInventory(directory, countryls, start, end, seed=0):
+    """
+    Write synthetic Reporting table files for the countries and inventory years into
+    country directories as in the Inventory Parties directory
+    \param directory Inventory Parties directory to create
+    \param countryls List of countries
+    \param start Inventory start year (1990)
+    \param end Inventory end year
+    \param seed Random seed, the same seed gives the same files
+    \return list of files written
+    """
+    file_ls = []
+    for (country_index, country) in enumerate(countryls):
+        country_dir = pathlib.Path(directory)/country
+        os.makedirs(country_dir, exist_ok=True)
+        for year in range(start, end+1):
+            file_name = country+'-CRT-2025-V1.0-'+str(year)+'-20250411-120000_started.xlsx'
+            file = str(country_dir/file_name)
+            WriteReportingTable(file, country, year, seed+country_index*10000+year)
+            file_ls.append(file)
+    return file_ls
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic CRT Reporting table files")
+    parser.add_argument("-d", "--directory", dest="f1",
+                        required=True, help="Inventory Parties Directory to create")
+    parser.add_argument("-s", "--start", type=int, dest="f2",
+                        required=True, help="Inventory start year (1990)")
+    parser.add_argument("-e", "--end", type=int, dest="f3",
+                        required=True, help="Inventory end year")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("-c", "--countries", dest="country", type=str, nargs='+',
+                       help="List of countries from the official acronyms separated by spaces")
+    group.add_argument("-n", "--ncountries", dest="ncountries", type=int,
+                       help="Number of countries from the list of all countries (countrylist.py)")
+    parser.add_argument("--seed", dest="seed", type=int, default=0, help="Random seed (default %(default)s)")
+    args = parser.parse_args()
+    countryls = args.country if args.country else allcountryls[:args.ncountries]
+    print("Writing synthetic Reporting tables for", countryls, args.f2, "-", args.f3, "to", args.f1)
+    file_ls = GenerateInventory(args.f1, countryls, args.f2, args.f3, args.seed)
+    print("Files written:", len(file_ls))
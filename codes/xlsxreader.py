@@ -0,0 +1,440 @@
+import re
+import zipfile
+import posixpath
+import xml.etree.ElementTree as ET
+import numpy as np
+import pandas as pd
+try:
+    # StreamReader subclasses the pandas Excel reader base class that is not public API,
+    # only the pandas versions in stream_pandas_versions (see requirements.txt) are supported
+    from pandas.io.excel._base import BaseExcelReader
+except ImportError:
+    BaseExcelReader = object
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.datetime import from_excel, from_ISO8601, CALENDAR_WINDOWS_1900, CALENDAR_MAC_1904
+
+# Available Excel reader backends
+# openpyxl: pandas default, loads the workbook model with openpyxl (default)
+# calamine: pandas calamine engine, requires python-calamine package
+# stream: parse only the XML of the sheet read (and the shared strings it needs),
+#         only the cell range needed and only up to the last row needed,
+#         requires a pandas version in stream_pandas_versions
+reader_ls = ['openpyxl', 'calamine', 'stream']
+default_reader = 'openpyxl'
+# pandas versions (first, first not supported) of the BaseExcelReader interface used by StreamReader,
+# load_workbook(filepath_or_buffer, engine_kwargs) and get_sheet_data(sheet, file_rows_needed)
+stream_pandas_versions = ((2, 1), (2, 4))
+
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+
+def local_name(tag):
+    """XML tag without the namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def column_index(ref):
+    """Column index (A=1) from cell reference such as 'B9'"""
+    col = 0
+    for ch in ref:
+        if 'A' <= ch <= 'Z':
+            col = col*26+ord(ch)-64
+        elif 'a' <= ch <= 'z':
+            col = col*26+ord(ch)-96
+        else:
+            break
+    return col
+
+
+def column_letter(col):
+    """Column letter of the column index (A=1), the inverse of column_index"""
+    letter = ''
+    while col > 0:
+        (col, rest) = divmod(col-1, 26)
+        letter = chr(65+rest)+letter
+    return letter
+
+
+def range_bounds(cell_range):
+    """Rows and columns (A=1) of cell range such as 'B9:M20', 'B:M' (all rows) or 'B9:M' (from row 9)
+
+    Returns:
+        tuple: first row, last row (None for all rows), first column, last column
+    """
+    (first, last) = cell_range.split(':') if ':' in cell_range else (cell_range, cell_range)
+    first_digits = first.lstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz')
+    last_digits = last.lstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz')
+    first_row = int(first_digits) if first_digits else 1
+    last_row = int(last_digits) if last_digits else None
+    return (first_row, last_row, column_index(first), column_index(last))
+
+
+class LabelStop:
+    """Stop reading a sheet when each label pattern has been found in the label column.
+
+    The rows are searched as in str.contains(pattern) and only the first matching row of
+    each pattern is used (e.g. the Table4.1 rows), so the rows after the first match of
+    all patterns are not needed.
+    """
+
+    def __init__(self, column, pattern_ls, first_row=1):
+        """
+        Args:
+            column (str): label column, e.g. 'B'
+            pattern_ls (list): regular expressions, e.g. 'Wetlands \\(managed'
+            first_row (int): first row searched (the rows after the header)
+        """
+        self.col_index = column_index(column)-1
+        self.pattern_ls = list(pattern_ls)
+        self.first_row = first_row
+
+    def __call__(self, row_number, row_values):
+        """True when all patterns have been found, row_values with shared strings resolved"""
+        if row_number >= self.first_row and len(row_values) > self.col_index:
+            label = row_values[self.col_index]
+            if isinstance(label, str):
+                self.pattern_ls = [pattern for pattern in self.pattern_ls if re.search(pattern, label) is None]
+        return not self.pattern_ls
+
+
+def text_content(element):
+    """Text of shared or inline string element stripped of formatting (as openpyxl)"""
+    snippets = []
+    for child in element:
+        name = local_name(child.tag)
+        if name == 't':
+            snippets.append(child.text or '')
+        elif name == 'r':
+            for t in child:
+                if local_name(t.tag) == 't':
+                    snippets.append(t.text or '')
+    return ''.join(snippets).replace('x005F_', '')
+
+
+def cast_number(value):
+    """Number as in openpyxl and pandas: integral values are int, others float"""
+    if '.' in value or 'E' in value or 'e' in value:
+        value = float(value)
+        int_value = int(value)
+        if int_value == value:
+            return int_value
+        return value
+    return int(value)
+
+
+class SharedString:
+    """Placeholder for a shared string index, resolved after the sheet is parsed"""
+    __slots__ = ['index']
+
+    def __init__(self, index):
+        self.index = index
+
+
+class StreamWorkbook:
+    """xlsx file opened as zip archive. Only the workbook part, relations and styles are
+       read when opened. Sheet XML and shared strings are parsed when a sheet is read.
+    """
+
+    def __init__(self, file):
+        """
+        Args:
+            file: path or binary file-like object of the xlsx file
+        """
+        self.zip = zipfile.ZipFile(file)
+        self.shared_strings = []
+        self.shared_string_source = None
+        self.shared_string_iter = None
+        self.sheet_path_dict = {}
+        self.sheet_names = []
+        rels = ET.fromstring(self.zip.read('xl/_rels/workbook.xml.rels'))
+        target_dict = {}
+        for rel in rels:
+            target = rel.get('Target')
+            if target.startswith('/'):
+                target = target[1:]
+            else:
+                target = posixpath.normpath(posixpath.join('xl', target))
+            target_dict[rel.get('Id')] = target
+        workbook = ET.fromstring(self.zip.read('xl/workbook.xml'))
+        self.epoch = CALENDAR_WINDOWS_1900
+        for element in workbook.iter():
+            name = local_name(element.tag)
+            if name == 'sheet':
+                sheet_name = element.get('name')
+                self.sheet_names.append(sheet_name)
+                self.sheet_path_dict[sheet_name] = target_dict.get(element.get(REL_NS+'id'))
+            elif name == 'workbookPr' and element.get('date1904') in ['1', 'true']:
+                self.epoch = CALENDAR_MAC_1904
+        self.read_styles()
+
+    def read_styles(self):
+        """Find the cell styles with date and time formats (numbers are converted to dates as in openpyxl)"""
+        self.date_styles = set()
+        self.timedelta_styles = set()
+        if 'xl/styles.xml' not in self.zip.namelist():
+            return
+        styles = ET.fromstring(self.zip.read('xl/styles.xml'))
+        format_dict = dict(BUILTIN_FORMATS)
+        for element in styles.iter():
+            if local_name(element.tag) == 'numFmt':
+                format_dict[int(element.get('numFmtId'))] = element.get('formatCode')
+        for element in styles:
+            if local_name(element.tag) == 'cellXfs':
+                for (style_id, xf) in enumerate(element):
+                    number_format = format_dict.get(int(xf.get('numFmtId', 0)))
+                    if number_format is not None and is_date_format(number_format):
+                        self.date_styles.add(style_id)
+                        if is_timedelta_format(number_format):
+                            self.timedelta_styles.add(style_id)
+
+    def resolve_shared_strings(self, index_set):
+        """Parse the shared strings only up to the largest index needed (the rest of the file is not read).
+           The parsing continues from the previous call, each shared string is parsed once.
+        """
+        if not index_set or max(index_set) < len(self.shared_strings):
+            return
+        last = max(index_set)
+        if self.shared_string_iter is None:
+            self.shared_string_source = self.zip.open('xl/sharedStrings.xml')
+            self.shared_string_iter = ET.iterparse(self.shared_string_source)
+        for (event, element) in self.shared_string_iter:
+            if local_name(element.tag) == 'si':
+                self.shared_strings.append(text_content(element))
+                element.clear()
+                if len(self.shared_strings) > last:
+                    break
+
+    def resolve_row(self, row_values):
+        """Replace the shared string placeholders in the row with the strings"""
+        self.resolve_shared_strings({value.index for value in row_values if isinstance(value, SharedString)})
+        for (col_index, value) in enumerate(row_values):
+            if isinstance(value, SharedString):
+                row_values[col_index] = self.shared_strings[value.index]
+
+    def cell_value(self, element):
+        """Cell value as in pandas openpyxl reader (before shared string resolution)"""
+        data_type = element.get('t', 'n')
+        if data_type == 'inlineStr':
+            for child in element:
+                if local_name(child.tag) == 'is':
+                    return text_content(child)
+            return ''
+        value = None
+        for child in element:
+            if local_name(child.tag) == 'v':
+                value = child.text
+                break
+        if not value:
+            return ''
+        if data_type == 'n':
+            value = cast_number(value)
+            style_id = int(element.get('s', 0))
+            if style_id in self.date_styles:
+                try:
+                    return from_excel(value, self.epoch, timedelta=style_id in self.timedelta_styles)
+                except (OverflowError, ValueError):
+                    return np.nan
+            return value
+        elif data_type == 's':
+            return SharedString(int(value))
+        elif data_type == 'b':
+            return bool(int(value))
+        elif data_type == 'str':
+            return value
+        elif data_type == 'd':
+            return from_ISO8601(value)
+        elif data_type == 'e':
+            return np.nan
+        return value
+
+    def get_sheet_data(self, sheet_name, file_rows_needed=None, cell_range=None, stop=None):
+        """Rows of the sheet as lists of values, in the same form as pandas openpyxl reader:
+           rows start from row 1 and column A, trailing empty cells and rows are removed
+           and rows are padded with '' to the same width.
+
+        Args:
+            sheet_name (str): sheet name
+            file_rows_needed (int): number of rows needed (pandas nrows), None for all
+            cell_range (str): read only the cells in the range (e.g. 'B:M' or 'B9:M20'), the other cells are empty
+                and the sheet XML is not read after the last row of the range
+            stop: function stop(row_number, row_values) called after each row, reading ends when it returns True
+                (e.g. LabelStop)
+        """
+        (first_row, last_row, first_col, last_col) = (1, None, 1, None)
+        if cell_range is not None:
+            (first_row, last_row, first_col, last_col) = range_bounds(cell_range)
+        data = []
+        shared_index_set = set()
+        row_number = 0
+        col_number = 0
+        row_values = []
+        with self.zip.open(self.sheet_path_dict[sheet_name]) as source:
+            for (event, element) in ET.iterparse(source, events=('start', 'end')):
+                name = local_name(element.tag)
+                if event == 'start':
+                    if name == 'row':
+                        r = element.get('r')
+                        row_number = int(r) if r else row_number+1
+                        if file_rows_needed is not None and row_number > file_rows_needed:
+                            break
+                        if last_row is not None and row_number > last_row:
+                            break
+                        # Missing rows are empty
+                        while len(data) < row_number-1:
+                            data.append([])
+                        row_values = []
+                        col_number = 0
+                    continue
+                if name == 'c':
+                    ref = element.get('r')
+                    col_number = column_index(ref) if ref else col_number+1
+                    if (row_number < first_row or col_number < first_col
+                            or (last_col is not None and col_number > last_col)):
+                        # Outside the cell range, the value is not parsed
+                        element.clear()
+                        continue
+                    value = self.cell_value(element)
+                    if isinstance(value, SharedString):
+                        shared_index_set.add(value.index)
+                    if len(row_values) < col_number-1:
+                        row_values.extend(['']*(col_number-1-len(row_values)))
+                    row_values.append(value)
+                    element.clear()
+                elif name == 'row':
+                    data.append(row_values)
+                    element.clear()
+                    if stop is not None:
+                        self.resolve_row(row_values)
+                        if stop(row_number, row_values):
+                            break
+                    row_values = []
+                elif name == 'sheetData':
+                    break
+        self.resolve_shared_strings(shared_index_set)
+        last_row_with_data = -1
+        for (row_index, row_values) in enumerate(data):
+            for (col_index, value) in enumerate(row_values):
+                if isinstance(value, SharedString):
+                    row_values[col_index] = self.shared_strings[value.index]
+            # trim trailing empty elements
+            while row_values and row_values[-1] == '':
+                row_values.pop()
+            if row_values:
+                last_row_with_data = row_index
+        data = data[:last_row_with_data+1]
+        if len(data) > 0:
+            max_width = max(len(row_values) for row_values in data)
+            data = [row_values+['']*(max_width-len(row_values)) for row_values in data]
+        return data
+
+    def close(self):
+        if self.shared_string_source is not None:
+            self.shared_string_source.close()
+        self.zip.close()
+
+
+def stream_supported():
+    """True if the pandas version installed is supported by StreamReader (see stream_pandas_versions)"""
+    version = tuple(int(part) for part in re.findall(r'\d+', pd.__version__)[:2])
+    (first, end) = stream_pandas_versions
+    return BaseExcelReader is not object and first <= version < end
+
+
+def check_stream_pandas_version():
+    """Raise ImportError if the pandas version installed is not supported by StreamReader"""
+    if not stream_supported():
+        required = 'pandas>=%d.%d,<%d.%d' % (stream_pandas_versions[0]+stream_pandas_versions[1])
+        raise ImportError("Excel reader 'stream' requires "+required+" (found "+pd.__version__+
+                          "), use: pip install -r requirements.txt or select another reader with --reader openpyxl")
+
+
+class StreamReader(BaseExcelReader):
+    """pandas Excel reader using StreamWorkbook. The data is converted to DataFrame with the
+       pandas Excel reader options (header, usecols, na_values etc.) as with the other engines.
+       cell_range and stop are passed to StreamWorkbook.get_sheet_data, see StreamExcelFile.parse.
+    """
+    cell_range = None
+    stop = None
+
+    @property
+    def _workbook_class(self):
+        return StreamWorkbook
+
+    def load_workbook(self, filepath_or_buffer, engine_kwargs):
+        return StreamWorkbook(filepath_or_buffer)
+
+    @property
+    def sheet_names(self):
+        return self.book.sheet_names
+
+    def get_sheet_by_name(self, name):
+        self.raise_if_bad_sheet_by_name(name)
+        return name
+
+    def get_sheet_by_index(self, index):
+        self.raise_if_bad_sheet_by_index(index)
+        return self.book.sheet_names[index]
+
+    def get_sheet_data(self, sheet, file_rows_needed=None):
+        return self.book.get_sheet_data(sheet, file_rows_needed, self.cell_range, self.stop)
+
+
+class StreamExcelFile:
+    """Same interface as pd.ExcelFile (sheet_names, parse, close) for the stream reader"""
+
+    def __init__(self, file):
+        check_stream_pandas_version()
+        self.reader = StreamReader(file)
+
+    @property
+    def sheet_names(self):
+        return self.reader.sheet_names
+
+    def parse(self, sheet_name=0, cell_range=None, stop_labels=None, **read_options):
+        """Parse the sheet as pd.ExcelFile.parse, reading only the cells needed
+
+        Args:
+            sheet_name: sheet name or index
+            cell_range (str): read only the cells in the range, e.g. 'B:M' (see StreamWorkbook.get_sheet_data)
+            stop_labels (tuple): (label column, list of regular expressions), stop reading after the first
+                row of each label below the header (see LabelStop)
+            read_options: options for pd.read_excel
+        """
+        self.reader.cell_range = cell_range
+        if stop_labels is not None:
+            header = read_options.get('header', 0)
+            first_row = header+2 if isinstance(header, int) else 1
+            self.reader.stop = LabelStop(stop_labels[0], stop_labels[1], first_row)
+        try:
+            return self.reader.parse(sheet_name=sheet_name, **read_options)
+        finally:
+            self.reader.cell_range = None
+            self.reader.stop = None
+
+    def close(self):
+        self.reader.close()
+
+
+def open_excel(file, reader=default_reader):
+    """Open Excel file with the reader backend
+
+    Args:
+        file: path or binary file-like object of the xlsx file
+        reader (str): one of reader_ls
+    Returns:
+        pd.ExcelFile or StreamExcelFile: object with sheet_names, parse(sheet_name,**read_options) and close()
+    """
+    if reader == 'stream':
+        return StreamExcelFile(file)
+    elif reader in ['openpyxl', 'calamine']:
+        return pd.ExcelFile(file, engine=reader)
+    raise ValueError("Unknown Excel reader "+str(reader)+", use one of "+str(reader_ls))
+
+
+def read_excel(file, sheet, reader=default_reader, **read_options):
+    """Read one sheet as pd.read_excel(file,sheet,**read_options) with the reader backend"""
+    xlsx = open_excel(file, reader)
+    try:
+        return xlsx.parse(sheet, **read_options)
+    finally:
+        xlsx.close()